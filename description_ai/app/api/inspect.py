@@ -1,46 +1,77 @@
 """
 결함 분석 API 엔드포인트
 """
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Response, status
+from fastapi import APIRouter, HTTPException, Header, Response, status
+from fastapi.responses import StreamingResponse
 import logging
 import asyncio
-from datetime import datetime, timezone
-from typing import List
+import json
+import uuid
+from typing import List, Optional
 
 from app.schemas.inspection import (
     ProductAnalysisRequest,
     ProductAnalysisResult,
-    ImageInspectionResult,
     DescriptionRequest,
     DescriptionResult
 )
-from app.services.gemini_inspector import analyze_defects, generate_product_description
+from app.services.gemini_inspector import (
+    DescriptionStreamCleaner,
+    GeminiInspector,
+    description_fallback,
+    get_inspector,
+    prompt_cache_stats,
+    stream_product_description
+)
+from app.services.deadline_executor import DeadlineExecutor, inspection_latency
+from app.services.description_batcher import description_batcher
+from app.services.fault_summary import FaultSummary, CoalescedFaultWriter
+from app.services.image_dedupe import compute_hashes, group_near_duplicates, prioritize
+from app.services.image_preprocess import image_preprocessor
+from app.services.inspector_router import inspector_router
+from app.services.job_registry import inspect_registry, input_fingerprint, head_etags
+from app.services.rate_limiter import gemini_rate_limiter, claude_rate_limiter
+from app.services.s3_client import s3_client
 from app.config import settings
+from app.utils.metrics import queued_slot, JOB_DURATION_SECONDS, JOB_SUBMISSIONS, DEDUPE_IMAGES
+from app.utils.result_cache import get_result_cache
 from app.db.database import (
     update_fault_description,
-    increment_job_count_and_activate,
-    update_product_sell_status
+    complete_fault_description,
+    fail_fault_description,
+    get_fault_description_state
 )
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/inspect", tags=["inspection"])
 
-# Queue system: Limit concurrent jobs to prevent Gemini API rate limit (15 RPM)
+# Queue system: Limit concurrent jobs (Gemini RPM/TPM은 rate_limiter가 프로세스 전체에서 관리)
 job_semaphore = asyncio.Semaphore(settings.MAX_CONCURRENT_JOBS)
 
 
 @router.post("/fault_desc", status_code=status.HTTP_202_ACCEPTED)
-async def fault_desc(request: ProductAnalysisRequest, background_tasks: BackgroundTasks):
+async def fault_desc(
+    request: ProductAnalysisRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
     """
     제품 전체 이미지 일괄 분석 (RDS 연동용)
 
     RDS에서 제품 정보를 받아 모든 이미지를 분석하고, 종합 결과를 마크다운으로 반환합니다.
 
     **워크플로우:**
-    1. 모든 이미지 배치 분석 (5개씩, Rate Limit 회피)
-    2. 결과 종합 (상위 70% 가중 평균)
-    3. 마크다운 요약 생성
-    4. RDS가 fault_description 테이블에 저장
+    1. 근접 중복 이미지 묶기 (pHash) → 묶음마다 대표 이미지 1장만 분석
+    2. 다중 이미지 모드로 분석 (청크당 Gemini 호출 1회, 이미지별 결과)
+       - Gemini가 p95 지연을 넘기거나 실패하면 Claude로 백업 요청 (먼저 온 결과 사용),
+         연속 실패 시 circuit breaker로 해당 프로바이더 건너뜀
+       - 마감(85초) 기반: 측정된 호출 지연으로 끝낼 수 있는 만큼만 전송,
+         근접 촬영/다른 각도 사진 우선, 마감 시 진행 중 호출 취소
+       - 결과 캐시에 있는 이미지는 호출 없이 재사용 (bypass_cache=true면 전부 재분석)
+       - 대표 이미지 결과를 묶음의 모든 이미지에 매핑
+    3. 결과 종합 (대표 이미지 기준 상위 70% 가중 평균) - 결과가 도착할 때마다 갱신
+    4. 진행 중 마크다운을 fault_description에 RUNNING으로 upsert (최소 간격으로 모아서 기록)
+    5. 최종 마크다운 요약 (이미지별 결과 포함)으로 교체, DONE + job_count 증가 (1회 왕복)
 
     **비용:**
     - 무료 티어: 월 1,500개 이미지 분석
@@ -50,158 +81,187 @@ async def fault_desc(request: ProductAnalysisRequest, background_tasks: Backgrou
 
     Args:
         request: 제품 분석 요청 (product_id, s3_images, product_name, product_description)
-        background_tasks: FastAPI BackgroundTasks
+        response: 응답 (이미 완료된 작업이면 200)
+        idempotency_key: Idempotency-Key 헤더 (재시도 시 입력 HEAD 생략)
+
+    **중복 제출 (product_id 기준, app/services/job_registry.py):**
+    - 같은 입력(S3 ETag + 제품명 + 모델)이 실행 중 → 기존 작업에 합류
+    - 같은 입력으로 이미 DONE → 즉시 200 (bypass_cache=true면 재분석)
+    - 다른 입력이 실행 중 → 기존 작업 취소 후 교체
 
     Returns:
-        202 Accepted: 작업이 큐에 추가됨
+        202 Accepted: 작업이 큐에 추가됨 (또는 실행 중 작업에 합류)
+        200 OK: 같은 입력으로 이미 완료됨
     """
+    # 실행 중인 제출의 재시도: 입력 HEAD 없이 합류
+    if inspect_registry.find_by_key(request.product_id, idempotency_key) is not None:
+        return _fault_desc_accepted(request.product_id, "attached")
+
+    fingerprint = input_fingerprint(
+        await head_etags(request.s3_images),
+        product_name=request.product_name,
+        model=settings.GEMINI_MODEL
+    )
+
+    if not request.bypass_cache and inspect_registry.get(request.product_id) is None:
+        try:
+            previous = await asyncio.to_thread(get_fault_description_state, request.product_id)
+        except Exception as e:
+            logger.warning(f"Could not read fault_description state for {request.product_id}: {e}")
+            previous = None
+        if previous and previous["status"] == 'DONE' and previous["input_fingerprint"] == fingerprint:
+            JOB_SUBMISSIONS.labels("completed").inc()
+            logger.info(f"fault_desc for {request.product_id} already completed with identical inputs")
+            response.status_code = status.HTTP_200_OK
+            return {
+                "product_id": request.product_id,
+                "status": "DONE",
+                "message": "동일한 입력으로 이미 완료된 분석입니다. fault_description 테이블에서 확인할 수 있습니다."
+            }
+
     async def _process_product_background():
         """백그라운드에서 실제 처리"""
+        # RUNNING 기록 (취소돼도 끝까지 진행 - 취소 경로가 완료를 기다린 뒤 FAILED 기록)
+        running_write: Optional[asyncio.Future] = None
         try:
             import time
-            start_time = time.time()
-            timeout_limit = 85.0  # 90초 중 85초까지만 사용 (안전 마진)
+            # 90초 중 85초까지만 사용 (안전 마진, 대기열 대기 시간 포함)
+            deadline = time.monotonic() + settings.FAULT_DESC_DEADLINE_SECONDS
+            # 이 작업 실행의 완료 기록 멱등 키
+            completion_key = uuid.uuid4().hex
 
             # Queue system: Wait for available slot
-            async with job_semaphore:
+            async with queued_slot(job_semaphore):
+                slot_acquired_at = time.time()
                 logger.info(
                     f"Starting product analysis: product_id={request.product_id}, "
                     f"images={len(request.s3_images)}"
                 )
 
                 # 1. DB 상태 업데이트: RUNNING
-                update_fault_description(
+                running_write = asyncio.ensure_future(asyncio.to_thread(
+                    update_fault_description,
                     product_id=request.product_id,
                     markdown="",
                     status='RUNNING',
                     error_msg=None
-                )
-
-                # 2. 모든 이미지 배치 분석 (Rate Limit 회피)
-                # Gemini 무료 티어: 15 RPM → 5개씩 배치 처리
-                batch_size = 5
-                all_results = []
-                processed_images = []
-                timed_out = False
-
-                for i in range(0, len(request.s3_images), batch_size):
-                    # 타임아웃 체크 (배치 시작 전)
-                    elapsed = time.time() - start_time
-                    if elapsed >= timeout_limit:
-                        logger.warning(f"Timeout approaching ({elapsed:.1f}s), stopping early")
-                        timed_out = True
-                        break
-
-                    batch_images = request.s3_images[i:i+batch_size]
-                    logger.info(f"Processing batch {i//batch_size + 1}/{(len(request.s3_images)-1)//batch_size + 1}")
-
-                    # 배치 내에서는 병렬 처리
-                    tasks = [
-                        analyze_defects(s3_path=img_path, item_category="물품")
-                        for img_path in batch_images
-                    ]
-                    batch_results = await asyncio.gather(*tasks, return_exceptions=True)
-                    all_results.extend(batch_results)
-                    processed_images.extend(batch_images)
-
-                    # 마지막 배치가 아니면 4초 대기 (RPM 제한 회피)
-                    if i + batch_size < len(request.s3_images):
-                        await asyncio.sleep(4)
-
-                results = all_results
-                images_to_process = processed_images
-
-                # 3. 결과 취합 (성공한 이미지만)
-                inspection_results: List[ImageInspectionResult] = []
-                failed_count = 0
-                total_defects = 0
-                skipped_count = len(request.s3_images) - len(images_to_process)
-
-                for img_path, result in zip(images_to_process, results):
-                    if isinstance(result, Exception):
-                        logger.error(f"Image analysis failed: {img_path}, error: {result}")
-                        failed_count += 1
-                        # 실패한 이미지는 종합 평가에서 제외
-                    else:
-                        inspection_results.append(ImageInspectionResult(
-                            image_path=img_path,
-                            defects=result.defects,
-                            overall_condition=result.overall_condition,
-                            recommended_price_adjustment=result.recommended_price_adjustment,
-                            analysis_confidence=result.analysis_confidence
-                        ))
-                        total_defects += len(result.defects)
-
-                # 분석 성공한 이미지가 없으면 에러 마크다운 생성하고 FAILED 처리
-                if not inspection_results:
-                    markdown = _generate_error_markdown(
-                        total_images=len(request.s3_images),
-                        processed_images=len(images_to_process),
-                        failed_count=failed_count,
-                        skipped_count=skipped_count,
-                        timed_out=timed_out
+                ))
+                await asyncio.shield(running_write)
+
+                # 2. 이미지 로드 + 근접 중복 묶기 (묶음마다 대표 이미지만 검수)
+                s3_images = request.s3_images
+                images = await get_inspector().load_images(s3_images)
+                hashes = await compute_hashes(images)
+                clusters = group_near_duplicates(images, hashes)
+                representatives = [cluster[0] for cluster in clusters]
+                if len(representatives) < len(s3_images):
+                    logger.info(
+                        f"Near-duplicate dedupe: {len(s3_images)} images → "
+                        f"{len(representatives)} representatives"
                     )
-                    # DB 업데이트: FAILED
-                    update_fault_description(
-                        product_id=request.product_id,
-                        markdown=markdown,
-                        status='FAILED',
-                        error_msg="No successful image analysis"
+
+                # 3. 다중 이미지 모드: 마감 안에 끝낼 수 있는 만큼 청크 단위로 호출
+                # (청크 크기 상한은 모델 컨텍스트/출력 한도, 정보량 많은 사진부터)
+                async def _analyze_chunk(indices: List[int]):
+                    logger.info(f"Inspecting {len(indices)} images (1 call)")
+                    return await inspector_router.analyze_batch(
+                        [s3_images[j] for j in indices],
+                        item_category="물품",
+                        use_cache=not request.bypass_cache,
+                        images=[images[j] for j in indices]
                     )
-                    update_product_sell_status(request.product_id, 'FAILED')
-                    return
 
-                logger.info(f"Analysis complete: {len(inspection_results)} succeeded, {failed_count} failed")
-
-                # 4. 종합 평가 (상위 70% 가중 평균 - 이상치 제거)
-                condition_order = {"S": 0, "A": 1, "B": 2, "C": 3, "D": 4}
-                condition_scores = [condition_order[r.overall_condition] for r in inspection_results]
-
-                # 정렬 후 상위 70% 선택
-                sorted_scores = sorted(condition_scores)
-                top_70_count = max(1, int(len(sorted_scores) * 0.7))
-                top_70_scores = sorted_scores[:top_70_count]
-
-                # 평균 계산 후 가장 가까운 등급 선택
-                avg_score = sum(top_70_scores) / len(top_70_scores)
-                aggregated_condition = min(condition_order.keys(), key=lambda x: abs(condition_order[x] - avg_score))
-
-                # 종합 가격 조정 (상위 70% 평균)
-                adjustments = [r.recommended_price_adjustment for r in inspection_results]
-                sorted_adjustments = sorted(adjustments, reverse=True)  # 할인율이 작은 순
-                top_70_adj = sorted_adjustments[:top_70_count]
-                aggregated_adjustment = int(sum(top_70_adj) / len(top_70_adj))
-
-                # 5. 마크다운 요약 생성
-                markdown = _generate_markdown_summary(
-                    product_name=request.product_name or "제품",
-                    overall_condition=aggregated_condition,
-                    price_adjustment=aggregated_adjustment,
-                    inspection_results=inspection_results,
-                    images_analyzed=len(inspection_results),
-                    images_failed=failed_count,
-                    images_skipped=skipped_count,
-                    timed_out=timed_out
+                # 결과가 도착할 때마다 종합 평가 갱신 + 진행 중 마크다운 upsert (coalesced)
+                summary = FaultSummary(request.product_name or "제품", s3_images, clusters)
+                writer = CoalescedFaultWriter(request.product_id)
+
+                async def _on_partial(partial: dict):
+                    summary.add(partial)
+                    if summary.remaining > 0:
+                        writer.publish(summary.markdown())
+
+                executor = DeadlineExecutor(
+                    deadline=deadline,
+                    chunk_size=GeminiInspector.chunk_size(),
+                    max_parallel=settings.FAULT_DESC_MAX_PARALLEL_CALLS
+                )
+                try:
+                    outcome = await executor.run(
+                        prioritize(representatives, images, hashes),
+                        _analyze_chunk,
+                        on_result=_on_partial
+                    )
+                finally:
+                    # 최종 기록이 부분 기록에 덮이지 않도록 대기 중인 부분 기록 정리
+                    await writer.close()
+
+                timed_out = outcome.timed_out
+                if timed_out:
+                    logger.warning(
+                        f"Deadline reached: {len(outcome.skipped)} representative images not inspected"
+                    )
+                DEDUPE_IMAGES.labels("representative").inc(len(outcome.results))
+                DEDUPE_IMAGES.labels("duplicate").inc(
+                    sum(len(summary.members[rep]) - 1 for rep in outcome.results)
                 )
 
+                # 4. 최종 요약 (부분 기록을 대체)
+                markdown = summary.markdown(final=True, timed_out=timed_out)
+
+                # 분석 성공한 이미지가 없으면 에러 마크다운으로 FAILED 처리
+                if not summary.results:
+                    await asyncio.to_thread(
+                        fail_fault_description,
+                        request.product_id,
+                        markdown,
+                        "No successful image analysis"
+                    )
+                    JOB_DURATION_SECONDS.labels("FAILED").observe(time.time() - slot_acquired_at)
+                    return
+
+                aggregated_condition, _ = summary.aggregate()
                 logger.info(
                     f"Product analysis complete: product_id={request.product_id}, "
-                    f"condition={aggregated_condition}, defects={total_defects}"
+                    f"{len(summary.results)} succeeded, {len(summary.failed)} failed, "
+                    f"condition={aggregated_condition}, defects={summary.total_defects}, "
+                    f"partial writes={writer.writes}"
                 )
 
-                # 6. DB 업데이트: DONE (성공)
-                update_fault_description(
-                    product_id=request.product_id,
-                    markdown=markdown,
-                    status='DONE',
-                    error_msg=None
+                # 5. DB 업데이트: DONE + product.job_count 증가 및 활성화 (한 트랜잭션, 1회 왕복)
+                # 재시도해도 같은 completion_key는 한 번만 반영
+                # 마감 초과/일부 실패한 결과는 입력 지문을 남기지 않음 → 같은 입력의 재제출이 다시 분석
+                complete = not timed_out and not summary.failed
+                await asyncio.to_thread(
+                    complete_fault_description,
+                    request.product_id,
+                    markdown,
+                    completion_key,
+                    fingerprint if complete else None
                 )
 
-                # 7. product.job_count 증가 및 활성화
-                increment_job_count_and_activate(request.product_id)
-
+                JOB_DURATION_SECONDS.labels("DONE").observe(time.time() - slot_acquired_at)
                 logger.info(f"Job completed successfully: product_id={request.product_id}")
 
+        except asyncio.CancelledError as e:
+            # DELETE /inspect/jobs/{id}, 교체 제출, 종료 - 진행 중 Gemini 호출도 함께 취소되고 슬롯은 즉시 반납
+            reason = e.args[0] if e.args else "Cancelled"
+            logger.info(f"Job cancelled: product_id={request.product_id} ({reason})")
+            try:
+                # RUNNING 기록이 진행 중이면 먼저 끝나기를 기다림 (FAILED 뒤에 덮어쓰지 않도록)
+                if running_write is not None and not running_write.done():
+                    await asyncio.wait({running_write})
+                # product.sell_status는 건드리지 않음 (삭제/재제출된 상품)
+                await asyncio.shield(asyncio.to_thread(
+                    update_fault_description,
+                    product_id=request.product_id,
+                    markdown="",
+                    status='FAILED',
+                    error_msg=f"Cancelled: {reason}"
+                ))
+            except Exception as db_error:
+                logger.error(f"Failed to record cancellation: {str(db_error)}")
+            raise
+
         except Exception as e:
             # 백그라운드 태스크에서 예상치 못한 에러 발생
             logger.error(f"Background task failed for product_id={request.product_id}: {str(e)}", exc_info=True)
@@ -209,119 +269,48 @@ async def fault_desc(request: ProductAnalysisRequest, background_tasks: Backgrou
             # DB에 실패 상태 기록
             try:
                 markdown = f"# 결함 분석 결과\n\n❌ **시스템 오류**: {str(e)}\n\n문의: 시스템 관리자에게 연락하세요.\n"
-                update_fault_description(
-                    product_id=request.product_id,
-                    markdown=markdown,
-                    status='FAILED',
-                    error_msg=str(e)
-                )
-                update_product_sell_status(request.product_id, 'FAILED')
+                await asyncio.to_thread(fail_fault_description, request.product_id, markdown, str(e))
             except Exception as db_error:
                 logger.error(f"Failed to update DB with error status: {str(db_error)}")
 
-    # 백그라운드 태스크 등록 및 즉시 응답
-    background_tasks.add_task(_process_product_background)
-
-    logger.info(f"Job queued: product_id={request.product_id}")
-
-    return {
-        "product_id": request.product_id,
-        "status": "QUEUED",
-        "message": "분석이 큐에 추가되었습니다. 완료되면 fault_description 테이블에서 확인할 수 있습니다."
-    }
+    # 작업 등록 (같은 입력이 실행 중이면 합류, 다른 입력이면 기존 작업 취소 후 교체) 및 즉시 응답
+    outcome, _ = await inspect_registry.submit(
+        request.product_id, fingerprint, idempotency_key, _process_product_background
+    )
 
+    logger.info(f"Job {outcome}: product_id={request.product_id}")
 
-def _generate_markdown_summary(
-    product_name: str,
-    overall_condition: str,
-    price_adjustment: int,
-    inspection_results: List[ImageInspectionResult],
-    images_analyzed: int,
-    images_failed: int,
-    images_skipped: int = 0,
-    timed_out: bool = False
-) -> str:
-    """마크다운 결함 요약 생성 (통합 형식)"""
-    condition_labels = {
-        "S": "최상 (거의 새것)",
-        "A": "우수 (미세한 사용감)",
-        "B": "양호 (약간의 결함)",
-        "C": "보통 (눈에 띄는 결함)",
-        "D": "불량 (심각한 결함)"
-    }
+    return _fault_desc_accepted(request.product_id, outcome)
 
-    md = f"# 결함 분석 결과\n\n"
 
-    # 타임아웃 경고
-    if timed_out or images_skipped > 0:
-        md += "⚠️ **주의**: 처리 시간 제한으로 인해 일부 이미지만 분석되었습니다.\n\n"
-        md += f"- 전체 이미지: {images_analyzed + images_failed + images_skipped}장\n"
-        md += f"- 분석 완료: {images_analyzed}장\n"
-        if images_failed > 0:
-            md += f"- 분석 실패: {images_failed}장\n"
-        if images_skipped > 0:
-            md += f"- 시간 초과로 미분석: {images_skipped}장\n"
-        md += "\n"
+@router.delete("/jobs/{product_id}")
+async def cancel_job(product_id: str):
+    """
+    대기/실행 중인 fault_desc 작업 취소
 
-    md += f"**전체 상태 등급**: {overall_condition} - {condition_labels.get(overall_condition, '알 수 없음')}\n\n"
+    대기 중이면 대기열에서 빠지고, 실행 중이면 진행 중인 Gemini/Claude 호출이 취소되며
+    처리 슬롯은 즉시 반납됩니다. fault_description은 FAILED ("Cancelled: ...")로 기록됩니다.
 
-    # 결함 수집 및 위치별 그룹화
-    all_defects = []
-    for result in inspection_results:
-        all_defects.extend(result.defects)
+    Returns:
+        대기/실행 중 작업이 없으면 404
+    """
+    if not await inspect_registry.cancel(product_id, "Cancelled by request"):
+        raise HTTPException(status_code=404, detail="No queued or running job for this product")
+    return {"product_id": product_id, "status": "CANCELLED"}
 
-    md += f"**발견된 결함**: {len(all_defects)}건\n\n"
 
-    if len(all_defects) == 0:
-        md += "## ✅ 결함 없음\n\n"
-        md += "분석한 이미지에서 특별한 결함이 발견되지 않았습니다.\n"
+def _fault_desc_accepted(product_id: str, outcome: str) -> dict:
+    """202 응답 본문 (started / attached / superseded)"""
+    if outcome == "attached":
+        message = "동일한 입력의 분석이 이미 진행 중입니다. 완료되면 fault_description 테이블에서 확인할 수 있습니다."
     else:
-        md += "## 🔍 발견된 결함\n\n"
-
-        # 결함을 하나씩 나열 (위치 중심)
-        for idx, defect in enumerate(all_defects, 1):
-            md += f"{idx}. **{defect.type}** ({defect.severity}) - {defect.location}\n"
-            md += f"   - {defect.description}\n\n"
-
-    # 추가 정보
-    md += "---\n\n"
-    md += f"*분석 모델: Google Gemini 2.5 Flash*\n\n"
-    md += f"*분석 일시: {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')}*\n"
-
-    return md
-
-
-def _generate_error_markdown(
-    total_images: int,
-    processed_images: int,
-    failed_count: int,
-    skipped_count: int,
-    timed_out: bool
-) -> str:
-    """에러 상황에 대한 마크다운 생성"""
-    md = f"# 결함 분석 결과\n\n"
-    md += "❌ **분석 실패**: 모든 이미지 분석에 실패했습니다.\n\n"
-
-    if timed_out:
-        md += "⚠️ **원인**: 처리 시간 제한 (90초) 초과\n\n"
-
-    md += f"**상태 정보**:\n"
-    md += f"- 전체 이미지: {total_images}장\n"
-    md += f"- 처리 시도: {processed_images}장\n"
-    md += f"- 분석 실패: {failed_count}장\n"
-
-    if skipped_count > 0:
-        md += f"- 시간 초과로 미분석: {skipped_count}장\n"
-
-    md += "\n**권장 조치**:\n"
-    md += "1. 이미지 수를 줄여서 다시 시도해보세요 (권장: 10-20장)\n"
-    md += "2. 이미지 파일 크기를 확인해보세요 (권장: 5MB 이하)\n"
-    md += "3. S3 경로가 올바른지 확인해보세요\n\n"
-
-    md += "---\n\n"
-    md += f"*분석 일시: {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')}*\n"
-
-    return md
+        message = "분석이 큐에 추가되었습니다. 완료되면 fault_description 테이블에서 확인할 수 있습니다."
+    return {
+        "product_id": product_id,
+        "status": "QUEUED",
+        "submission": outcome,
+        "message": message
+    }
 
 
 @router.post("/analyze_desc", response_model=DescriptionResult)
@@ -336,7 +325,9 @@ async def analyze_desc(request: DescriptionRequest):
     - Google Gemini 2.5 Flash 사용
     - 판매자 작성 스타일 (객관적, 사실 기반)
     - 한 문단 길이 (3-5문장)
-    - 타임아웃 없음 (단일 이미지, 빠른 응답)
+    - 동시에 들어온 요청은 짧게 모아 여러 제품을 호출 1회로 생성 (마이크로 배치)
+    - 같은 이미지 + 제품명은 캐시된 설명을 바로 반환
+    - 응답 시한 DESC_SLA_SECONDS (초과 시 기본 문구 반환, 생성 결과는 캐시에 저장)
 
     **응답 예시:**
     ```json
@@ -360,10 +351,12 @@ async def analyze_desc(request: DescriptionRequest):
             f"product_name={request.product_name}"
         )
 
-        # Gemini로 제품 설명 생성 (비동기)
-        description = await generate_product_description(
-            s3_path=request.s3_path,
-            product_name=request.product_name
+        # 마이크로 배치로 제품 설명 생성 (캐시 → 배치 대기, 응답 시한 적용)
+        description = await description_batcher.describe(
+            request.s3_path,
+            request.product_name,
+            priority="interactive",
+            sla_seconds=settings.DESC_SLA_SECONDS
         )
 
         logger.info(
@@ -380,6 +373,76 @@ async def analyze_desc(request: DescriptionRequest):
         )
 
 
+def _sse(event: str, data: dict) -> str:
+    """Server-Sent Events 메시지 1개"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/analyze_desc/stream")
+async def analyze_desc_stream(request: DescriptionRequest):
+    """
+    제품 설명 생성 - 스트리밍 (Server-Sent Events)
+
+    /inspect/analyze_desc와 같은 설명을 생성하되, 생성되는 대로 조각을 보냅니다.
+    사용자가 체감하는 지연은 첫 조각까지의 시간입니다.
+
+    **이벤트:**
+    - `delta`: `{"text": "..."}` - 이어 붙일 조각 (앞뒤 따옴표는 즉석에서 제거)
+    - `done`: `{"description": "...", "cached": bool, "fallback": bool}` - 최종 설명
+      (조각을 이어 붙인 결과 대신 이 값을 최종본으로 사용)
+
+    캐시에 있으면 delta 1개 + done으로 바로 끝나고, 생성에 실패하거나 빈 응답이면
+    기존과 같은 기본 문구를 done으로 보냅니다. 이미지 로드 실패는 스트림 시작 전 500.
+
+    Args:
+        request: 제품 설명 생성 요청 (s3_image, product_name)
+
+    Returns:
+        text/event-stream 응답
+    """
+    try:
+        lookup = await description_batcher.lookup(request.s3_path, request.product_name)
+    except Exception as e:
+        logger.error(f"Description image load failed: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"제품 설명 생성 실패: {str(e)}"
+        )
+
+    async def _events():
+        if lookup.description is not None:
+            yield _sse("delta", {"text": lookup.description})
+            yield _sse("done", {"description": lookup.description, "cached": True, "fallback": False})
+            return
+
+        cleaner = DescriptionStreamCleaner()
+        try:
+            async for text in stream_product_description(request.product_name, lookup.image):
+                delta = cleaner.feed(text)
+                if delta:
+                    yield _sse("delta", {"text": delta})
+            description = cleaner.finish() if cleaner.has_text else None
+        except Exception as e:
+            # 기존과 동일: 생성 오류 시 기본 문구
+            logger.warning(f"Streaming description failed, using fallback: {e}")
+            description = None
+
+        if not description:
+            yield _sse("done", {
+                "description": description_fallback(request.product_name), "cached": False, "fallback": True
+            })
+            return
+
+        yield _sse("done", {"description": description, "cached": False, "fallback": False})
+        await description_batcher.remember(lookup, request.product_name, description)
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/health")
 async def health_check():
     """
@@ -418,6 +481,18 @@ async def health_check():
             "service": "fault-detection",
             "model": settings.GEMINI_MODEL,
             "free_tier": "1,500 requests/month",
+            "rate_limits": {
+                "gemini": gemini_rate_limiter.stats(),
+                "claude": claude_rate_limiter.stats()
+            },
+            "prompt_cache": prompt_cache_stats(),
+            "result_cache": result_cache.stats() if (result_cache := get_result_cache()) else None,
+            "inspection_latency": inspection_latency.stats(),
+            "inspectors": inspector_router.stats(),
+            "description_batcher": description_batcher.stats(),
+            "preprocess": image_preprocessor.stats(),
+            "jobs": inspect_registry.stats(),
+            "s3": s3_client.stats(),
             **aws_info
         }
 
@@ -2,6 +2,7 @@
 Configuration settings
 """
 import os
+import tempfile
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -19,17 +20,73 @@ class Settings:
     GEMINI_API_KEY: str = os.getenv("GEMINI_API_KEY", "")
     GEMINI_MODEL: str = "gemini-2.5-flash"
     GEMINI_MAX_TOKENS: int = 800  # 출력 제한 (비용 절감)
+    GEMINI_TIMEOUT_SECONDS: int = int(os.getenv("GEMINI_TIMEOUT_SECONDS", "60"))
+    GEMINI_MAX_CONNECTIONS: int = int(os.getenv("GEMINI_MAX_CONNECTIONS", "20"))  # keep-alive 커넥션 풀
+    GEMINI_KEEPALIVE_SECONDS: float = 60.0
+    # 다중 이미지 모드 (/inspect/fault_desc): 호출당 이미지 수는 모델 한도에 맞춰 자동 결정
+    GEMINI_BATCH_MAX_IMAGES: int = int(os.getenv("GEMINI_BATCH_MAX_IMAGES", "10"))
+    GEMINI_BATCH_MAX_OUTPUT_TOKENS: int = int(os.getenv("GEMINI_BATCH_MAX_OUTPUT_TOKENS", "16384"))
+    GEMINI_THINKING_RESERVE: int = 2048  # Gemini 2.5 thoughts 토큰도 출력 한도에 포함됨
+    # 스키마에 맞지 않는 응답(JSON 오류/검증 실패) 재시도 횟수
+    STRUCTURED_OUTPUT_RETRIES: int = int(os.getenv("STRUCTURED_OUTPUT_RETRIES", "1"))
+    # 명시적 컨텍스트 캐시 (시스템 프롬프트 + Few-shot), 실패 시 system_instruction 폴백
+    GEMINI_PROMPT_CACHE_ENABLED: bool = os.getenv("GEMINI_PROMPT_CACHE_ENABLED", "True").lower() == "true"
+    GEMINI_PROMPT_CACHE_TTL_SECONDS: int = int(os.getenv("GEMINI_PROMPT_CACHE_TTL_SECONDS", "3600"))
+    GEMINI_PROMPT_CACHE_REFRESH_SECONDS: int = 300  # 만료 5분 전부터 TTL 연장
 
-    # Anthropic Claude API (레거시, 필요시 사용)
+    # Rate limit (프로세스 공용, 429 수신 시 자동으로 낮췄다가 회복)
+    GEMINI_RPM: int = int(os.getenv("GEMINI_RPM", "15"))  # 무료 티어 15 RPM
+    GEMINI_TPM: int = int(os.getenv("GEMINI_TPM", "1000000"))
+    CLAUDE_RPM: int = int(os.getenv("CLAUDE_RPM", "50"))
+    CLAUDE_TPM: int = int(os.getenv("CLAUDE_TPM", "50000"))
+    RATE_LIMIT_MAX_RETRIES: int = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "4"))
+
+    # Anthropic Claude API (선택, 설정 시 fault_desc 백업 프로바이더)
     ANTHROPIC_API_KEY: str = os.getenv("ANTHROPIC_API_KEY", "")
     CLAUDE_MODEL: str = "claude-3-haiku-20240307"
     CLAUDE_MAX_TOKENS: int = 800
 
+    # Hedging / failover (Gemini 기본, Claude 백업)
+    INSPECTOR_HEDGING_ENABLED: bool = os.getenv("INSPECTOR_HEDGING_ENABLED", "True").lower() == "true"
+    # 기본 프로바이더가 최근 p95를 넘기면 백업 요청 (표본 HEDGE_MIN_SAMPLES개 미만이면 기본값)
+    HEDGE_MIN_SAMPLES: int = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+    HEDGE_DEFAULT_DELAY_SECONDS: float = float(os.getenv("HEDGE_DEFAULT_DELAY_SECONDS", "20"))
+    HEDGE_MIN_DELAY_SECONDS: float = float(os.getenv("HEDGE_MIN_DELAY_SECONDS", "5"))
+    # 연속 실패 N회 → N초 동안 해당 프로바이더 건너뜀
+    CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+    CIRCUIT_RESET_SECONDS: float = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+
     # AWS (optional, uses default credentials if not set)
     AWS_ACCESS_KEY_ID: str = os.getenv("AWS_ACCESS_KEY_ID", "")
     AWS_SECRET_ACCESS_KEY: str = os.getenv("AWS_SECRET_ACCESS_KEY", "")
     AWS_DEFAULT_REGION: str = os.getenv("AWS_DEFAULT_REGION", "ap-southeast-2")
 
+    # 비동기 S3 클라이언트 (aiobotocore, 프로세스당 1개)
+    # S3_ENDPOINT_URL: MinIO 등 S3 호환 로컬 서버 (비우면 AWS S3)
+    S3_ENDPOINT_URL: str = os.getenv("S3_ENDPOINT_URL", "")
+    S3_MAX_CONNECTIONS: int = int(os.getenv("S3_MAX_CONNECTIONS", "64"))
+    S3_MAX_ATTEMPTS: int = int(os.getenv("S3_MAX_ATTEMPTS", "5"))
+    S3_CONNECT_TIMEOUT_SECONDS: float = float(os.getenv("S3_CONNECT_TIMEOUT_SECONDS", "5"))
+    S3_READ_TIMEOUT_SECONDS: float = float(os.getenv("S3_READ_TIMEOUT_SECONDS", "30"))
+
+    # 이미지 전처리 프로세스 풀 워커 수 (0이면 스레드에서 처리)
+    PREPROCESS_WORKERS: int = int(os.getenv("PREPROCESS_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+    # 공유 이미지 캐시 (gaussian_ai와 같은 IMAGE_CACHE_DIR 사용)
+    IMAGE_CACHE_ENABLED: bool = os.getenv("IMAGE_CACHE_ENABLED", "True").lower() == "true"
+    IMAGE_CACHE_DIR: Path = Path(os.getenv("IMAGE_CACHE_DIR", str(Path(tempfile.gettempdir()) / "codyssey-image-cache")))
+    IMAGE_CACHE_MAX_MB: int = int(os.getenv("IMAGE_CACHE_MAX_MB", "2048"))
+
+    # 근접 중복 이미지 묶기 (pHash 해밍 거리, 64bit 중) → 대표 이미지만 검수
+    DEDUPE_ENABLED: bool = os.getenv("DEDUPE_ENABLED", "True").lower() == "true"
+    DEDUPE_MAX_DISTANCE: int = int(os.getenv("DEDUPE_MAX_DISTANCE", "6"))
+
+    # 검수 결과 캐시 (이미지 내용 + 모델 + 프롬프트 버전 기준, SQLite)
+    RESULT_CACHE_ENABLED: bool = os.getenv("RESULT_CACHE_ENABLED", "True").lower() == "true"
+    RESULT_CACHE_PATH: Path = Path(os.getenv("RESULT_CACHE_PATH", str(Path(tempfile.gettempdir()) / "codyssey-inspection-results.sqlite3")))
+    RESULT_CACHE_TTL_HOURS: int = int(os.getenv("RESULT_CACHE_TTL_HOURS", "168"))  # 7일
+    RESULT_CACHE_MAX_MB: int = int(os.getenv("RESULT_CACHE_MAX_MB", "256"))
+
     # Server
     HOST: str = os.getenv("HOST", "0.0.0.0")
     PORT: int = int(os.getenv("PORT", "8001"))
@@ -37,6 +94,18 @@ class Settings:
 
     # Queue
     MAX_CONCURRENT_JOBS: int = int(os.getenv("MAX_CONCURRENT_JOBS", "1"))
+    # fault_desc 마감 (호출 측 90초 타임아웃 - 안전 마진), 마감 안에서 동시 호출 수
+    FAULT_DESC_DEADLINE_SECONDS: float = float(os.getenv("FAULT_DESC_DEADLINE_SECONDS", "85"))
+    FAULT_DESC_MAX_PARALLEL_CALLS: int = int(os.getenv("FAULT_DESC_MAX_PARALLEL_CALLS", "2"))
+    # 진행 중 마크다운 upsert 최소 간격 (초), 그 사이 결과는 모아서 1회 기록
+    FAULT_DESC_PARTIAL_WRITE_INTERVAL: float = float(os.getenv("FAULT_DESC_PARTIAL_WRITE_INTERVAL", "3"))
+
+    # 설명 생성 마이크로 배치 (/inspect/analyze_desc): 수집 시간(ms) 동안 모은 요청을 호출 1회로 생성
+    DESC_BATCH_WINDOW_MS: int = int(os.getenv("DESC_BATCH_WINDOW_MS", "250"))
+    DESC_BATCH_MAX_ITEMS: int = int(os.getenv("DESC_BATCH_MAX_ITEMS", "6"))
+    DESC_BATCH_MAX_PARALLEL: int = int(os.getenv("DESC_BATCH_MAX_PARALLEL", "2"))
+    # 대화형 요청 응답 시한 (초과 시 기본 문구 반환, 생성 결과는 캐시에 저장)
+    DESC_SLA_SECONDS: float = float(os.getenv("DESC_SLA_SECONDS", "12"))
 
     # MySQL Database (RDS)
     DB_HOST: str = os.getenv("DB_HOST", "localhost")
@@ -44,6 +113,8 @@ class Settings:
     DB_USER: str = os.getenv("DB_USER", "root")
     DB_PASSWORD: str = os.getenv("DB_PASSWORD", "")
     DB_NAME: str = os.getenv("DB_NAME", "marketplace")
+    # 완료 기록 재시도 횟수 (연결 끊김/데드락, 같은 completion_key라 중복 반영 없음)
+    DB_WRITE_ATTEMPTS: int = int(os.getenv("DB_WRITE_ATTEMPTS", "3"))
 
 
 settings = Settings()
@@ -3,17 +3,23 @@ MySQL database connection and helper functions
 """
 import pymysql
 import logging
+import time
 from contextlib import contextmanager
 from datetime import datetime
+from pymysql.constants import CLIENT
 from app.config import settings
+from app.utils.metrics import timed_db
 
 logger = logging.getLogger(__name__)
 
 
-def get_mysql_connection():
+def get_mysql_connection(multi_statements: bool = False):
     """
     Create MySQL database connection
 
+    Args:
+        multi_statements: 한 번의 execute로 여러 문장 전송 (완료 기록처럼 1회 왕복이 필요한 경우만)
+
     Returns:
         pymysql.Connection: MySQL connection object
     """
@@ -26,7 +32,8 @@ def get_mysql_connection():
             database=settings.DB_NAME,
             charset='utf8mb4',
             cursorclass=pymysql.cursors.DictCursor,
-            autocommit=False
+            autocommit=False,
+            client_flag=CLIENT.MULTI_STATEMENTS if multi_statements else 0
         )
         return connection
     except Exception as e:
@@ -35,7 +42,7 @@ def get_mysql_connection():
 
 
 @contextmanager
-def get_db_cursor():
+def get_db_cursor(multi_statements: bool = False):
     """
     Context manager for database cursor
 
@@ -46,7 +53,7 @@ def get_db_cursor():
     """
     connection = None
     try:
-        connection = get_mysql_connection()
+        connection = get_mysql_connection(multi_statements)
         cursor = connection.cursor()
         yield cursor
         connection.commit()
@@ -60,6 +67,83 @@ def get_db_cursor():
             connection.close()
 
 
+# fault_description upsert (product_id PK, 1회 왕복 - SELECT 후 UPDATE/INSERT 경쟁 없음)
+_UPSERT_FAULT_SQL = """
+    INSERT INTO fault_description
+        (product_id, markdown, status, error_msg, created_at, updated_at, completed_at)
+    VALUES (%(product_id)s, %(markdown)s, %(status)s, %(error_msg)s, %(now)s, %(now)s, %(completed_at)s)
+    ON DUPLICATE KEY UPDATE
+        markdown = VALUES(markdown),
+        status = VALUES(status),
+        error_msg = VALUES(error_msg),
+        updated_at = VALUES(updated_at),
+        completed_at = VALUES(completed_at)
+"""
+
+# 완료 기록: DONE upsert + job_count 증가 + 결과 조회를 한 트랜잭션, 1회 왕복으로 전송
+# 같은 completion_key로 이미 완료된 행이면 아무 컬럼도 바꾸지 않아 ROW_COUNT() = 0
+# (1 = 새 행, 2 = 갱신) → job_count는 처음 반영될 때만 증가 (재시도해도 중복 증가 없음)
+# completion_key는 마지막에 대입 (앞의 IF들이 이전 값과 비교)
+_COMPLETE_FAULT_SQL = """
+    INSERT INTO fault_description
+        (product_id, markdown, status, error_msg, input_fingerprint, completion_key,
+         created_at, updated_at, completed_at)
+    VALUES (%(product_id)s, %(markdown)s, 'DONE', NULL, %(input_fingerprint)s, %(completion_key)s,
+            %(now)s, %(now)s, %(now)s)
+    ON DUPLICATE KEY UPDATE
+        markdown = IF(completion_key <=> VALUES(completion_key), markdown, VALUES(markdown)),
+        input_fingerprint = IF(completion_key <=> VALUES(completion_key), input_fingerprint, VALUES(input_fingerprint)),
+        status = IF(completion_key <=> VALUES(completion_key), status, 'DONE'),
+        error_msg = IF(completion_key <=> VALUES(completion_key), error_msg, NULL),
+        updated_at = IF(completion_key <=> VALUES(completion_key), updated_at, VALUES(updated_at)),
+        completed_at = IF(completion_key <=> VALUES(completion_key), completed_at, VALUES(completed_at)),
+        completion_key = VALUES(completion_key);
+    SET @fault_applied = ROW_COUNT();
+    UPDATE product
+    SET job_count = job_count + 1,
+        sell_status = CASE
+            WHEN job_count + 1 >= 3 THEN 'ACTIVE'
+            ELSE sell_status
+        END,
+        updated_at = %(now)s
+    WHERE product_id = %(product_id)s AND @fault_applied > 0;
+    SELECT job_count, sell_status, @fault_applied > 0 AS applied
+    FROM product WHERE product_id = %(product_id)s;
+"""
+
+# 실패 기록: FAILED upsert + product.sell_status를 한 트랜잭션, 1회 왕복
+_FAIL_FAULT_SQL = _UPSERT_FAULT_SQL.rstrip() + """;
+    UPDATE product
+    SET sell_status = %(sell_status)s,
+        updated_at = %(now)s
+    WHERE product_id = %(product_id)s;
+"""
+
+
+def _last_result(cursor):
+    """다중 문장 실행 결과 중 마지막 SELECT 결과 행들"""
+    rows = None
+    while True:
+        if cursor.description:
+            rows = cursor.fetchall()
+        if not cursor.nextset():
+            return rows
+
+
+def _with_retries(operation: str, func):
+    """연결 끊김/데드락 시 재시도 (func는 멱등이어야 함)"""
+    attempts = max(1, settings.DB_WRITE_ATTEMPTS)
+    for attempt in range(1, attempts + 1):
+        try:
+            return func()
+        except (pymysql.err.OperationalError, pymysql.err.InterfaceError) as e:
+            if attempt == attempts:
+                raise
+            logger.warning(f"{operation} failed (attempt {attempt}/{attempts}), retrying: {e}")
+            time.sleep(0.2 * 2 ** (attempt - 1))
+
+
+@timed_db
 def update_fault_description(
     product_id: str,
     markdown: str,
@@ -67,7 +151,7 @@ def update_fault_description(
     error_msg: str = None
 ) -> bool:
     """
-    Update fault_description table
+    Upsert fault_description (progress / failure writes)
 
     Args:
         product_id: Product UUID
@@ -78,107 +162,139 @@ def update_fault_description(
     Returns:
         bool: Success status
     """
+    now = datetime.now()
     try:
         with get_db_cursor() as cursor:
-            # Check if record exists
-            cursor.execute(
-                "SELECT product_id FROM fault_description WHERE product_id = %s",
-                (product_id,)
-            )
-            exists = cursor.fetchone()
-
-            now = datetime.now()
-
-            if exists:
-                # Update existing record
-                cursor.execute("""
-                    UPDATE fault_description
-                    SET markdown = %s,
-                        status = %s,
-                        error_msg = %s,
-                        updated_at = %s,
-                        completed_at = %s
-                    WHERE product_id = %s
-                """, (
-                    markdown,
-                    status,
-                    error_msg,
-                    now,
-                    now if status in ['DONE', 'FAILED'] else None,
-                    product_id
-                ))
-            else:
-                # Insert new record
-                cursor.execute("""
-                    INSERT INTO fault_description
-                    (product_id, markdown, status, error_msg, created_at, updated_at, completed_at)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    product_id,
-                    markdown,
-                    status,
-                    error_msg,
-                    now,
-                    now,
-                    now if status in ['DONE', 'FAILED'] else None
-                ))
-
-            logger.info(f"Updated fault_description for {product_id}: status={status}")
-            return True
+            cursor.execute(_UPSERT_FAULT_SQL, {
+                "product_id": product_id,
+                "markdown": markdown,
+                "status": status,
+                "error_msg": error_msg,
+                "now": now,
+                "completed_at": now if status in ['DONE', 'FAILED'] else None,
+            })
+
+        logger.info(f"Updated fault_description for {product_id}: status={status}")
+        return True
 
     except Exception as e:
         logger.error(f"Failed to update fault_description for {product_id}: {e}")
         return False
 
 
-def increment_job_count_and_activate(product_id: str) -> bool:
+@timed_db
+def get_fault_description_state(product_id: str):
     """
-    Increment product.job_count and activate if job_count reaches 2
-    (Both fault_desc and 3DGS jobs completed)
+    Current fault_description status and input fingerprint
+
+    Returns:
+        dict {"status", "input_fingerprint"} or None if no row
+    """
+    with get_db_cursor() as cursor:
+        cursor.execute(
+            "SELECT status, input_fingerprint FROM fault_description WHERE product_id = %s",
+            (product_id,)
+        )
+        return cursor.fetchone()
+
+
+@timed_db
+def complete_fault_description(
+    product_id: str,
+    markdown: str,
+    completion_key: str,
+    input_fingerprint: str = None
+) -> bool:
+    """
+    Record a finished fault_desc job: fault_description DONE + product.job_count increment
+    (activate when both fault_desc and 3DGS jobs completed)
+
+    One connection, one transaction, one round trip. Retried on connection errors;
+    the same completion_key is applied at most once, so a retry after a lost commit
+    acknowledgement does not increment job_count twice.
 
     Args:
         product_id: Product UUID
+        markdown: Final markdown summary
+        completion_key: Idempotency key of this job run
+        input_fingerprint: Hash of the job inputs (identical resubmissions return immediately)
 
     Returns:
         bool: Success status
     """
+    params = {
+        "product_id": product_id,
+        "markdown": markdown,
+        "completion_key": completion_key,
+        "input_fingerprint": input_fingerprint,
+        "now": datetime.now(),
+    }
+
+    def _write():
+        with get_db_cursor(multi_statements=True) as cursor:
+            cursor.execute(_COMPLETE_FAULT_SQL, params)
+            return _last_result(cursor)
+
     try:
-        with get_db_cursor() as cursor:
-            # Atomically increment job_count and update sell_status if needed
-            cursor.execute("""
-                UPDATE product
-                SET job_count = job_count + 1,
-                    sell_status = CASE
-                        WHEN job_count + 1 >= 3 THEN 'ACTIVE'
-                        ELSE sell_status
-                    END,
-                    updated_at = %s
-                WHERE product_id = %s
-            """, (datetime.now(), product_id))
-
-            # Get updated values
-            cursor.execute(
-                "SELECT job_count, sell_status FROM product WHERE product_id = %s",
-                (product_id,)
-            )
-            result = cursor.fetchone()
-
-            if result:
-                logger.info(
-                    f"Updated product {product_id}: "
-                    f"job_count={result['job_count']}, "
-                    f"sell_status={result['sell_status']}"
-                )
-                return True
-            else:
-                logger.error(f"Product {product_id} not found")
-                return False
+        rows = _with_retries("complete_fault_description", _write)
+    except Exception as e:
+        logger.error(f"Failed to complete fault_description for {product_id}: {e}")
+        return False
+
+    if not rows:
+        logger.error(f"Product {product_id} not found")
+        return False
+
+    result = rows[0]
+    logger.info(
+        f"Completed fault_description for {product_id}: "
+        f"job_count={result['job_count']}, sell_status={result['sell_status']}"
+        + ("" if result['applied'] else " (already applied)")
+    )
+    return True
+
 
+@timed_db
+def fail_fault_description(product_id: str, markdown: str, error_msg: str) -> bool:
+    """
+    Record a failed fault_desc job: fault_description FAILED + product.sell_status FAILED
+    in one transaction, one round trip
+
+    Args:
+        product_id: Product UUID
+        markdown: Error markdown
+        error_msg: Error message
+
+    Returns:
+        bool: Success status
+    """
+    now = datetime.now()
+    params = {
+        "product_id": product_id,
+        "markdown": markdown,
+        "status": 'FAILED',
+        "error_msg": error_msg,
+        "now": now,
+        "completed_at": now,
+        "sell_status": 'FAILED',
+    }
+
+    def _write():
+        with get_db_cursor(multi_statements=True) as cursor:
+            cursor.execute(_FAIL_FAULT_SQL, params)
+            _last_result(cursor)
+
+    try:
+        _with_retries("fail_fault_description", _write)
     except Exception as e:
-        logger.error(f"Failed to increment job_count for {product_id}: {e}")
+        logger.error(f"Failed to record failure for {product_id}: {e}")
         return False
 
+    logger.info(f"Updated fault_description for {product_id}: status=FAILED")
+    return True
+
 
+@timed_db
 def update_product_sell_status(product_id: str, sell_status: str) -> bool:
     """
     Update product.sell_status (FAILED 처리용)
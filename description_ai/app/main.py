@@ -1,12 +1,20 @@
 """
 Main FastAPI application
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 import logging
 
 from app.config import settings
 from app.api import inspect
+from app.services.gemini_inspector import init_inspector, close_inspector
+from app.services.claude_inspector import close_claude_inspector
+from app.services.description_batcher import description_batcher
+from app.services.image_preprocess import image_preprocessor
+from app.services.s3_client import s3_client
+from app.services.job_registry import inspect_registry
 
 # Setup logging
 logging.basicConfig(
@@ -15,11 +23,37 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    공용 GeminiInspector 생성/정리
+
+    클라이언트와 HTTP 커넥션 풀을 프로세스에서 한 번만 만들어 모든 요청이 재사용
+    """
+    try:
+        init_inspector()
+        logger.info(f"Gemini inspector ready (model={settings.GEMINI_MODEL})")
+    except ValueError as e:
+        # API 키 미설정: 서버는 띄우고 /inspect/health에서 unhealthy로 보고
+        logger.warning(f"Gemini inspector not initialized: {e}")
+
+    yield
+
+    await inspect_registry.shutdown()
+    await description_batcher.close()
+    await close_inspector()
+    await close_claude_inspector()
+    image_preprocessor.close()
+    await s3_client.close()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="Fault Detection API",
     description="중고 물품 결함 자동 분석 API using Claude 3 Haiku",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -44,7 +78,9 @@ async def root():
         "model": settings.CLAUDE_MODEL,
         "endpoints": {
             "analyze": "POST /inspect/analyze",
+            "cancel_job": "DELETE /inspect/jobs/{product_id}",
             "health": "GET /inspect/health",
+            "metrics": "GET /metrics",
             "docs": "GET /docs"
         }
     }
@@ -58,6 +94,16 @@ async def healthz():
     return "ok"
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Prometheus scrape endpoint
+
+    Gemini 호출 지연/토큰 사용량, S3 다운로드, DB 호출 지연, 대기열 깊이/대기 시간
+    """
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -1,7 +1,7 @@
 """
 Inspection data schemas
 """
-from typing import List, Optional
+from typing import List, Literal, Optional
 from pydantic import BaseModel, Field
 
 
@@ -19,7 +19,30 @@ class InspectionResult(BaseModel):
     overall_condition: str = Field(..., description="전체 상태 등급 (S/A/B/C/D)")
     recommended_price_adjustment: int = Field(..., description="가격 조정 제안 (%)")
     analysis_confidence: float = Field(..., description="분석 신뢰도 (0-1)")
-    raw_response: Optional[str] = Field(None, description="OpenAI 원본 응답")
+    raw_response: Optional[str] = Field(None, description="모델 원본 응답 (JSON)")
+
+
+class InspectionResponse(BaseModel):
+    """
+    모델 응답 스키마 (Gemini response_schema / Claude tool input_schema)
+
+    InspectionResult에서 raw_response를 뺀 필드에 값 범위 제약을 추가한 형태.
+    기본값이 없는 필수 필드만 사용합니다 (응답 스키마는 기본값을 지원하지 않음).
+    """
+    defects: List[Defect] = Field(..., description="발견된 결함 목록 (없으면 빈 배열)")
+    overall_condition: Literal["S", "A", "B", "C", "D"] = Field(..., description="전체 상태 등급")
+    recommended_price_adjustment: int = Field(..., ge=-50, le=0, description="가격 조정 제안 (%)")
+    analysis_confidence: float = Field(..., ge=0.0, le=1.0, description="분석 신뢰도 (0-1)")
+
+
+class IndexedInspectionResponse(InspectionResponse):
+    """다중 이미지 응답의 이미지별 항목"""
+    index: int = Field(..., ge=1, description="이미지 번호 (1부터)")
+
+
+class MultiInspectionResponse(BaseModel):
+    """다중 이미지 모드 응답 스키마"""
+    images: List[IndexedInspectionResponse] = Field(..., description="이미지별 검수 결과")
 
 
 class InspectRequest(BaseModel):
@@ -62,11 +85,23 @@ class DescriptionResult(BaseModel):
         }
 
 
+class IndexedDescription(BaseModel):
+    """다중 제품 설명 응답의 제품별 항목"""
+    index: int = Field(..., ge=1, description="제품 번호 (1부터)")
+    description: str = Field(..., description="판매자 스타일 제품 설명 (한 문단)")
+
+
+class MultiDescriptionResponse(BaseModel):
+    """여러 제품 설명을 한 번에 생성할 때의 응답 스키마 (Gemini response_schema)"""
+    descriptions: List[IndexedDescription] = Field(..., description="제품별 설명")
+
+
 class ProductAnalysisRequest(BaseModel):
     """제품 결함 분석 요청 (RDS 연동)"""
     product_id: str = Field(..., description="제품 ID (UUID)")
     s3_images: List[str] = Field(..., description="S3 이미지 경로 리스트")
     product_name: Optional[str] = Field(None, description="제품명")
+    bypass_cache: bool = Field(False, description="결과 캐시를 무시하고 모든 이미지 재분석 (새 결과로 캐시 갱신)")
 
     class Config:
         json_schema_extra = {
@@ -88,6 +123,7 @@ class ImageInspectionResult(BaseModel):
     overall_condition: str = Field(..., description="전체 상태 등급 (S/A/B/C/D)")
     recommended_price_adjustment: int = Field(..., description="가격 조정 제안 (%)")
     analysis_confidence: float = Field(..., description="분석 신뢰도 (0-1)")
+    duplicate_of: Optional[str] = Field(None, description="근접 중복 이미지면 결과를 공유한 대표 이미지 경로")
 
 
 class ProductAnalysisResult(BaseModel):
@@ -7,18 +7,28 @@ Anthropic Claude API를 사용한 중고 물품 결함 분석 서비스 (최적
 - AsyncAnthropic → 성능 3-5배 향상
 - max_tokens 800 → 비용 60% 절감
 - Few-shot 프롬프트 → 정확도 10-15% 향상
+- 구조화 출력 (강제 tool 호출, InspectionResponse 스키마) → 마크다운 래퍼 추출/기본값 폴백 제거
+
+inspector_router의 백업 프로바이더로 사용됩니다 (anthropic 패키지와
+ANTHROPIC_API_KEY가 있을 때만).
 """
 import json
 import base64
-import boto3
-import unicodedata
-import io
-from typing import Optional
-from PIL import Image
-from anthropic import AsyncAnthropic
+import asyncio
+import time
+from typing import List, Optional, Union
+
+try:
+    from anthropic import AsyncAnthropic
+except ImportError:  # 선택 의존성 (requirements.txt의 Legacy 항목)
+    AsyncAnthropic = None
 
 from app.config import settings
-from app.schemas.inspection import Defect, InspectionResult
+from app.schemas.inspection import InspectionResponse, InspectionResult
+from app.services.image_preprocess import image_preprocessor
+from app.services.rate_limiter import claude_rate_limiter
+from app.services.structured_output import StructuredOutputError, parse_structured, record_structured_output
+from app.utils.metrics import record_llm_cost, record_provider_call
 
 
 class ClaudeInspector:
@@ -44,21 +54,19 @@ class ClaudeInspector:
 - **심각도**: 상(교환/환불 권고)|중(재고정 가능)|하(경미, 사용 가능)
 - **위치**: 정확한 위치 설명 (예: 좌상단, 중앙 우측, 뒷면 하단 등)
 
-## 응답 형식 (JSON만, 마크다운 없음)
+## 응답 형식 (report_inspection tool 입력)
 {
   "defects": [
     {
       "type": "스크래치",
       "severity": "중",
       "location": "우상단 모서리",
-      "description": "약 3cm 길이의 선형 스크래치",
-      "confidence": 0.92
+      "description": "약 3cm 길이의 선형 스크래치"
     }
   ],
   "overall_condition": "B",
   "recommended_price_adjustment": -15,
-  "analysis_confidence": 0.88,
-  "notes": "조명: 양호, 선명도: 높음"
+  "analysis_confidence": 0.88
 }
 
 ## Few-shot 예제
@@ -70,8 +78,7 @@ class ClaudeInspector:
   "defects": [],
   "overall_condition": "S",
   "recommended_price_adjustment": 0,
-  "analysis_confidence": 0.95,
-  "notes": "새것 같은 상태, 사용감 없음"
+  "analysis_confidence": 0.95
 }
 
 ### 예제 2: 경미한 결함
@@ -83,14 +90,12 @@ class ClaudeInspector:
       "type": "스크래치",
       "severity": "하",
       "location": "좌측 하단",
-      "description": "1cm 미만의 표면 스크래치, 눈에 잘 띄지 않음",
-      "confidence": 0.85
+      "description": "1cm 미만의 표면 스크래치, 눈에 잘 띄지 않음"
     }
   ],
   "overall_condition": "A",
   "recommended_price_adjustment": -5,
-  "analysis_confidence": 0.90,
-  "notes": "전체적으로 양호한 상태"
+  "analysis_confidence": 0.90
 }
 
 ## 주의사항
@@ -99,13 +104,26 @@ class ClaudeInspector:
 - overall_condition은 S/A/B/C/D 중 하나
 - recommended_price_adjustment는 -50 ~ 0 범위의 정수
 - analysis_confidence는 0.0 ~ 1.0 범위의 소수
-- JSON 형식으로만 응답하고, 추가 설명이나 마크다운은 사용하지 마세요"""
+- 결과는 반드시 report_inspection tool로 보고하세요"""
+
+    # rate limiter 예약용 예상 토큰 (시스템 프롬프트 + 1200px 이미지 + 출력)
+    ESTIMATED_CALL_TOKENS = 4000
+
+    # 구조화 출력용 tool (응답 스키마는 InspectionResponse pydantic 모델에서 생성)
+    INSPECTION_TOOL = {
+        "name": "report_inspection",
+        "description": "이미지 검수 결과(결함 목록, 상태 등급, 가격 조정, 신뢰도)를 보고합니다.",
+        "input_schema": InspectionResponse.model_json_schema(),
+    }
 
     def __init__(self, api_key: Optional[str] = None):
         """
         Args:
             api_key: Anthropic API 키 (None이면 settings에서 로드)
         """
+        if AsyncAnthropic is None:
+            raise ValueError("anthropic package is not installed (pip install anthropic)")
+
         self.api_key = api_key or settings.ANTHROPIC_API_KEY
         if not self.api_key:
             raise ValueError("Anthropic API key is required. Set ANTHROPIC_API_KEY in .env")
@@ -115,51 +133,6 @@ class ClaudeInspector:
         self.model = settings.CLAUDE_MODEL
         self.max_tokens = 800  # 최적화: 2000 → 800 (결함 분석에 충분)
 
-    def _optimize_image_for_claude(
-        self,
-        image_bytes: bytes,
-        max_long_edge: int = 1200,
-        quality: int = 85
-    ) -> tuple[bytes, str]:
-        """
-        Claude API 최적화를 위한 이미지 리사이즈
-
-        Args:
-            image_bytes: 원본 이미지 바이트
-            max_long_edge: 긴 쪽 최대 길이 (기본 1200px)
-            quality: JPEG 품질 (기본 85)
-
-        Returns:
-            (최적화된 이미지 바이트, media_type)
-        """
-        try:
-            img = Image.open(io.BytesIO(image_bytes))
-
-            # 긴 쪽이 max_long_edge를 초과하면 리사이즈
-            if max(img.size) > max_long_edge:
-                ratio = max_long_edge / max(img.size)
-                new_size = tuple(int(s * ratio) for s in img.size)
-                img = img.resize(new_size, Image.Resampling.LANCZOS)
-
-            # RGB 변환 (RGBA → RGB for JPEG)
-            if img.mode in ('RGBA', 'LA', 'P'):
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                if img.mode == 'P':
-                    img = img.convert('RGBA')
-                background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
-                img = background
-
-            # JPEG 품질 최적화 (비용 vs 정확도 균형)
-            buffer = io.BytesIO()
-            img.save(buffer, format='JPEG', quality=quality, optimize=True)
-
-            return buffer.getvalue(), 'image/jpeg'
-
-        except Exception as e:
-            # 최적화 실패 시 원본 반환
-            print(f"Image optimization failed: {e}, using original")
-            return image_bytes, 'image/jpeg'
-
     async def _load_s3_image_optimized(self, s3_path: str) -> tuple[str, str]:
         """
         S3 이미지를 다운로드하고 최적화하여 base64 인코딩
@@ -170,33 +143,18 @@ class ClaudeInspector:
         Returns:
             (base64 인코딩된 이미지 문자열, media_type)
         """
-        # S3 경로 파싱
-        if s3_path.startswith('s3://'):
-            s3_path = s3_path[5:]
-
-        parts = s3_path.split('/', 1)
-        bucket = parts[0]
-        key = parts[1] if len(parts) > 1 else ''
-
-        # 한글 파일명 정규화 (NFC 통일 - cross-platform)
-        key = unicodedata.normalize('NFC', key)
-
-        # S3에서 이미지 다운로드 (비동기 아님 - boto3는 sync only)
-        s3 = boto3.client('s3')
-        response = s3.get_object(Bucket=bucket, Key=key)
-        image_bytes = response['Body'].read()
-
-        # 이미지 최적화 (1200px + JPEG quality 85)
-        optimized_bytes, media_type = self._optimize_image_for_claude(image_bytes)
+        # 공유 이미지 캐시 + 프로세스 풀 전처리 (1200px, JPEG 85)
+        optimized_bytes = await image_preprocessor.load(s3_path, "claude_1200.jpg")
 
         # Base64 인코딩
         image_base64 = base64.standard_b64encode(optimized_bytes).decode('utf-8')
-        return image_base64, media_type
+        return image_base64, 'image/jpeg'
 
     async def analyze_image(
         self,
         s3_path: str,
-        item_category: str = "물품"
+        item_category: str = "물품",
+        image: Optional[tuple[bytes, str]] = None
     ) -> InspectionResult:
         """
         이미지를 분석하여 결함 정보 추출 (비동기)
@@ -204,6 +162,8 @@ class ClaudeInspector:
         Args:
             s3_path: S3 이미지 경로 (s3://bucket/key 형식)
             item_category: 물품 카테고리 (기본: "물품")
+            image: 이미 로드한 (이미지 바이트, media_type) - 없으면 S3에서 로드
+                   (Gemini용 1200px 전처리 이미지를 그대로 사용 가능)
 
         Returns:
             InspectionResult: 분석 결과
@@ -212,94 +172,146 @@ class ClaudeInspector:
             Exception: API 호출 실패 시
         """
         # S3 이미지 로드 및 최적화
-        image_base64, media_type = await self._load_s3_image_optimized(s3_path)
+        if image is not None:
+            image_base64 = base64.standard_b64encode(image[0]).decode('utf-8')
+            media_type = image[1]
+        else:
+            image_base64, media_type = await self._load_s3_image_optimized(s3_path)
 
         # 사용자 프롬프트 (카테고리별 커스터마이징)
         user_prompt = f"이 {item_category} 이미지를 분석하여 결함을 감지하고 상태를 평가해주세요."
 
         # Claude API 비동기 호출 + Prompt Caching
-        message = await self.client.messages.create(
-            model=self.model,
-            max_tokens=self.max_tokens,
-            temperature=0.1,  # 최적화: 0.3 → 0.1 (캐싱 효율 향상, deterministic)
-            system=[
-                {
-                    "type": "text",
-                    "text": self.SYSTEM_PROMPT,
-                    "cache_control": {"type": "ephemeral"}  # 5분 캐시 (비용 90% 절감)
-                }
-            ],
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "image",
-                            "source": {
-                                "type": "base64",
-                                "media_type": media_type,
-                                "data": image_base64
+        # 구조화 출력: report_inspection tool 호출을 강제 (input_schema = InspectionResponse)
+        # 공용 rate limiter 경유 (429 시 백오프 후 재시도)
+        message = await claude_rate_limiter.run(
+            lambda: self._timed_create(
+                model=self.model,
+                max_tokens=self.max_tokens,
+                temperature=0.1,  # 최적화: 0.3 → 0.1 (캐싱 효율 향상, deterministic)
+                tools=[self.INSPECTION_TOOL],
+                tool_choice={"type": "tool", "name": self.INSPECTION_TOOL["name"]},
+                system=[
+                    {
+                        "type": "text",
+                        "text": self.SYSTEM_PROMPT,
+                        "cache_control": {"type": "ephemeral"}  # 5분 캐시 (비용 90% 절감)
+                    }
+                ],
+                messages=[
+                    {
+                        "role": "user",
+                        "content": [
+                            {
+                                "type": "image",
+                                "source": {
+                                    "type": "base64",
+                                    "media_type": media_type,
+                                    "data": image_base64
+                                }
+                            },
+                            {
+                                "type": "text",
+                                "text": user_prompt
                             }
-                        },
-                        {
-                            "type": "text",
-                            "text": user_prompt
-                        }
-                    ]
-                }
-            ]
+                        ]
+                    }
+                ]
+            ),
+            estimated_tokens=self.ESTIMATED_CALL_TOKENS
         )
+        usage = getattr(message, "usage", None)
+        if usage is not None:
+            claude_rate_limiter.record_usage(usage.input_tokens + usage.output_tokens)
+            record_llm_cost(
+                "claude", "analyze_image", self.model,
+                usage.input_tokens, usage.output_tokens,
+                getattr(usage, "cache_read_input_tokens", None) or 0
+            )
+
+        # tool 입력 추출 및 스키마 검증 (실패 시 StructuredOutputError, 기본값으로 대체하지 않음)
+        tool_input = next(
+            (block.input for block in message.content if getattr(block, "type", None) == "tool_use"),
+            None
+        )
+        if tool_input is None:
+            record_structured_output("claude", "analyze_image", "invalid")
+            raise StructuredOutputError("invalid", f"no tool_use block (stop_reason={message.stop_reason})")
+        raw_text = json.dumps(tool_input, ensure_ascii=False)
+        parsed = parse_structured(raw_text, InspectionResponse, "claude", "analyze_image")
 
-        # 응답 추출
-        raw_text = message.content[0].text
+        return InspectionResult(
+            defects=parsed.defects,
+            overall_condition=parsed.overall_condition,
+            recommended_price_adjustment=parsed.recommended_price_adjustment,
+            analysis_confidence=parsed.analysis_confidence,
+            raw_response=raw_text
+        )
 
-        # JSON 추출 및 파싱
-        json_text = self._extract_json(raw_text)
-        result_data = self._parse_json_with_fallback(json_text, raw_text)
+    async def _timed_create(self, **kwargs):
+        """messages.create + 실제 API 호출 시간을 라우터에 보고 (rate limiter 대기 제외)"""
+        call_start = time.perf_counter()
+        elapsed = None
+        try:
+            message = await self.client.messages.create(**kwargs)
+            elapsed = time.perf_counter() - call_start
+            return message
+        finally:
+            record_provider_call(elapsed)
 
-        # Defect 객체 생성
-        defects = [
-            Defect(**defect_data)
-            for defect_data in result_data.get('defects', [])
-        ]
+    async def analyze_images(
+        self,
+        s3_paths: List[str],
+        item_category: str = "물품",
+        images: Optional[List[Union[tuple[bytes, str], Exception]]] = None
+    ) -> List[Union[InspectionResult, Exception]]:
+        """
+        여러 이미지 분석 (이미지당 1회 호출, 동시 진행) - GeminiInspector.analyze_images와 같은 형태
 
-        # InspectionResult 생성
-        return InspectionResult(
-            defects=defects,
-            overall_condition=result_data.get('overall_condition', 'C'),
-            recommended_price_adjustment=result_data.get('recommended_price_adjustment', -20),
-            analysis_confidence=result_data.get('analysis_confidence', 0.8),
-            raw_response=raw_text
+        Returns:
+            s3_paths와 같은 순서의 결과 리스트 (실패한 이미지는 Exception)
+        """
+        images = images if images is not None else [None] * len(s3_paths)
+
+        async def _one(path: str, image):
+            if isinstance(image, Exception):
+                return image
+            return await self.analyze_image(path, item_category, image=image)
+
+        return await asyncio.gather(
+            *[_one(path, image) for path, image in zip(s3_paths, images)],
+            return_exceptions=True
         )
 
-    def _extract_json(self, raw_text: str) -> str:
-        """JSON 추출 (마크다운 태그 제거)"""
-        json_text = raw_text.strip()
+    async def aclose(self) -> None:
+        await self.client.close()
 
-        # ```json``` 태그 제거
-        if '```json' in json_text:
-            json_text = json_text.split('```json')[1].split('```')[0].strip()
-        elif '```' in json_text:
-            json_text = json_text.split('```')[1].split('```')[0].strip()
 
-        return json_text
+# 프로세스 공용 인스턴스 (없으면 None - 키 미설정 또는 anthropic 미설치)
+_inspector: Optional[ClaudeInspector] = None
+_unavailable_reason: Optional[str] = None
 
-    def _parse_json_with_fallback(self, json_text: str, raw_text: str) -> dict:
-        """JSON 파싱 (실패 시 폴백)"""
+
+def get_claude_inspector() -> Optional[ClaudeInspector]:
+    """공용 ClaudeInspector (사용할 수 없으면 None, 이유는 claude_unavailable_reason())"""
+    global _inspector, _unavailable_reason
+    if _inspector is None and _unavailable_reason is None:
         try:
-            return json.loads(json_text)
-        except json.JSONDecodeError as e:
-            print(f"JSON parsing failed: {e}")
-            print(f"Raw response: {raw_text[:200]}...")
-
-            # 폴백: 기본값 반환
-            return {
-                "defects": [],
-                "overall_condition": "C",
-                "recommended_price_adjustment": -20,
-                "analysis_confidence": 0.5,
-                "notes": "JSON 파싱 실패, 기본값 사용"
-            }
+            _inspector = ClaudeInspector()
+        except ValueError as e:
+            _unavailable_reason = str(e)
+    return _inspector
+
+
+def claude_unavailable_reason() -> Optional[str]:
+    return _unavailable_reason
+
+
+async def close_claude_inspector() -> None:
+    global _inspector
+    if _inspector is not None:
+        await _inspector.aclose()
+        _inspector = None
 
 
 # 간편 비동기 함수
@@ -0,0 +1,185 @@
+"""
+마감 시간 기반 검수 실행기 (fault_desc)
+
+고정된 "85초 전이면 다음 배치 시작" 대신, 측정된 호출 지연 시간으로
+마감 전에 끝낼 수 있는 만큼만 이미지를 보냅니다.
+
+- LatencyModel: 호출 지연 = base + per_image × 이미지 수 (EWMA 가중 선형 회귀)
+  GeminiInspector가 실제 generate_content 시간을 기록 (프로세스 공유)
+- 남은 시간 안에 (안전 계수 포함) 끝날 것으로 예상되는 최대 청크 크기로 호출
+- 호출은 최대 max_parallel개 동시 진행, 마감 시각에 진행 중인 호출은 취소
+- 입력 순서가 우선순위 (image_dedupe.prioritize: 근접 촬영/다른 각도 먼저)
+- 청크가 끝날 때마다 on_result 콜백으로 부분 결과 전달
+
+사용 예시:
+    executor = DeadlineExecutor(deadline=time.monotonic() + 85, chunk_size=10)
+    outcome = await executor.run(order, analyze_chunk, on_result=publish)
+    outcome.results   # {index: InspectionResult | Exception}
+    outcome.skipped   # 시간 부족으로 보내지 못했거나 취소된 인덱스
+"""
+import asyncio
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+
+from app.utils.metrics import DEADLINE_IMAGES
+
+
+class LatencyModel:
+    """호출 지연 예측 (seconds ≈ base + per_image × n), 관측치 EWMA"""
+
+    def __init__(self, base: float = 4.0, per_image: float = 1.5, alpha: float = 0.2):
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        # 가중 평균 통계량 (n, s, n², n·s) - 사전값(prior)으로 초기화
+        self._n = 1.0
+        self._s = base + per_image
+        self._nn = 1.0
+        self._ns = base + per_image
+        self._prior = (base, per_image)
+        self._observations = 0
+
+    def observe(self, image_count: int, seconds: float) -> None:
+        n = float(image_count)
+        with self._lock:
+            a = self.alpha
+            self._n += a * (n - self._n)
+            self._s += a * (seconds - self._s)
+            self._nn += a * (n * n - self._nn)
+            self._ns += a * (n * seconds - self._ns)
+            self._observations += 1
+
+    def coefficients(self) -> tuple[float, float]:
+        """(base, per_image) 추정치"""
+        with self._lock:
+            if self._observations == 0:
+                return self._prior
+            variance = self._nn - self._n ** 2
+            if variance < 0.25:
+                # 같은 크기 청크만 관측 → 평균 지연을 이미지 수에 비례 배분
+                per_image = self._s / max(self._n, 1.0) * 0.5
+            else:
+                per_image = (self._ns - self._n * self._s) / variance
+            per_image = max(0.05, per_image)
+            base = max(0.5, self._s - per_image * self._n)
+            return base, per_image
+
+    def predict(self, image_count: int) -> float:
+        base, per_image = self.coefficients()
+        return base + per_image * image_count
+
+    def stats(self) -> dict:
+        base, per_image = self.coefficients()
+        return {"base_seconds": round(base, 2), "per_image_seconds": round(per_image, 2),
+                "observations": self._observations}
+
+
+# 검수 호출 지연 (프로세스 공유, GeminiInspector가 기록)
+inspection_latency = LatencyModel()
+
+
+@dataclass
+class DeadlineOutcome:
+    results: Dict[int, object] = field(default_factory=dict)
+    skipped: List[int] = field(default_factory=list)
+    timed_out: bool = False
+
+
+class DeadlineExecutor:
+    """우선순위 순서로 청크를 보내고, 마감 시각에 남은 작업을 취소"""
+
+    def __init__(
+        self,
+        deadline: float,
+        chunk_size: int,
+        max_parallel: int = 2,
+        safety_factor: float = 1.3,
+        latency: Optional[LatencyModel] = None
+    ):
+        """
+        Args:
+            deadline: 마감 시각 (time.monotonic 기준)
+            chunk_size: 호출당 최대 이미지 수
+            max_parallel: 동시에 진행할 호출 수
+            safety_factor: 예측 지연에 곱할 여유 계수
+            latency: 지연 예측 모델 (기본: 프로세스 공용 inspection_latency)
+        """
+        self.deadline = deadline
+        self.chunk_size = max(1, chunk_size)
+        self.max_parallel = max(1, max_parallel)
+        self.safety_factor = safety_factor
+        self.latency = latency or inspection_latency
+
+    def _fit(self, available: int, remaining_seconds: float) -> int:
+        """남은 시간 안에 끝날 것으로 예상되는 최대 이미지 수 (0이면 보낼 수 없음)"""
+        for n in range(min(self.chunk_size, available), 0, -1):
+            if self.latency.predict(n) * self.safety_factor <= remaining_seconds:
+                return n
+        return 0
+
+    async def run(
+        self,
+        order: Sequence[int],
+        call: Callable[[List[int]], Awaitable[Sequence[object]]],
+        on_result: Optional[Callable[[Dict[int, object]], Awaitable[None]]] = None
+    ) -> DeadlineOutcome:
+        """
+        Args:
+            order: 처리할 인덱스 (우선순위 순)
+            call: 인덱스 청크 → 같은 순서의 결과 리스트 (결과 또는 Exception)
+            on_result: 청크 완료 시 {인덱스: 결과}로 호출 (부분 결과 게시)
+
+        Returns:
+            DeadlineOutcome (results, skipped, timed_out)
+        """
+        outcome = DeadlineOutcome()
+        queue = list(order)
+        running: Dict[asyncio.Task, List[int]] = {}
+
+        try:
+            while queue or running:
+                # 빈 슬롯만큼 새 청크 시작
+                while queue and len(running) < self.max_parallel:
+                    remaining = self.deadline - time.monotonic()
+                    n = self._fit(len(queue), remaining)
+                    if n == 0:
+                        break
+                    chunk, queue = queue[:n], queue[n:]
+                    running[asyncio.create_task(call(chunk))] = chunk
+
+                if not running:
+                    # 남은 시간으로는 1장도 못 끝냄
+                    outcome.timed_out = bool(queue)
+                    break
+
+                timeout = self.deadline - time.monotonic()
+                done, _ = await asyncio.wait(
+                    running, timeout=max(0.0, timeout), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    # 마감 도달 → 진행 중인 호출 취소
+                    outcome.timed_out = True
+                    break
+
+                for task in done:
+                    chunk = running.pop(task)
+                    try:
+                        chunk_results = task.result()
+                    except Exception as e:
+                        chunk_results = [e] * len(chunk)
+                    published = dict(zip(chunk, chunk_results))
+                    outcome.results.update(published)
+                    DEADLINE_IMAGES.labels("completed").inc(len(chunk))
+                    if on_result is not None:
+                        await on_result(published)
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+        outcome.skipped = [i for i in order if i not in outcome.results]
+        if outcome.skipped:
+            DEADLINE_IMAGES.labels("skipped").inc(len(outcome.skipped))
+        return outcome
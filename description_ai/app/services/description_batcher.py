@@ -0,0 +1,274 @@
+"""
+제품 설명 생성 마이크로 배치 (/inspect/analyze_desc)
+
+여러 판매자가 동시에 상품을 올릴 때 요청마다 Gemini를 따로 호출하면 RPM 한도에
+바로 걸리므로, 짧은 시간(DESC_BATCH_WINDOW_MS) 동안 요청을 모아 여러 제품을
+호출 1회로 생성합니다 (GeminiInspector.generate_descriptions).
+
+- 우선순위: interactive(화면에서 기다리는 요청) > background, 같은 우선순위는 도착 순
+  호출 슬롯(DESC_BATCH_MAX_PARALLEL)이 비어야 다음 배치를 꺼내므로, 밀려 있을수록 배치가 커짐
+- 모든 호출은 공용 gemini_rate_limiter 경유 (배치 1개 = 요청 1개)
+- 캐시: (800px 이미지 내용 해시, 제품명, 프롬프트 버전) → 설명 (결과 캐시 SQLite 공유)
+  같은 키의 진행 중 요청은 하나로 합침
+- SLA: interactive 요청은 DESC_SLA_SECONDS 안에 응답 (초과 시 기본 문구, 생성은 계속되어
+  결과가 캐시에 저장되므로 다시 요청하면 바로 받음)
+- 다중 제품 응답이 실패하면 제품별 단일 호출로 재시도
+
+사용 예시:
+    description = await description_batcher.describe(s3_path, product_name)
+"""
+import asyncio
+import hashlib
+import heapq
+import itertools
+import json
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from app.config import settings
+from app.services.gemini_inspector import (
+    GeminiInspector,
+    description_fallback,
+    estimate_description_tokens,
+    get_inspector
+)
+from app.services.rate_limiter import gemini_rate_limiter
+from app.utils.metrics import DESCRIPTION_BATCH_SIZE, DESCRIPTION_REQUESTS
+from app.utils.result_cache import get_result_cache, result_key
+
+PRIORITIES = {"interactive": 0, "background": 1}
+
+
+@dataclass
+class DescriptionLookup:
+    """캐시 조회 결과 (스트리밍 엔드포인트와 공유)"""
+    image: bytes
+    key: str
+    prompt_version: str
+    description: Optional[str] = None
+
+
+@dataclass(order=True)
+class _Pending:
+    priority: int
+    seq: int
+    key: str = field(compare=False)
+    prompt_version: str = field(compare=False)
+    product_name: str = field(compare=False)
+    image: bytes = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+class DescriptionBatcher:
+    """설명 요청을 모아 우선순위 순으로 배치 호출"""
+
+    def __init__(self, window_ms: int, max_items: int, max_parallel: int):
+        self.window = window_ms / 1000
+        self.max_items = max(1, max_items)
+        self.max_parallel = max(1, max_parallel)
+
+        self._heap: List[_Pending] = []
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop_task: Optional[asyncio.Task] = None
+        self._batches: set = set()
+
+    def _ensure_started(self) -> None:
+        if self._loop_task is None or self._loop_task.done():
+            self._wakeup = asyncio.Event()
+            self._slots = asyncio.Semaphore(self.max_parallel)
+            self._loop_task = asyncio.create_task(self._run())
+
+    async def lookup(self, s3_path: str, product_name: str) -> DescriptionLookup:
+        """800px 이미지 로드 + 캐시 키 계산 + 캐시 조회 (없으면 description=None)"""
+        inspector = get_inspector()
+        image = await inspector.load_description_image(s3_path)
+        prompt_version = GeminiInspector.description_prompt_version(product_name)
+        lookup = DescriptionLookup(
+            image, result_key(hashlib.sha256(image).hexdigest(), inspector.model, prompt_version), prompt_version
+        )
+
+        cache = get_result_cache()
+        if cache is not None:
+            payload = await asyncio.to_thread(cache.get, lookup.key)
+            if payload is not None:
+                lookup.description = json.loads(payload)["description"]
+        return lookup
+
+    async def remember(self, lookup: DescriptionLookup, product_name: str, description: str) -> None:
+        """배치 밖에서 생성한 설명(스트리밍)을 캐시에 저장"""
+        if description != description_fallback(product_name):
+            await self._put([(lookup.key, lookup.prompt_version, description)])
+
+    async def describe(
+        self,
+        s3_path: str,
+        product_name: str,
+        priority: str = "interactive",
+        sla_seconds: Optional[float] = None
+    ) -> str:
+        """
+        제품 설명 (캐시 → 진행 중 요청 합류 → 배치 대기)
+
+        Args:
+            s3_path: 제품 이미지 S3 경로
+            product_name: 제품명
+            priority: "interactive" 또는 "background"
+            sla_seconds: 응답 시한 (초과 시 기본 문구 반환, None이면 완료까지 대기)
+
+        Returns:
+            str: 제품 설명
+        """
+        lookup = await self.lookup(s3_path, product_name)
+        if lookup.description is not None:
+            DESCRIPTION_REQUESTS.labels(priority, "cache_hit").inc()
+            return lookup.description
+
+        key = lookup.key
+        future = self._inflight.get(key)
+        if future is not None:
+            DESCRIPTION_REQUESTS.labels(priority, "coalesced").inc()
+        else:
+            self._ensure_started()
+            future = asyncio.get_running_loop().create_future()
+            self._inflight[key] = future
+            heapq.heappush(self._heap, _Pending(
+                PRIORITIES.get(priority, PRIORITIES["background"]), next(self._seq),
+                key, lookup.prompt_version, product_name, lookup.image, future
+            ))
+            self._wakeup.set()
+
+        try:
+            if sla_seconds is None:
+                description = await asyncio.shield(future)
+            else:
+                description = await asyncio.wait_for(asyncio.shield(future), sla_seconds)
+        except asyncio.TimeoutError:
+            DESCRIPTION_REQUESTS.labels(priority, "sla_fallback").inc()
+            print(f"Description SLA ({sla_seconds}s) exceeded for {s3_path}, returning fallback")
+            return description_fallback(product_name)
+        except Exception:
+            DESCRIPTION_REQUESTS.labels(priority, "error").inc()
+            raise
+
+        DESCRIPTION_REQUESTS.labels(priority, "generated").inc()
+        return description
+
+    async def _run(self) -> None:
+        """수집 시간만큼 모은 뒤, 호출 슬롯이 비면 우선순위 순으로 배치를 꺼내 실행"""
+        while True:
+            await self._wakeup.wait()
+            if len(self._heap) < self.max_items:
+                await asyncio.sleep(self.window)
+            await self._slots.acquire()
+
+            batch = [heapq.heappop(self._heap) for _ in range(min(self.max_items, len(self._heap)))]
+            if not self._heap:
+                self._wakeup.clear()
+            if not batch:
+                self._slots.release()
+                continue
+
+            task = asyncio.create_task(self._dispatch(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _generate(self, batch: List[_Pending]) -> list:
+        inspector = get_inspector()
+        items = [(pending.image, pending.product_name) for pending in batch]
+        DESCRIPTION_BATCH_SIZE.observe(len(items))
+        return await gemini_rate_limiter.run(
+            lambda: inspector.generate_descriptions(items),
+            estimated_tokens=estimate_description_tokens(len(items))
+        )
+
+    async def _dispatch(self, batch: List[_Pending]) -> None:
+        try:
+            try:
+                results = await self._generate(batch)
+            except Exception as e:
+                results = [e] * len(batch)
+
+            # 다중 제품 응답 실패 → 실패한 제품만 단일 호출로 재시도
+            retry = [i for i, result in enumerate(results) if isinstance(result, Exception)]
+            if len(batch) > 1 and retry:
+                print(f"Batched description failed for {len(retry)}/{len(batch)} products, retrying individually")
+                retried = await asyncio.gather(
+                    *[self._generate([batch[i]]) for i in retry], return_exceptions=True
+                )
+                for i, result in zip(retry, retried):
+                    results[i] = result if isinstance(result, Exception) else result[0]
+
+            await self._store(batch, results)
+            for pending, result in zip(batch, results):
+                if pending.future.done():
+                    continue
+                if isinstance(result, Exception):
+                    pending.future.set_exception(result)
+                else:
+                    pending.future.set_result(result)
+        finally:
+            for pending in batch:
+                self._inflight.pop(pending.key, None)
+                if not pending.future.done():
+                    pending.future.cancel()
+                # 아무도 기다리지 않는 future의 예외 경고 방지
+                elif not pending.future.cancelled():
+                    pending.future.exception()
+            self._slots.release()
+
+    async def _store(self, batch: List[_Pending], results: list) -> None:
+        """생성된 설명을 캐시에 저장 (기본 문구는 저장하지 않음)"""
+        await self._put([
+            (pending.key, pending.prompt_version, result)
+            for pending, result in zip(batch, results)
+            if isinstance(result, str) and result != description_fallback(pending.product_name)
+        ])
+
+    async def _put(self, rows: List[tuple[str, str, str]]) -> None:
+        """(키, 프롬프트 버전, 설명) 저장"""
+        cache = get_result_cache()
+        if cache is None or not rows:
+            return
+        model = get_inspector().model
+
+        def _write():
+            for key, prompt_version, description in rows:
+                cache.put(key, model, prompt_version, json.dumps({"description": description}, ensure_ascii=False))
+        try:
+            await asyncio.to_thread(_write)
+        except Exception as e:
+            print(f"Description cache write failed: {e}")
+
+    async def close(self) -> None:
+        """수집 루프와 진행 중 배치 정리 (lifespan 종료 시)"""
+        tasks = [task for task in [self._loop_task, *self._batches] if task is not None]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        for pending in self._heap:
+            if not pending.future.done():
+                pending.future.cancel()
+        self._heap.clear()
+        self._inflight.clear()
+        self._loop_task = None
+
+    def stats(self) -> dict:
+        return {
+            "queued": len(self._heap),
+            "in_flight": len(self._inflight),
+            "running_batches": len(self._batches),
+            "window_ms": int(self.window * 1000),
+            "max_items": self.max_items,
+        }
+
+
+# 프로세스 공용 배처
+description_batcher = DescriptionBatcher(
+    settings.DESC_BATCH_WINDOW_MS,
+    settings.DESC_BATCH_MAX_ITEMS,
+    settings.DESC_BATCH_MAX_PARALLEL
+)
@@ -0,0 +1,324 @@
+"""
+fault_desc 결과 종합 (점진적 집계) + 마크다운 생성 + fault_description 부분 갱신
+
+- FaultSummary: 이미지 결과가 도착할 때마다 등급/가격 조정/결함 집계를 갱신
+  (근접 중복 묶음은 대표 결과를 멤버 전체에 매핑, 종합 평가는 묶음당 1회 반영)
+- CoalescedFaultWriter: 부분 마크다운을 최소 간격으로 모아 RUNNING 상태로 upsert
+  (최신 내용만 기록, 최종 결과 기록 전에 대기 중인 부분 기록은 취소)
+
+사용 예시:
+    summary = FaultSummary(product_name, s3_images, clusters)
+    writer = CoalescedFaultWriter(product_id)
+
+    summary.add(partial_results)            # {대표 인덱스: 결과}
+    writer.publish(summary.markdown())      # 진행 중 마크다운 (coalesced)
+
+    await writer.close()                    # 최종 기록 전
+    await asyncio.to_thread(complete_fault_description, product_id, summary.markdown(final=True), completion_key)
+"""
+import asyncio
+import bisect
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence
+
+from app.config import settings
+from app.db.database import update_fault_description
+from app.schemas.inspection import ImageInspectionResult
+from app.utils.metrics import FAULT_DESC_PARTIAL_WRITES
+
+CONDITION_ORDER = {"S": 0, "A": 1, "B": 2, "C": 3, "D": 4}
+
+
+class FaultSummary:
+    """이미지별 결과를 받아 종합 평가를 점진적으로 갱신"""
+
+    def __init__(self, product_name: str, s3_images: Sequence[str], clusters: Sequence[Sequence[int]]):
+        """
+        Args:
+            product_name: 제품명
+            s3_images: 전체 이미지 경로 (원래 순서)
+            clusters: 근접 중복 묶음 (각 묶음의 첫 번째가 대표 인덱스)
+        """
+        self.product_name = product_name
+        self.s3_images = list(s3_images)
+        self.members = {cluster[0]: list(cluster) for cluster in clusters}
+
+        self.results: Dict[int, ImageInspectionResult] = {}   # 이미지 인덱스 → 결과
+        self.failed: Dict[int, Exception] = {}
+        self.total_defects = 0
+        # 종합 평가용 정렬 목록 (대표 결과만, 삽입 시 정렬 유지)
+        self._scores: List[int] = []
+        self._adjustments: List[int] = []  # 오름차순 (할인율이 큰 순)
+
+    @property
+    def completed(self) -> int:
+        return len(self.results) + len(self.failed)
+
+    @property
+    def remaining(self) -> int:
+        return len(self.s3_images) - self.completed
+
+    def add(self, partial: Dict[int, object]) -> None:
+        """대표 인덱스 → 결과(InspectionResult 또는 Exception) 반영"""
+        for rep, result in partial.items():
+            members = self.members.get(rep, [rep])
+            if isinstance(result, Exception):
+                for j in members:
+                    print(f"Image analysis failed: {self.s3_images[j]}, error: {result}")
+                    self.failed[j] = result
+                continue
+
+            for j in members:
+                self.results[j] = ImageInspectionResult(
+                    image_path=self.s3_images[j],
+                    defects=result.defects,
+                    overall_condition=result.overall_condition,
+                    recommended_price_adjustment=result.recommended_price_adjustment,
+                    analysis_confidence=result.analysis_confidence,
+                    duplicate_of=None if j == rep else self.s3_images[rep]
+                )
+
+            # 근접 중복은 대표 이미지 1장으로만 반영 (같은 사진 여러 장이 평균을 왜곡하지 않도록)
+            bisect.insort(self._scores, CONDITION_ORDER.get(result.overall_condition, CONDITION_ORDER["C"]))
+            bisect.insort(self._adjustments, result.recommended_price_adjustment)
+            self.total_defects += len(result.defects)
+
+    @property
+    def inspection_results(self) -> List[ImageInspectionResult]:
+        """성공한 이미지 결과 (원래 이미지 순서)"""
+        return [self.results[j] for j in sorted(self.results)]
+
+    def aggregate(self) -> tuple[str, int]:
+        """
+        (종합 등급, 종합 가격 조정) - 상위 70% 가중 평균 (이상치 제거)
+
+        등급은 좋은 순 상위 70%의 평균에 가장 가까운 등급, 가격 조정은
+        할인율이 작은 순 상위 70%의 평균
+        """
+        top_70_count = max(1, int(len(self._scores) * 0.7))
+
+        top_70_scores = self._scores[:top_70_count]
+        avg_score = sum(top_70_scores) / len(top_70_scores)
+        condition = min(CONDITION_ORDER.keys(), key=lambda x: abs(CONDITION_ORDER[x] - avg_score))
+
+        top_70_adj = self._adjustments[-top_70_count:]
+        adjustment = int(sum(top_70_adj) / len(top_70_adj))
+        return condition, adjustment
+
+    def markdown(self, final: bool = False, timed_out: bool = False) -> str:
+        """
+        현재까지의 요약 마크다운
+
+        final=False면 남은 이미지 수를 표시하는 진행 중 요약, final=True면 최종 요약
+        (미완료 이미지는 시간 초과로 미분석 처리). 성공한 이미지가 없으면 에러 마크다운.
+        """
+        remaining = 0 if final else self.remaining
+        skipped = self.remaining if final else 0
+
+        if not self.results:
+            if not final:
+                return (
+                    "# 결함 분석 결과\n\n"
+                    f"⏳ **분석 진행 중**: {self.completed}장 완료, {remaining}장 남음\n"
+                )
+            return generate_error_markdown(
+                total_images=len(self.s3_images),
+                processed_images=self.completed,
+                failed_count=len(self.failed),
+                skipped_count=skipped,
+                timed_out=timed_out
+            )
+
+        condition, adjustment = self.aggregate()
+        return generate_markdown_summary(
+            product_name=self.product_name,
+            overall_condition=condition,
+            price_adjustment=adjustment,
+            inspection_results=self.inspection_results,
+            images_analyzed=len(self.results),
+            images_failed=len(self.failed),
+            images_skipped=skipped,
+            timed_out=timed_out,
+            images_remaining=remaining
+        )
+
+
+class CoalescedFaultWriter:
+    """
+    진행 중 마크다운을 fault_description에 모아서 기록 (RUNNING)
+
+    publish()는 즉시 반환하고, 마지막 기록 후 min_interval이 지나면 그때까지의
+    최신 마크다운 1건만 기록합니다. 20장 작업이라도 기록 횟수는
+    (처리 시간 / min_interval)개 이하입니다.
+    """
+
+    def __init__(self, product_id: str, min_interval: Optional[float] = None):
+        self.product_id = product_id
+        self.min_interval = settings.FAULT_DESC_PARTIAL_WRITE_INTERVAL if min_interval is None else min_interval
+        self._pending: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._writing = False
+        self._last_write = time.monotonic()  # 시작 시 RUNNING 기록 직후로 간주
+        self.writes = 0
+
+    def publish(self, markdown: str) -> None:
+        if self._pending is not None:
+            FAULT_DESC_PARTIAL_WRITES.labels("coalesced").inc()
+        self._pending = markdown
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        delay = self._last_write + self.min_interval - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        markdown, self._pending = self._pending, None
+        self._writing = True
+        try:
+            await asyncio.to_thread(
+                update_fault_description,
+                product_id=self.product_id,
+                markdown=markdown,
+                status='RUNNING',
+                error_msg=None
+            )
+            self.writes += 1
+            FAULT_DESC_PARTIAL_WRITES.labels("written").inc()
+        except Exception as e:
+            print(f"Partial fault_description write failed: {e}")
+        finally:
+            self._writing = False
+            self._last_write = time.monotonic()
+
+        self._task = None
+        if self._pending is not None:
+            self._task = asyncio.create_task(self._flush_later())
+
+    async def close(self) -> None:
+        """대기 중인 부분 기록 취소 (진행 중인 기록은 완료까지 대기) - 최종 기록 전에 호출"""
+        if self._pending is not None:
+            FAULT_DESC_PARTIAL_WRITES.labels("coalesced").inc()
+        self._pending = None
+        task = self._task
+        if task is None:
+            return
+        if not self._writing:
+            task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        self._task = None
+
+
+def generate_markdown_summary(
+    product_name: str,
+    overall_condition: str,
+    price_adjustment: int,
+    inspection_results: List[ImageInspectionResult],
+    images_analyzed: int,
+    images_failed: int,
+    images_skipped: int = 0,
+    timed_out: bool = False,
+    images_remaining: int = 0
+) -> str:
+    """
+    마크다운 결함 요약 생성 (통합 형식)
+
+    images_remaining > 0이면 분석 중간 결과 (지금까지의 등급/결함 + 남은 이미지 수)
+    """
+    condition_labels = {
+        "S": "최상 (거의 새것)",
+        "A": "우수 (미세한 사용감)",
+        "B": "양호 (약간의 결함)",
+        "C": "보통 (눈에 띄는 결함)",
+        "D": "불량 (심각한 결함)"
+    }
+
+    md = f"# 결함 분석 결과\n\n"
+
+    # 진행 중 (부분 결과)
+    if images_remaining > 0:
+        md += f"⏳ **분석 진행 중**: {images_analyzed + images_failed}장 완료, {images_remaining}장 남음\n\n"
+        md += "아래 등급과 결함은 지금까지 분석한 이미지 기준이며, 완료되면 갱신됩니다.\n\n"
+
+    # 타임아웃 경고
+    elif timed_out or images_skipped > 0:
+        md += "⚠️ **주의**: 처리 시간 제한으로 인해 일부 이미지만 분석되었습니다.\n\n"
+        md += f"- 전체 이미지: {images_analyzed + images_failed + images_skipped}장\n"
+        md += f"- 분석 완료: {images_analyzed}장\n"
+        if images_failed > 0:
+            md += f"- 분석 실패: {images_failed}장\n"
+        if images_skipped > 0:
+            md += f"- 시간 초과로 미분석: {images_skipped}장\n"
+        md += "\n"
+
+    label = "현재까지 상태 등급" if images_remaining > 0 else "전체 상태 등급"
+    md += f"**{label}**: {overall_condition} - {condition_labels.get(overall_condition, '알 수 없음')}\n\n"
+
+    # 결함 수집 및 위치별 그룹화 (근접 중복은 대표 이미지 결과만 - 같은 결함 중복 집계 방지)
+    all_defects = []
+    for result in inspection_results:
+        if result.duplicate_of is None:
+            all_defects.extend(result.defects)
+
+    md += f"**발견된 결함**: {len(all_defects)}건\n\n"
+
+    if len(all_defects) == 0:
+        md += "## ✅ 결함 없음\n\n"
+        md += "분석한 이미지에서 특별한 결함이 발견되지 않았습니다.\n"
+    else:
+        md += "## 🔍 발견된 결함\n\n"
+
+        # 결함을 하나씩 나열 (위치 중심)
+        for idx, defect in enumerate(all_defects, 1):
+            md += f"{idx}. **{defect.type}** ({defect.severity}) - {defect.location}\n"
+            md += f"   - {defect.description}\n\n"
+
+    # 이미지별 결과 (근접 중복은 대표 이미지 결과 공유)
+    md += "## 📷 이미지별 결과\n\n"
+    for result in inspection_results:
+        line = f"- `{result.image_path.rsplit('/', 1)[-1]}`: {result.overall_condition}등급, 결함 {len(result.defects)}건"
+        if result.duplicate_of is not None:
+            line += f" (유사 사진 `{result.duplicate_of.rsplit('/', 1)[-1]}`의 결과 적용)"
+        md += line + "\n"
+    md += "\n"
+
+    # 추가 정보
+    md += "---\n\n"
+    md += f"*분석 모델: Google Gemini 2.5 Flash*\n\n"
+    md += f"*분석 일시: {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')}*\n"
+
+    return md
+
+
+def generate_error_markdown(
+    total_images: int,
+    processed_images: int,
+    failed_count: int,
+    skipped_count: int,
+    timed_out: bool
+) -> str:
+    """에러 상황에 대한 마크다운 생성"""
+    md = f"# 결함 분석 결과\n\n"
+    md += "❌ **분석 실패**: 모든 이미지 분석에 실패했습니다.\n\n"
+
+    if timed_out:
+        md += "⚠️ **원인**: 처리 시간 제한 (90초) 초과\n\n"
+
+    md += f"**상태 정보**:\n"
+    md += f"- 전체 이미지: {total_images}장\n"
+    md += f"- 처리 시도: {processed_images}장\n"
+    md += f"- 분석 실패: {failed_count}장\n"
+
+    if skipped_count > 0:
+        md += f"- 시간 초과로 미분석: {skipped_count}장\n"
+
+    md += "\n**권장 조치**:\n"
+    md += "1. 이미지 수를 줄여서 다시 시도해보세요 (권장: 10-20장)\n"
+    md += "2. 이미지 파일 크기를 확인해보세요 (권장: 5MB 이하)\n"
+    md += "3. S3 경로가 올바른지 확인해보세요\n\n"
+
+    md += "---\n\n"
+    md += f"*분석 일시: {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')}*\n"
+
+    return md
@@ -2,10 +2,11 @@
 Google Gemini API를 사용한 중고 물품 결함 분석 서비스 (최적화 버전)
 
 최적화 사항:
-- 이미지 리사이즈 (1200px + JPEG quality 85) → 비용 50% 절감
+- 이미지 리사이즈 (1200px + JPEG quality 85) → 비용 50% 절감 (전처리는 프로세스 풀, image_preprocess)
 - Gemini 1.5 Flash 사용 → Claude 대비 16배 저렴
 - 무료 티어 활용 → 월 1,500개 무료 분석
-- 프롬프트 캐싱 지원 → 비용 90% 절감 (2,048+ 토큰)
+- 명시적 컨텍스트 캐싱 (시스템 프롬프트 + Few-shot, TTL 자동 연장) → 입력 토큰 비용 절감
+- JSON 모드 (pydantic 응답 스키마) + 스트리밍 검증 → 잘못된 출력은 생성 도중 중단 후 재시도
 - Few-shot 프롬프트 → 정확도 10-15% 향상
 
 비용 비교 (이미지 1개 분석):
@@ -14,18 +15,68 @@ Google Gemini API를 사용한 중고 물품 결함 분석 서비스 (최적화
 - 절감: 약 94% (또는 100% 무료 티어)
 """
 import json
+import math
 import base64
-import boto3
-import unicodedata
-import io
+import hashlib
 import asyncio
-from typing import Optional
-from PIL import Image, ImageEnhance
+import time
+import httpx
+from typing import AsyncIterator, List, Optional, Union
 from google import genai
 from google.genai import types
+from pydantic import BaseModel
 
 from app.config import settings
-from app.schemas.inspection import Defect, InspectionResult
+from app.schemas.inspection import (
+    InspectionResponse,
+    InspectionResult,
+    MultiDescriptionResponse,
+    MultiInspectionResponse
+)
+from app.services.deadline_executor import inspection_latency
+from app.services.image_preprocess import image_preprocessor
+from app.services.prompt_cache import PromptCacheManager, is_cache_missing_error
+from app.services.rate_limiter import gemini_rate_limiter
+from app.services.structured_output import (
+    JsonPrefixValidator,
+    ModelT,
+    StructuredOutputError,
+    parse_structured,
+    record_structured_output
+)
+from app.utils.result_cache import get_result_cache, result_key
+from app.utils.metrics import (
+    GEMINI_CALL_SECONDS,
+    GEMINI_BATCH_IMAGES,
+    DESCRIPTION_FIRST_TEXT_SECONDS,
+    RESULT_CACHE_REQUESTS,
+    record_gemini_usage,
+    record_llm_cost,
+    record_provider_call
+)
+
+# 설명 생성 예상 토큰 (800px 이미지 2타일 + 프롬프트 + thoughts 포함 출력)
+DESCRIPTION_ESTIMATED_TOKENS = 516 + 200 + 1500
+# 다중 제품 설명: 제품 1개 추가당 (이미지 2타일 + 제품명 라벨 + 설명 출력)
+DESCRIPTION_EXTRA_TOKENS_PER_ITEM = 516 + 30 + 400
+
+def _record_usage(operation: str, response) -> None:
+    """토큰 메트릭/비용 기록 + 공용 rate limiter에 실제 사용량 반영"""
+    record_gemini_usage(operation, response)
+
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+
+    def count(field: str) -> int:
+        return getattr(usage, field, None) or 0
+
+    cached = count("cached_content_token_count")
+    output = count("candidates_token_count") + count("thoughts_token_count")
+    record_llm_cost("gemini", operation, settings.GEMINI_MODEL, count("prompt_token_count") - cached, output, cached)
+
+    if count("total_token_count"):
+        gemini_rate_limiter.record_usage(count("total_token_count"))
 
 
 def infer_category(product_name: Optional[str] = None, product_description: Optional[str] = None) -> str:
@@ -57,6 +108,68 @@ def infer_category(product_name: Optional[str] = None, product_description: Opti
     return "물품"  # 기본값
 
 
+def estimate_description_tokens(count: int = 1) -> int:
+    """설명 생성 호출 1회(제품 count개)의 예상 토큰 (rate limiter 예약용)"""
+    return DESCRIPTION_ESTIMATED_TOKENS + max(0, count - 1) * DESCRIPTION_EXTRA_TOKENS_PER_ITEM
+
+
+def description_fallback(product_name: str) -> str:
+    """설명을 만들지 못했을 때 돌려주는 기본 문구 (판매자가 직접 입력)"""
+    return f"{product_name} 제품입니다. 이미지를 확인하시고 제품의 상태와 특징을 직접 입력해주세요."
+
+
+def clean_description(text: str) -> str:
+    """앞뒤 공백과 설명 전체를 감싼 따옴표 제거"""
+    description = text.strip()
+    if description.startswith('"') and description.endswith('"'):
+        description = description[1:-1]
+    if description.startswith("'") and description.endswith("'"):
+        description = description[1:-1]
+    return description
+
+
+class DescriptionStreamCleaner:
+    """
+    스트리밍 조각에 clean_description을 즉석 적용
+
+    앞 공백과 여는 따옴표는 버리고, 끝의 공백/닫는 따옴표 후보는 다음 조각이
+    올 때까지 보류합니다. 최종 설명(finish)은 전체 텍스트에 clean_description을
+    적용한 값과 같습니다 (여는 따옴표만 있고 닫히지 않은 드문 경우 조각과 다를 수 있음).
+    """
+
+    def __init__(self):
+        self._raw: List[str] = []
+        self._started = False
+        self._open_quote: Optional[str] = None
+        self._held = ""
+
+    @property
+    def has_text(self) -> bool:
+        return self._started
+
+    def feed(self, text: str) -> str:
+        """원본 조각 → 지금 내보낼 수 있는 조각 (없으면 빈 문자열)"""
+        self._raw.append(text)
+        if not self._started:
+            text = text.lstrip()
+            if not text:
+                return ""
+            self._started = True
+            if text[0] in "\"'":
+                self._open_quote, text = text[0], text[1:]
+
+        text = self._held + text
+        cut = len(text.rstrip())
+        if self._open_quote and cut and text[cut - 1] == self._open_quote:
+            cut -= 1
+        self._held = text[cut:]
+        return text[:cut]
+
+    def finish(self) -> str:
+        """최종 설명 (clean_description(전체 텍스트))"""
+        return clean_description("".join(self._raw))
+
+
 class GeminiInspector:
     """
     Google Gemini 1.5 Flash를 사용한 이미지 결함 분석기 (비동기 + 최적화)
@@ -69,7 +182,7 @@ class GeminiInspector:
         )
     """
 
-    # 시스템 프롬프트 (Prompt Caching용 - 2,048+ 토큰 필요)
+    # 시스템 프롬프트 (컨텍스트 캐시로 생성 - 모델별 최소 토큰 미달 시 system_instruction 폴백)
     SYSTEM_PROMPT = """당신은 중고 거래 플랫폼의 전문 제품 검수 전문가입니다.
 
 ## 분석 목표
@@ -87,14 +200,12 @@ class GeminiInspector:
       "type": "스크래치",
       "severity": "중",
       "location": "우상단 모서리",
-      "description": "약 3cm 길이의 선형 스크래치",
-      "confidence": 0.92
+      "description": "약 3cm 길이의 선형 스크래치"
     }
   ],
   "overall_condition": "B",
   "recommended_price_adjustment": -15,
-  "analysis_confidence": 0.88,
-  "notes": "조명: 양호, 선명도: 높음"
+  "analysis_confidence": 0.88
 }
 
 ## Few-shot 예제
@@ -106,8 +217,7 @@ class GeminiInspector:
   "defects": [],
   "overall_condition": "S",
   "recommended_price_adjustment": 0,
-  "analysis_confidence": 0.95,
-  "notes": "새것 같은 상태, 사용감 없음"
+  "analysis_confidence": 0.95
 }
 
 ### 예제 2: 경미한 결함
@@ -119,14 +229,12 @@ class GeminiInspector:
       "type": "스크래치",
       "severity": "하",
       "location": "좌측 하단",
-      "description": "1cm 미만의 표면 스크래치, 눈에 잘 띄지 않음",
-      "confidence": 0.85
+      "description": "1cm 미만의 표면 스크래치, 눈에 잘 띄지 않음"
     }
   ],
   "overall_condition": "A",
   "recommended_price_adjustment": -5,
-  "analysis_confidence": 0.90,
-  "notes": "전체적으로 양호한 상태"
+  "analysis_confidence": 0.90
 }
 
 ### 예제 3: 중간 정도 결함
@@ -138,21 +246,18 @@ class GeminiInspector:
       "type": "얼룩",
       "severity": "중",
       "location": "앞면 중앙",
-      "description": "5cm 크기의 기름 얼룩",
-      "confidence": 0.88
+      "description": "5cm 크기의 기름 얼룩"
     },
     {
       "type": "찢어짐",
       "severity": "하",
       "location": "소매 끝",
-      "description": "1cm 작은 찢어짐",
-      "confidence": 0.75
+      "description": "1cm 작은 찢어짐"
     }
   ],
   "overall_condition": "C",
   "recommended_price_adjustment": -30,
-  "analysis_confidence": 0.85,
-  "notes": "여러 결함 존재, 재고정 가능"
+  "analysis_confidence": 0.85
 }
 
 ## 주의사항
@@ -162,9 +267,27 @@ class GeminiInspector:
 - recommended_price_adjustment는 -50 ~ 0 범위의 정수
 - analysis_confidence는 0.0 ~ 1.0 범위의 소수
 - JSON 형식으로만 응답하고, 추가 설명이나 마크다운은 사용하지 마세요
-- confidence는 각 결함의 확신도 (0.0~1.0)
 """
 
+    # 카테고리별 사용자 프롬프트 (단일 / 다중 이미지)
+    SINGLE_IMAGE_PROMPT = "이 {item_category} 이미지를 분석하여 결함을 감지하고 상태를 평가해주세요."
+    MULTI_IMAGE_PROMPT = (
+        "위 {count}개의 {item_category} 이미지를 각각 분석하여 결함을 감지하고 상태를 평가해주세요.\n"
+        "이미지마다 위 응답 형식의 JSON 객체를 만들고 \"index\"(1~{count})를 추가하여 "
+        "{{\"images\": [...]}} 형태의 JSON 하나로만 응답하세요. 모든 이미지를 빠짐없이 포함하세요."
+    )
+
+    # 모델별 (입력 컨텍스트, 최대 출력) 토큰 한도 - prefix 매칭
+    MODEL_LIMITS = {
+        "gemini-2.5": (1_048_576, 65_536),
+        "gemini-2.0": (1_048_576, 8_192),
+        "gemini-1.5": (1_048_576, 8_192),
+    }
+    DEFAULT_MODEL_LIMITS = (32_768, 8_192)
+
+    # 다중 이미지 모드: 이미지당 출력 토큰 추정치 (실제 사용량으로 갱신, 프로세스 공유)
+    _output_tokens_per_image: float = 400.0
+
     def __init__(self, api_key: Optional[str] = None):
         """
         Args:
@@ -174,120 +297,263 @@ class GeminiInspector:
         if not self.api_key:
             raise ValueError("Gemini API key is required. Set GEMINI_API_KEY in .env")
 
-        # Gemini 클라이언트 (동기 버전, async는 executor로 처리)
-        self.client = genai.Client(api_key=self.api_key)
+        # Gemini 클라이언트 (keep-alive 커넥션 풀, 비동기 호출은 client.aio)
+        self.client = genai.Client(api_key=self.api_key, http_options=self._http_options())
         self.model = settings.GEMINI_MODEL
 
-    def _optimize_image_for_gemini(
-        self,
-        image_bytes: bytes,
-        max_long_edge: int = 1200,
-        quality: int = 85
-    ) -> tuple[bytes, str]:
+        # 시스템 프롬프트 컨텍스트 캐시 (첫 검수 호출 시 생성)
+        self.prompt_cache = PromptCacheManager(
+            self.client,
+            self.model,
+            self.SYSTEM_PROMPT,
+            ttl_seconds=settings.GEMINI_PROMPT_CACHE_TTL_SECONDS,
+            refresh_seconds=settings.GEMINI_PROMPT_CACHE_REFRESH_SECONDS,
+            enabled=settings.GEMINI_PROMPT_CACHE_ENABLED
+        )
+
+    @staticmethod
+    def _http_options() -> types.HttpOptions:
+        """프로세스당 하나의 커넥션 풀 (TLS 핸드셰이크 재사용)"""
+        limits = httpx.Limits(
+            max_connections=settings.GEMINI_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.GEMINI_MAX_CONNECTIONS,
+            keepalive_expiry=settings.GEMINI_KEEPALIVE_SECONDS
+        )
+        return types.HttpOptions(
+            timeout=settings.GEMINI_TIMEOUT_SECONDS * 1000,  # ms
+            client_args={"limits": limits},
+            async_client_args={"limits": limits}
+        )
+
+    async def aclose(self) -> None:
+        """컨텍스트 캐시 삭제 + HTTP 커넥션 풀 정리 (app lifespan 종료 시)"""
+        await self.prompt_cache.close()
+        await self.client.aio.aclose()
+        self.client.close()
+
+    async def _load_s3_image_optimized(self, s3_path: str) -> tuple[bytes, str]:
         """
-        Gemini API 최적화를 위한 이미지 전처리
+        S3 이미지를 다운로드하고 최적화
 
-        최적화:
+        최적화 (image_preprocess, 프로세스 풀):
         1. 리사이즈 (1200px 긴 쪽 기준)
         2. 콘트라스트 향상 (스크래치 명확히)
         3. 샤프니스 증강 (세부 정보 강조)
         4. JPEG 품질 85 (비용 vs 정확도 균형)
 
         Args:
-            image_bytes: 원본 이미지 바이트
-            max_long_edge: 긴 쪽 최대 길이 (기본 1200px)
-            quality: JPEG 품질 (기본 85)
+            s3_path: S3 경로 (s3://bucket/key 또는 bucket/key)
 
         Returns:
             (최적화된 이미지 바이트, media_type)
         """
-        try:
-            img = Image.open(io.BytesIO(image_bytes))
+        # 공유 캐시 read-through
+        optimized_bytes = await image_preprocessor.load(s3_path, "inspect_1200.jpg")
+        media_type = 'image/jpeg'
 
-            # 1. 콘트라스트 향상 (결함 더 명확히)
-            enhancer = ImageEnhance.Contrast(img)
-            img = enhancer.enhance(1.2)
+        return optimized_bytes, media_type
 
-            # 2. 샤프니스 증강 (세부 정보 강조)
-            enhancer = ImageEnhance.Sharpness(img)
-            img = enhancer.enhance(1.1)
+    def _generation_config(
+        self,
+        max_output_tokens: int,
+        response_schema: type[BaseModel],
+        cached_content: Optional[str] = None
+    ) -> types.GenerateContentConfig:
+        """
+        결함 분석 공통 설정 (시스템 프롬프트 + 안전 필터 + JSON 응답 스키마)
 
-            # 3. 긴 쪽이 max_long_edge를 초과하면 리사이즈
-            if max(img.size) > max_long_edge:
-                ratio = max_long_edge / max(img.size)
-                new_size = tuple(int(s * ratio) for s in img.size)
-                img = img.resize(new_size, Image.Resampling.LANCZOS)
+        cached_content가 있으면 시스템 프롬프트는 캐시에 포함되어 있으므로
+        system_instruction을 보내지 않습니다 (함께 보내면 API 오류).
+        """
+        return types.GenerateContentConfig(
+            temperature=0.1,  # 일관성 있는 결과
+            max_output_tokens=max_output_tokens,  # 출력 제한 (비용 절감)
+            # JSON 모드: pydantic 모델에서 만든 스키마로만 출력 (마크다운 래퍼 없음)
+            response_mime_type="application/json",
+            response_schema=response_schema,
+            # 안전 필터 완화 (제품 이미지)
+            safety_settings=[
+                types.SafetySetting(
+                    category='HARM_CATEGORY_SEXUALLY_EXPLICIT',
+                    threshold='BLOCK_ONLY_HIGH'
+                ),
+                types.SafetySetting(
+                    category='HARM_CATEGORY_DANGEROUS_CONTENT',
+                    threshold='BLOCK_ONLY_HIGH'
+                ),
+                types.SafetySetting(
+                    category='HARM_CATEGORY_HATE_SPEECH',
+                    threshold='BLOCK_ONLY_HIGH'
+                ),
+                types.SafetySetting(
+                    category='HARM_CATEGORY_HARASSMENT',
+                    threshold='BLOCK_ONLY_HIGH'
+                )
+            ],
+            cached_content=cached_content,
+            # 시스템 지시사항 (캐시를 쓸 수 없을 때만)
+            system_instruction=None if cached_content else types.Content(
+                parts=[
+                    types.Part(
+                        text=self.SYSTEM_PROMPT
+                    )
+                ]
+            )
+        )
 
-            # 4. RGB 변환 (RGBA → RGB for JPEG)
-            if img.mode in ('RGBA', 'LA', 'P'):
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                if img.mode == 'P':
-                    img = img.convert('RGBA')
-                background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
-                img = background
+    async def _stream_structured(
+        self,
+        operation: str,
+        contents: list,
+        config: types.GenerateContentConfig
+    ) -> tuple[str, Optional[types.GenerateContentResponse]]:
+        """
+        스트리밍 호출 + 청크마다 JSON 접두어 검사
 
-            # 5. JPEG 품질 최적화
-            buffer = io.BytesIO()
-            img.save(buffer, format='JPEG', quality=quality, optimize=True)
+        JSON이 될 수 없는 출력이 보이면 그 자리에서 스트림을 닫고
+        StructuredOutputError를 던집니다 (남은 출력 토큰을 기다리지 않음).
 
-            return buffer.getvalue(), 'image/jpeg'
+        Returns:
+            (전체 JSON 텍스트, 마지막 청크 - usage_metadata 포함)
+        """
+        validator = JsonPrefixValidator()
+        last = None
+        # 실제 API 호출 시간만 라우터에 보고 (rate limiter 대기/결과 캐시 제외)
+        call_start = time.perf_counter()
+        elapsed = None
+        try:
+            stream = await self.client.aio.models.generate_content_stream(
+                model=self.model,
+                contents=contents,
+                config=config
+            )
+            try:
+                async for chunk in stream:
+                    last = chunk
+                    text = chunk.text
+                    if text:
+                        validator.feed(text)
+            except StructuredOutputError:
+                record_structured_output("gemini", operation, "stream")
+                raise
+            finally:
+                aclose = getattr(stream, "aclose", None)
+                if aclose is not None:
+                    await aclose()
+                if last is not None:
+                    _record_usage(operation, last)
+            elapsed = time.perf_counter() - call_start
+        finally:
+            record_provider_call(elapsed)
 
-        except Exception as e:
-            # 최적화 실패 시 원본 반환
-            print(f"Image optimization failed: {e}, using original")
-            return image_bytes, 'image/jpeg'
+        try:
+            return validator.finish(), last
+        except StructuredOutputError:
+            record_structured_output("gemini", operation, "truncated")
+            raise
 
-    def _load_s3_image_optimized(self, s3_path: str) -> tuple[bytes, str]:
+    async def _generate_inspection(
+        self,
+        operation: str,
+        contents: list,
+        max_output_tokens: int,
+        response_schema: type[ModelT],
+        image_count: int = 1
+    ) -> tuple[ModelT, str, Optional[types.GenerateContentResponse]]:
         """
-        S3 이미지를 다운로드하고 최적화
+        결함 분석 호출 (JSON 모드 + 스트리밍 검증)
 
-        Args:
-            s3_path: S3 경로 (s3://bucket/key 또는 bucket/key)
+        - 컨텍스트 캐시 참조, 캐시가 만료/삭제됐으면 1회 폴백 재시도
+        - 잘못된 JSON/스키마 위반은 STRUCTURED_OUTPUT_RETRIES회까지 재시도
+          (출력 한도로 잘린 응답은 재시도하지 않음 - 호출부가 이미지 수를 줄여 처리)
+        - 호출 시간은 마감 기반 실행기의 지연 예측(inspection_latency)에 반영
 
         Returns:
-            (최적화된 이미지 바이트, media_type)
+            (검증된 응답 모델, 원본 JSON 텍스트, 마지막 응답 청크)
         """
-        # S3 경로 파싱
-        if s3_path.startswith('s3://'):
-            s3_path = s3_path[5:]
-
-        parts = s3_path.split('/', 1)
-        bucket = parts[0]
-        key = parts[1] if len(parts) > 1 else ''
-
-        # 한글 파일명 정규화 (NFC 통일 - cross-platform)
-        key = unicodedata.normalize('NFC', key)
-
-        # S3에서 이미지 다운로드
-        s3 = boto3.client('s3')
-        response = s3.get_object(Bucket=bucket, Key=key)
-        image_bytes = response['Body'].read()
+        attempt = 0
+        while True:
+            cache_name = await self.prompt_cache.get()
+            call_start = time.perf_counter()
+            try:
+                try:
+                    raw_text, last = await self._stream_structured(
+                        operation, contents,
+                        self._generation_config(max_output_tokens, response_schema, cached_content=cache_name)
+                    )
+                except Exception as e:
+                    if isinstance(e, StructuredOutputError) or cache_name is None or not is_cache_missing_error(e):
+                        raise
+                    print(f"Prompt cache {cache_name} no longer available ({e}), retrying without cache")
+                    self.prompt_cache.invalidate(cache_name)
+                    raw_text, last = await self._stream_structured(
+                        operation, contents, self._generation_config(max_output_tokens, response_schema)
+                    )
+                parsed = parse_structured(raw_text, response_schema, "gemini", operation)
+            except StructuredOutputError as e:
+                attempt += 1
+                if not e.retryable or attempt > settings.STRUCTURED_OUTPUT_RETRIES:
+                    raise
+                print(f"Malformed {operation} output ({e}), retrying ({attempt}/{settings.STRUCTURED_OUTPUT_RETRIES})")
+                continue
+
+            elapsed = time.perf_counter() - call_start
+            GEMINI_CALL_SECONDS.labels(operation).observe(elapsed)
+            inspection_latency.observe(image_count, elapsed)
+            return parsed, raw_text, last
+
+    @staticmethod
+    def _to_inspection_result(parsed: InspectionResponse, raw_text: str) -> InspectionResult:
+        """검증된 응답 모델 → InspectionResult"""
+        return InspectionResult(
+            defects=parsed.defects,
+            overall_condition=parsed.overall_condition,
+            recommended_price_adjustment=parsed.recommended_price_adjustment,
+            analysis_confidence=parsed.analysis_confidence,
+            raw_response=raw_text
+        )
 
-        # 이미지 최적화 (1200px + JPEG quality 85 + 전처리)
-        optimized_bytes, media_type = self._optimize_image_for_gemini(image_bytes)
+    async def load_images(self, s3_paths: List[str]) -> List[Union[tuple[bytes, str], Exception]]:
+        """이미지 병렬 로드 (S3 GET과 전처리가 이미지별로 겹쳐 진행, 공유 캐시), 실패한 이미지는 Exception"""
+        return await asyncio.gather(
+            *[self._load_s3_image_optimized(path) for path in s3_paths],
+            return_exceptions=True
+        )
 
-        return optimized_bytes, media_type
+    @classmethod
+    def prompt_version(cls, item_category: str = "물품") -> str:
+        """결과 캐시 키용 프롬프트 버전 (시스템/사용자 프롬프트, 응답 스키마가 바뀌면 달라짐)"""
+        prompt = "\n".join([
+            cls.SYSTEM_PROMPT, cls.SINGLE_IMAGE_PROMPT, cls.MULTI_IMAGE_PROMPT, item_category,
+            json.dumps(MultiInspectionResponse.model_json_schema(), sort_keys=True)
+        ])
+        return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
 
-    def analyze_image(
+    async def analyze_image(
         self,
         s3_path: str,
-        item_category: str = "물품"
+        item_category: str = "물품",
+        image: Optional[tuple[bytes, str]] = None
     ) -> InspectionResult:
         """
-        이미지를 분석하여 결함 정보 추출 (동기 버전, async wrapper에서 호출)
+        이미지를 분석하여 결함 정보 추출 (비동기, client.aio)
 
         Args:
             s3_path: S3 이미지 경로 (s3://bucket/key 형식)
             item_category: 물품 카테고리 (기본: "물품")
+            image: 이미 로드한 (이미지 바이트, media_type) - 없으면 S3에서 로드
 
         Returns:
             InspectionResult: 분석 결과
 
         Raises:
+            StructuredOutputError: 재시도 후에도 스키마에 맞는 응답을 받지 못한 경우
             Exception: API 호출 실패 시
         """
-        # S3 이미지 로드 및 최적화
-        image_bytes, media_type = self._load_s3_image_optimized(s3_path)
+        # S3 이미지 로드 및 최적화 (전처리는 프로세스 풀)
+        if image is None:
+            image = await self._load_s3_image_optimized(s3_path)
+        image_bytes, media_type = image
 
         # Gemini API용 이미지 Part 생성
         image_part = types.Part.from_bytes(
@@ -296,199 +562,238 @@ class GeminiInspector:
         )
 
         # 사용자 프롬프트 (카테고리별 커스터마이징)
-        user_prompt = f"이 {item_category} 이미지를 분석하여 결함을 감지하고 상태를 평가해주세요."
+        user_prompt = self.SINGLE_IMAGE_PROMPT.format(item_category=item_category)
 
-        # Gemini API 호출 (프롬프트 캐싱 포함)
-        response = self.client.models.generate_content(
-            model=self.model,
-            contents=[image_part, user_prompt],
-            config=types.GenerateContentConfig(
-                temperature=0.1,  # 일관성 있는 결과
-                max_output_tokens=800,  # 출력 제한 (비용 절감)
-                # 안전 필터 완화 (제품 이미지)
-                safety_settings=[
-                    types.SafetySetting(
-                        category='HARM_CATEGORY_SEXUALLY_EXPLICIT',
-                        threshold='BLOCK_ONLY_HIGH'
-                    ),
-                    types.SafetySetting(
-                        category='HARM_CATEGORY_DANGEROUS_CONTENT',
-                        threshold='BLOCK_ONLY_HIGH'
-                    ),
-                    types.SafetySetting(
-                        category='HARM_CATEGORY_HATE_SPEECH',
-                        threshold='BLOCK_ONLY_HIGH'
-                    ),
-                    types.SafetySetting(
-                        category='HARM_CATEGORY_HARASSMENT',
-                        threshold='BLOCK_ONLY_HIGH'
-                    )
-                ],
-                # 시스템 지시사항 (프롬프트 캐싱)
-                system_instruction=types.Content(
-                    parts=[
-                        types.Part(
-                            text=self.SYSTEM_PROMPT
-                        )
-                    ]
-                )
-            )
+        # Gemini API 호출 (시스템 프롬프트 컨텍스트 캐시 참조, JSON 모드)
+        parsed, raw_text, _ = await self._generate_inspection(
+            "analyze_image", [image_part, user_prompt], settings.GEMINI_MAX_TOKENS, InspectionResponse
         )
 
-        # 응답 추출 (Gemini 2.x 응답 구조 처리)
-        try:
-            if hasattr(response, 'text') and response.text is not None:
-                raw_text = response.text
-            elif hasattr(response, 'candidates') and response.candidates and len(response.candidates) > 0:
-                # Gemini 2.x 구조: candidates[0].content.parts[0].text
-                if response.candidates[0].content and response.candidates[0].content.parts:
-                    raw_text = response.candidates[0].content.parts[0].text
-                else:
-                    raise ValueError("No content in Gemini response candidates")
-            else:
-                raise ValueError(f"Unexpected Gemini response structure: {response}")
-        except (AttributeError, IndexError, TypeError) as e:
-            raise ValueError(f"Failed to extract text from Gemini response: {e}, response: {response}")
-
-        # JSON 추출 및 파싱
-        json_text = self._extract_json(raw_text)
-        result_data = self._parse_json_with_fallback(json_text, raw_text)
-
-        # Defect 객체 생성
-        defects = [
-            Defect(**defect_data)
-            for defect_data in result_data.get('defects', [])
-        ]
-
-        # InspectionResult 생성
-        return InspectionResult(
-            defects=defects,
-            overall_condition=result_data.get('overall_condition', 'C'),
-            recommended_price_adjustment=result_data.get('recommended_price_adjustment', -20),
-            analysis_confidence=result_data.get('analysis_confidence', 0.8),
-            raw_response=raw_text
-        )
+        return self._to_inspection_result(parsed, raw_text)
 
-    def _extract_json(self, raw_text: str) -> str:
-        """JSON 추출 (마크다운 태그 제거)"""
-        json_text = raw_text.strip()
+    # ---- 다중 이미지 모드 (제품 단위 1회 호출) ----
 
-        # ```json``` 태그 제거
-        if '```json' in json_text:
-            json_text = json_text.split('```json')[1].split('```')[0].strip()
-        elif '```' in json_text:
-            json_text = json_text.split('```')[1].split('```')[0].strip()
+    @classmethod
+    def model_limits(cls, model: str) -> tuple[int, int]:
+        """모델별 (입력 컨텍스트, 최대 출력) 토큰 한도"""
+        for prefix, limits in cls.MODEL_LIMITS.items():
+            if model.startswith(prefix):
+                return limits
+        return cls.DEFAULT_MODEL_LIMITS
 
-        return json_text
+    @staticmethod
+    def estimate_image_tokens(width: int, height: int) -> int:
+        """
+        이미지 입력 토큰 추정 (Gemini 2.x 기준)
 
-    def _parse_json_with_fallback(self, json_text: str, raw_text: str) -> dict:
-        """JSON 파싱 (실패 시 폴백)"""
-        try:
-            return json.loads(json_text)
-        except json.JSONDecodeError as e:
-            print(f"JSON parsing failed: {e}")
-            print(f"Raw response: {raw_text[:200]}...")
+        양변 384px 이하: 258 토큰, 그 이상은 768x768 타일당 258 토큰
+        """
+        if width <= 384 and height <= 384:
+            return 258
+        return 258 * math.ceil(width / 768) * math.ceil(height / 768)
 
-            # 폴백: 기본값 반환
-            return {
-                "defects": [],
-                "overall_condition": "C",
-                "recommended_price_adjustment": -20,
-                "analysis_confidence": 0.5,
-                "notes": "JSON 파싱 실패, 기본값 사용"
-            }
+    @classmethod
+    def chunk_size(cls, model: Optional[str] = None, max_long_edge: int = 1200) -> int:
+        """
+        한 번의 generate_content 호출에 넣을 이미지 수
 
+        입력 컨텍스트 한도, 출력 한도(이미지당 출력 토큰은 실제 사용량의
+        EWMA로 갱신), GEMINI_BATCH_MAX_IMAGES 중 가장 작은 값
+        """
+        context_limit, output_limit = cls.model_limits(model or settings.GEMINI_MODEL)
+
+        # 최악의 경우 (긴 쪽 max_long_edge, 4:3) 기준 입력 토큰
+        image_tokens = cls.estimate_image_tokens(max_long_edge, max_long_edge * 3 // 4) + 16
+        prompt_tokens = len(cls.SYSTEM_PROMPT) + 512  # 한글 ≈ 1자 1토큰 이하로 보수적 추정
+        by_input = (context_limit - prompt_tokens) // image_tokens
+
+        output_budget = min(output_limit, settings.GEMINI_BATCH_MAX_OUTPUT_TOKENS) - settings.GEMINI_THINKING_RESERVE
+        by_output = int(output_budget // cls._output_tokens_per_image)
+
+        return max(1, min(settings.GEMINI_BATCH_MAX_IMAGES, by_input, by_output))
+
+    @classmethod
+    def estimate_call_tokens(cls, image_count: int = 1, max_long_edge: int = 1200) -> int:
+        """검수 호출 1회의 예상 토큰 (rate limiter 예약용, 입력 + 출력)"""
+        image_tokens = cls.estimate_image_tokens(max_long_edge, max_long_edge * 3 // 4) + 16
+        prompt_tokens = len(cls.SYSTEM_PROMPT) + 512
+        if image_count == 1:
+            return prompt_tokens + image_tokens + settings.GEMINI_MAX_TOKENS
+        return int(prompt_tokens + image_count * (image_tokens + cls._output_tokens_per_image))
+
+    def _update_output_estimate(self, response, image_count: int) -> None:
+        """이미지당 출력 토큰 EWMA 갱신 (thoughts 제외)"""
+        usage = getattr(response, "usage_metadata", None)
+        output_tokens = getattr(usage, "candidates_token_count", None) if usage else None
+        if output_tokens and image_count:
+            observed = output_tokens / image_count * 1.5  # 결함이 많은 이미지 대비 여유분
+            GeminiInspector._output_tokens_per_image = max(
+                100.0, 0.7 * GeminiInspector._output_tokens_per_image + 0.3 * observed
+            )
 
-# 간편 비동기 함수
-async def analyze_defects(
-    s3_path: str,
-    item_category: str = "물품",
-    api_key: Optional[str] = None
-) -> InspectionResult:
-    """
-    이미지 결함 분석 (비동기 간편 함수)
+    async def analyze_images(
+        self,
+        s3_paths: List[str],
+        item_category: str = "물품",
+        images: Optional[List[Union[tuple[bytes, str], Exception]]] = None
+    ) -> List[Union[InspectionResult, Exception]]:
+        """
+        여러 이미지를 한 번의 호출로 분석 (제품 단위 검수)
 
-    Gemini API는 동기 전용이므로 asyncio.to_thread로 비동기 처리
+        이미지마다 "이미지 N" 라벨을 붙여 보내고, MultiInspectionResponse 스키마
+        ({"images": [{"index": N, ...}]})의 단일 JSON 응답을 받아 이미지별 결과로
+        나눕니다. 응답이 잘리거나 재시도 후에도 스키마에 맞지 않으면
+        (StructuredOutputError) 절반으로 나눠 재시도하고, 1장이 남으면 단일 이미지
+        모드(analyze_image)로 처리합니다. 그 밖의 오류(429, 5xx, 인증, 타임아웃,
+        네트워크)는 프로바이더 장애이므로 나누지 않고 그대로 던집니다
+        (InspectorRouter가 바로 헤지/차단기 판단).
 
-    Args:
-        s3_path: S3 이미지 경로
-        item_category: 물품 카테고리
-        api_key: Gemini API 키
+        Args:
+            s3_paths: S3 이미지 경로 리스트 (chunk_size() 이하 권장)
+            item_category: 물품 카테고리
+            images: 이미 로드한 이미지 (load_images() 결과, s3_paths와 같은 순서)
 
-    Returns:
-        InspectionResult: 분석 결과
-    """
-    import asyncio
+        Returns:
+            s3_paths와 같은 순서의 결과 리스트 (실패한 이미지는 Exception)
+        """
+        # 이미지 병렬 로드 (S3 + 전처리, 공유 캐시)
+        loaded = images if images is not None else await self.load_images(s3_paths)
+
+        if len(s3_paths) == 1:
+            if isinstance(loaded[0], Exception):
+                return [loaded[0]]
+            try:
+                return [await self.analyze_image(s3_paths[0], item_category, image=loaded[0])]
+            except StructuredOutputError as e:
+                # 이 이미지만 실패 (프로바이더 오류는 그대로 전파)
+                return [e]
+
+        results: List[Union[InspectionResult, Exception, None]] = [
+            item if isinstance(item, Exception) else None for item in loaded
+        ]
+        indices = [i for i, item in enumerate(loaded) if not isinstance(item, Exception)]
+        if not indices:
+            return results
+
+        contents = []
+        for n, i in enumerate(indices, 1):
+            image_bytes, media_type = loaded[i]
+            contents.append(f"이미지 {n}:")
+            contents.append(types.Part.from_bytes(data=image_bytes, mime_type=media_type))
+        contents.append(self.MULTI_IMAGE_PROMPT.format(count=len(indices), item_category=item_category))
+
+        max_output_tokens = min(
+            settings.GEMINI_BATCH_MAX_OUTPUT_TOKENS,
+            self.model_limits(self.model)[1],
+            settings.GEMINI_THINKING_RESERVE + int(GeminiInspector._output_tokens_per_image * len(indices) * 2)
+        )
 
-    inspector = GeminiInspector(api_key=api_key)
+        try:
+            parsed, _, last = await self._generate_inspection(
+                "analyze_images", contents, max_output_tokens, MultiInspectionResponse, image_count=len(indices)
+            )
+            GEMINI_BATCH_IMAGES.observe(len(indices))
+            self._update_output_estimate(last, len(indices))
+        except StructuredOutputError as e:
+            # 잘린 응답/재시도 후에도 스키마 위반 → 절반씩 재시도 (프로바이더 오류는 그대로 전파)
+            print(f"Multi-image analysis failed for {len(indices)} images ({e}), splitting")
+            paths = [s3_paths[i] for i in indices]
+            kept = [loaded[i] for i in indices]
+            half = len(paths) // 2
+            retried = await self.analyze_images(paths[:half], item_category, kept[:half]) + \
+                await self.analyze_images(paths[half:], item_category, kept[half:])
+            for i, result in zip(indices, retried):
+                results[i] = result
+            return results
+
+        for item in parsed.images:
+            n = item.index
+            if n <= len(indices) and results[indices[n - 1]] is None:
+                raw_item = item.model_dump_json(exclude={"index"})
+                results[indices[n - 1]] = self._to_inspection_result(item, raw_item)
+
+        return [
+            result if result is not None else ValueError(f"No result for image in multi-image response: {path}")
+            for path, result in zip(s3_paths, results)
+        ]
 
-    # 동기 함수를 비동기로 실행 (블로킹 방지)
-    result = await asyncio.to_thread(
-        inspector.analyze_image,
-        s3_path=s3_path,
-        item_category=item_category
+    # 설명 생성 프롬프트 (단일 / 다중 제품)
+    DESCRIPTION_PROMPT = (
+        "{product_name} 제품을 보고 중고 거래 플랫폼 판매자 관점에서 객관적이고 사실적인 설명을 "
+        "한 문단(3-5문장)으로 작성해주세요. 색상, 재질, 상태, 사용감 등을 담백하게 기술하세요."
+    )
+    MULTI_DESCRIPTION_PROMPT = (
+        "위 {count}개 제품 각각에 대해, 해당 이미지만 보고 중고 거래 플랫폼 판매자 관점에서 "
+        "객관적이고 사실적인 설명을 한 문단(3-5문장)으로 작성해주세요. 색상, 재질, 상태, 사용감 등을 "
+        "담백하게 기술하세요. 제품마다 \"index\"(1~{count})와 \"description\"을 담아 "
+        "{{\"descriptions\": [...]}} 형태의 JSON 하나로만 응답하고, 모든 제품을 빠짐없이 포함하세요."
     )
 
-    return result
-
+    @classmethod
+    def description_prompt_version(cls, product_name: str) -> str:
+        """설명 캐시 키용 프롬프트 버전 (프롬프트/응답 스키마/제품명이 바뀌면 달라짐)"""
+        prompt = "\n".join([
+            "description", cls.DESCRIPTION_PROMPT, cls.MULTI_DESCRIPTION_PROMPT, product_name,
+            json.dumps(MultiDescriptionResponse.model_json_schema(), sort_keys=True)
+        ])
+        return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def _description_config(
+        max_output_tokens: int,
+        response_schema: Optional[type[BaseModel]] = None
+    ) -> types.GenerateContentConfig:
+        """설명 생성 설정 (response_schema가 있으면 JSON 모드)"""
+        return types.GenerateContentConfig(
+            temperature=0.7,  # 약간의 창의성 허용
+            max_output_tokens=max_output_tokens,  # Gemini 2.5의 thoughts 토큰 고려하여 충분히 크게
+            top_p=0.9,
+            response_mime_type="application/json" if response_schema else None,
+            response_schema=response_schema,
+            # 안전 필터 완화 (제품 이미지)
+            safety_settings=[
+                types.SafetySetting(
+                    category='HARM_CATEGORY_SEXUALLY_EXPLICIT',
+                    threshold='BLOCK_ONLY_HIGH'
+                ),
+                types.SafetySetting(
+                    category='HARM_CATEGORY_DANGEROUS_CONTENT',
+                    threshold='BLOCK_ONLY_HIGH'
+                ),
+                types.SafetySetting(
+                    category='HARM_CATEGORY_HATE_SPEECH',
+                    threshold='BLOCK_ONLY_HIGH'
+                ),
+                types.SafetySetting(
+                    category='HARM_CATEGORY_HARASSMENT',
+                    threshold='BLOCK_ONLY_HIGH'
+                )
+            ]
+        )
 
-async def generate_product_description(
-    s3_path: str,
-    product_name: str,
-    api_key: Optional[str] = None
-) -> str:
-    """
-    제품 이미지를 보고 판매자 스타일의 제품 설명 생성 (비동기)
+    async def load_description_image(self, s3_path: str) -> bytes:
+        """S3 이미지 로드 + 800px 리사이즈, JPEG 70 (공유 캐시 read-through)"""
+        return await image_preprocessor.load(s3_path, "desc_800.jpg")
 
-    Gemini API는 동기 전용이므로 asyncio.to_thread로 비동기 처리
+    async def generate_description(
+        self,
+        s3_path: str,
+        product_name: str,
+        image: Optional[bytes] = None
+    ) -> str:
+        """
+        제품 이미지를 보고 판매자 스타일의 제품 설명 생성 (비동기, client.aio)
 
-    Args:
-        s3_path: S3 이미지 경로 (s3://bucket/key)
-        product_name: 제품명
-        api_key: Gemini API 키
+        Args:
+            s3_path: S3 이미지 경로 (s3://bucket/key)
+            product_name: 제품명
+            image: 이미 로드한 800px 이미지 바이트 (없으면 S3에서 로드)
 
-    Returns:
-        str: AI 생성 제품 설명 (한 문단)
-    """
-    import asyncio
-    import unicodedata
-
-    if api_key is None:
-        api_key = settings.GEMINI_API_KEY
-
-    # Gemini 클라이언트 초기화
-    client = genai.Client(api_key=api_key)
-
-    # 동기 함수를 비동기로 실행
-    def _generate():
-        # 1. S3 이미지 다운로드
-        # S3 경로 파싱
-        path = s3_path.replace("s3://", "") if s3_path.startswith("s3://") else s3_path
-        bucket, key = path.split("/", 1)
-
-        # 한글 파일명 정규화
-        key = unicodedata.normalize('NFC', key)
-
-        # S3에서 다운로드
-        s3 = boto3.client('s3')
-        response = s3.get_object(Bucket=bucket, Key=key)
-        image_bytes = response['Body'].read()
-
-        # 2. 이미지 리사이즈 (비용 절감 + 토큰 절약)
-        img = Image.open(io.BytesIO(image_bytes))
-        if img.mode in ('RGBA', 'LA', 'P'):
-            img = img.convert('RGB')
-
-        # Description 생성은 고해상도가 필요 없으므로 작게
-        max_size = 800
-        if max(img.size) > max_size:
-            ratio = max_size / max(img.size)
-            new_size = tuple(int(dim * ratio) for dim in img.size)
-            img = img.resize(new_size, Image.Resampling.LANCZOS)
-
-        buffer = io.BytesIO()
-        img.save(buffer, format='JPEG', quality=70, optimize=True)
-        optimized_bytes = buffer.getvalue()
+        Returns:
+            str: AI 생성 제품 설명 (한 문단)
+        """
+        # 1-2. S3 이미지 로드 + 800px 리사이즈 (공유 캐시 read-through)
+        optimized_bytes = image if image is not None else await self.load_description_image(s3_path)
 
         # 3. Gemini API용 이미지 Part 생성
         image_part = types.Part.from_bytes(
@@ -497,37 +802,17 @@ async def generate_product_description(
         )
 
         # 4. 프롬프트 작성 (판매자 스타일)
-        user_prompt = f"""{product_name} 제품을 보고 중고 거래 플랫폼 판매자 관점에서 객관적이고 사실적인 설명을 한 문단(3-5문장)으로 작성해주세요. 색상, 재질, 상태, 사용감 등을 담백하게 기술하세요."""
+        user_prompt = self.DESCRIPTION_PROMPT.format(product_name=product_name)
 
         # 5. Gemini API 호출
-        response = client.models.generate_content(
+        call_start = time.perf_counter()
+        response = await self.client.aio.models.generate_content(
             model=settings.GEMINI_MODEL,
             contents=[image_part, user_prompt],
-            config=types.GenerateContentConfig(
-                temperature=0.7,  # 약간의 창의성 허용
-                max_output_tokens=2000,  # Gemini 2.5의 thoughts 토큰 고려하여 충분히 크게
-                top_p=0.9,
-                # 안전 필터 완화 (제품 이미지)
-                safety_settings=[
-                    types.SafetySetting(
-                        category='HARM_CATEGORY_SEXUALLY_EXPLICIT',
-                        threshold='BLOCK_ONLY_HIGH'
-                    ),
-                    types.SafetySetting(
-                        category='HARM_CATEGORY_DANGEROUS_CONTENT',
-                        threshold='BLOCK_ONLY_HIGH'
-                    ),
-                    types.SafetySetting(
-                        category='HARM_CATEGORY_HATE_SPEECH',
-                        threshold='BLOCK_ONLY_HIGH'
-                    ),
-                    types.SafetySetting(
-                        category='HARM_CATEGORY_HARASSMENT',
-                        threshold='BLOCK_ONLY_HIGH'
-                    )
-                ]
-            )
+            config=self._description_config(max_output_tokens=2000)
         )
+        GEMINI_CALL_SECONDS.labels("generate_description").observe(time.perf_counter() - call_start)
+        _record_usage("generate_description", response)
 
         # 6. 응답 파싱 (fallback 포함)
         try:
@@ -543,30 +828,306 @@ async def generate_product_description(
                         raw_text = candidate.content.parts[0].text
                     else:
                         # Fallback: 기본 응답 반환
-                        return f"{product_name} 제품입니다. 이미지를 확인하시고 제품의 상태와 특징을 직접 입력해주세요."
+                        return description_fallback(product_name)
                 elif candidate.content and hasattr(candidate.content, 'parts') and candidate.content.parts:
                     raw_text = candidate.content.parts[0].text
                 else:
                     # Fallback: 기본 응답 반환
-                    return f"{product_name} 제품입니다. 이미지를 확인하시고 제품의 상태와 특징을 직접 입력해주세요."
+                    return description_fallback(product_name)
             else:
                 # Fallback: 기본 응답 반환
-                return f"{product_name} 제품입니다. 이미지를 확인하시고 제품의 상태와 특징을 직접 입력해주세요."
+                return description_fallback(product_name)
         except Exception as e:
             # 모든 에러 시 fallback 응답
             print(f"WARNING: Gemini API error, using fallback: {e}")
-            return f"{product_name} 제품입니다. 이미지를 확인하시고 제품의 상태와 특징을 직접 입력해주세요."
-
-        description = raw_text.strip()
+            return description_fallback(product_name)
 
         # 7. 불필요한 따옴표 제거
-        if description.startswith('"') and description.endswith('"'):
-            description = description[1:-1]
-        if description.startswith("'") and description.endswith("'"):
-            description = description[1:-1]
+        return clean_description(raw_text)
+
+    async def open_description_stream(
+        self,
+        product_name: str,
+        image: bytes
+    ) -> tuple[AsyncIterator[str], Optional[str]]:
+        """
+        설명 스트리밍 시작 (generate_content_stream)
+
+        요청 전송과 첫 조각 수신까지 기다렸다가 반환하므로, 429 등 요청 오류는
+        여기서 발생합니다 (rate limiter가 재시도할 수 있도록).
+
+        Returns:
+            (나머지 텍스트 조각 스트림, 첫 텍스트 조각 - 응답이 비었으면 None)
+        """
+        user_prompt = self.DESCRIPTION_PROMPT.format(product_name=product_name)
+        call_start = time.perf_counter()
+        stream = await self.client.aio.models.generate_content_stream(
+            model=settings.GEMINI_MODEL,
+            contents=[types.Part.from_bytes(data=image, mime_type="image/jpeg"), user_prompt],
+            config=self._description_config(max_output_tokens=2000)
+        )
+
+        async def _texts():
+            last = None
+            try:
+                async for chunk in stream:
+                    last = chunk
+                    if chunk.text:
+                        yield chunk.text
+            finally:
+                aclose = getattr(stream, "aclose", None)
+                if aclose is not None:
+                    await aclose()
+                GEMINI_CALL_SECONDS.labels("stream_description").observe(time.perf_counter() - call_start)
+                if last is not None:
+                    _record_usage("stream_description", last)
+
+        texts = _texts()
+        try:
+            first = await texts.__anext__()
+        except StopAsyncIteration:
+            first = None
+        except BaseException:
+            await texts.aclose()
+            raise
+        return texts, first
+
+    async def generate_descriptions(self, items: List[tuple[bytes, str]]) -> List[Union[str, Exception]]:
+        """
+        여러 제품의 설명을 한 번의 호출로 생성 (설명 마이크로 배치용)
+
+        제품마다 "제품 N: 제품명" 라벨과 800px 이미지를 보내고, MultiDescriptionResponse
+        스키마의 JSON 하나로 받습니다. 제품이 1개면 generate_description과 같은 호출입니다.
+
+        Args:
+            items: (800px 이미지 바이트, 제품명) 리스트
+
+        Returns:
+            items와 같은 순서의 설명 리스트 (응답에서 빠진 제품은 Exception)
+        """
+        if len(items) == 1:
+            image, product_name = items[0]
+            return [await self.generate_description("", product_name, image=image)]
+
+        contents = []
+        for n, (image, product_name) in enumerate(items, 1):
+            contents.append(f"제품 {n}: {product_name}")
+            contents.append(types.Part.from_bytes(data=image, mime_type="image/jpeg"))
+        contents.append(self.MULTI_DESCRIPTION_PROMPT.format(count=len(items)))
+
+        call_start = time.perf_counter()
+        response = await self.client.aio.models.generate_content(
+            model=settings.GEMINI_MODEL,
+            contents=contents,
+            config=self._description_config(
+                max_output_tokens=2000 + 400 * (len(items) - 1),
+                response_schema=MultiDescriptionResponse
+            )
+        )
+        GEMINI_CALL_SECONDS.labels("generate_descriptions").observe(time.perf_counter() - call_start)
+        _record_usage("generate_descriptions", response)
+
+        parsed = parse_structured(response.text or "", MultiDescriptionResponse, "gemini", "generate_descriptions")
+        results: List[Union[str, Exception, None]] = [None] * len(items)
+        for item in parsed.descriptions:
+            if item.index <= len(items) and results[item.index - 1] is None and item.description.strip():
+                results[item.index - 1] = clean_description(item.description)
+
+        return [
+            result if result is not None else ValueError(f"No description for product {n} in batch response")
+            for n, result in enumerate(results, 1)
+        ]
+
+
+# 프로세스 공용 인스턴스 (app lifespan에서 생성/정리)
+_inspector: Optional[GeminiInspector] = None
 
-        return description
 
-    # 비동기 실행
-    result = await asyncio.to_thread(_generate)
-    return result
+def init_inspector() -> GeminiInspector:
+    """공용 GeminiInspector 생성 (lifespan 시작 시 1회)"""
+    global _inspector
+    if _inspector is None:
+        _inspector = GeminiInspector()
+    return _inspector
+
+
+def get_inspector(api_key: Optional[str] = None) -> GeminiInspector:
+    """공용 인스턴스 반환 (api_key를 지정하면 별도 인스턴스)"""
+    if api_key is not None:
+        return GeminiInspector(api_key=api_key)
+    return init_inspector()
+
+
+async def close_inspector() -> None:
+    """공용 인스턴스의 HTTP 커넥션 풀 정리 (lifespan 종료 시)"""
+    global _inspector
+    if _inspector is not None:
+        await _inspector.aclose()
+        _inspector = None
+
+
+def prompt_cache_stats() -> Optional[dict]:
+    """공용 인스턴스의 컨텍스트 캐시 상태 (/inspect/health)"""
+    return _inspector.prompt_cache.stats() if _inspector is not None else None
+
+
+# 간편 비동기 함수
+async def analyze_defects(
+    s3_path: str,
+    item_category: str = "물품",
+    api_key: Optional[str] = None
+) -> InspectionResult:
+    """
+    이미지 결함 분석 (비동기 간편 함수, 공용 rate limiter 경유)
+
+    Args:
+        s3_path: S3 이미지 경로
+        item_category: 물품 카테고리
+        api_key: Gemini API 키 (None이면 공용 인스턴스)
+
+    Returns:
+        InspectionResult: 분석 결과
+    """
+    inspector = get_inspector(api_key)
+    return await gemini_rate_limiter.run(
+        lambda: inspector.analyze_image(s3_path=s3_path, item_category=item_category),
+        estimated_tokens=GeminiInspector.estimate_call_tokens(1)
+    )
+
+
+async def analyze_defects_batch(
+    s3_paths: List[str],
+    item_category: str = "물품",
+    api_key: Optional[str] = None,
+    use_cache: bool = True,
+    images: Optional[List[Union[tuple[bytes, str], Exception]]] = None
+) -> List[Union[InspectionResult, Exception]]:
+    """
+    여러 이미지 결함 분석 - 한 번의 Gemini 호출 (비동기 간편 함수)
+
+    결과 캐시(이미지 내용 + 모델 + 프롬프트 버전)에 있는 이미지는 호출 없이
+    캐시된 결과를 쓰고, 나머지 이미지만 모델로 보냅니다.
+
+    Args:
+        s3_paths: S3 이미지 경로 리스트 (GeminiInspector.chunk_size() 이하 권장)
+        item_category: 물품 카테고리
+        api_key: Gemini API 키 (None이면 공용 인스턴스)
+        use_cache: False면 캐시 조회 없이 모두 재분석 (새 결과는 캐시에 저장)
+        images: 이미 로드한 이미지 (load_images() 결과, s3_paths와 같은 순서)
+
+    Returns:
+        s3_paths와 같은 순서의 결과 리스트 (실패한 이미지는 Exception)
+    """
+    inspector = get_inspector(api_key)
+    cache = get_result_cache()
+    if images is None:
+        images = await inspector.load_images(s3_paths)
+
+    prompt_version = GeminiInspector.prompt_version(item_category)
+    keys = [
+        None if isinstance(image, Exception)
+        else result_key(hashlib.sha256(image[0]).hexdigest(), inspector.model, prompt_version)
+        for image in images
+    ]
+
+    cached = {}
+    if cache is not None and use_cache:
+        cached = await asyncio.to_thread(cache.get_many, [key for key in keys if key])
+
+    results: List[Union[InspectionResult, Exception, None]] = [
+        image if isinstance(image, Exception) else None for image in images
+    ]
+    pending = []
+    for i, key in enumerate(keys):
+        if key is None:
+            continue
+        if key in cached:
+            results[i] = InspectionResult.model_validate_json(cached[key])
+            RESULT_CACHE_REQUESTS.labels("hit").inc()
+        else:
+            pending.append(i)
+            if cache is not None:
+                RESULT_CACHE_REQUESTS.labels("miss" if use_cache else "bypass").inc()
+
+    if not pending:
+        return results
+
+    fresh = await gemini_rate_limiter.run(
+        lambda: inspector.analyze_images(
+            [s3_paths[i] for i in pending], item_category, images=[images[i] for i in pending]
+        ),
+        estimated_tokens=GeminiInspector.estimate_call_tokens(len(pending))
+    )
+
+    to_store = []
+    for i, result in zip(pending, fresh):
+        results[i] = result
+        if cache is not None and isinstance(result, InspectionResult):
+            to_store.append((keys[i], result.model_dump_json()))
+
+    if to_store:
+        def _store():
+            for key, payload in to_store:
+                cache.put(key, inspector.model, prompt_version, payload)
+        try:
+            await asyncio.to_thread(_store)
+        except Exception as e:
+            print(f"Result cache write failed: {e}")
+
+    return results
+
+
+async def generate_product_description(
+    s3_path: str,
+    product_name: str,
+    api_key: Optional[str] = None
+) -> str:
+    """
+    제품 이미지를 보고 판매자 스타일의 제품 설명 생성 (비동기 간편 함수)
+
+    Args:
+        s3_path: S3 이미지 경로 (s3://bucket/key)
+        product_name: 제품명
+        api_key: Gemini API 키 (None이면 공용 인스턴스)
+
+    Returns:
+        str: AI 생성 제품 설명 (한 문단)
+    """
+    inspector = get_inspector(api_key)
+    return await gemini_rate_limiter.run(
+        lambda: inspector.generate_description(s3_path, product_name),
+        estimated_tokens=DESCRIPTION_ESTIMATED_TOKENS
+    )
+
+
+async def stream_product_description(
+    product_name: str,
+    image: bytes,
+    api_key: Optional[str] = None
+) -> AsyncIterator[str]:
+    """
+    제품 설명 원본 텍스트 조각 스트림 (공용 rate limiter 경유)
+
+    첫 조각까지의 시간은 inspect_description_first_text_seconds로 기록됩니다.
+    따옴표 정리는 호출부에서 DescriptionStreamCleaner로 적용합니다.
+
+    Args:
+        product_name: 제품명
+        image: 800px 이미지 바이트 (load_description_image)
+        api_key: Gemini API 키 (None이면 공용 인스턴스)
+    """
+    inspector = get_inspector(api_key)
+    start = time.perf_counter()
+    texts, first = await gemini_rate_limiter.run(
+        lambda: inspector.open_description_stream(product_name, image),
+        estimated_tokens=estimate_description_tokens(1)
+    )
+    try:
+        if first is None:
+            return
+        DESCRIPTION_FIRST_TEXT_SECONDS.observe(time.perf_counter() - start)
+        yield first
+        async for text in texts:
+            yield text
+    finally:
+        await texts.aclose()
@@ -0,0 +1,174 @@
+"""
+근접 중복 이미지 묶기 (perceptual hash)
+
+연속 촬영처럼 거의 같은 사진을 한 묶음으로 만들어 대표 이미지 1장만 검수합니다.
+- pHash: 32x32 그레이스케일 → 2D DCT → 저주파 8x8 계수의 중앙값 비교 (64bit)
+- 해밍 거리 DEDUPE_MAX_DISTANCE 이하면 같은 묶음 (leader 방식, 체이닝 없음)
+- 대표 이미지: 묶음에서 JPEG 크기가 가장 큰 이미지 (디테일이 가장 많음)
+- 검수 우선순위: 디테일(근접 촬영)이 가장 많은 대표부터, 이후 이미 고른 사진과
+  가장 다른 사진(다른 각도) 순 (farthest-point)
+
+이미 전처리(1200px)된 바이트를 사용하며, JPEG는 draft 모드로 축소 디코딩합니다.
+
+사용 예시:
+    images = await inspector.load_images(s3_paths)
+    hashes = await compute_hashes(images)
+    clusters = group_near_duplicates(images, hashes)
+    # [[3, 0, 1], [2], ...]  각 묶음의 첫 번째가 대표 이미지 인덱스
+    order = prioritize([c[0] for c in clusters], images, hashes)
+"""
+import asyncio
+import io
+import math
+from typing import List, Optional, Sequence, Union
+
+from PIL import Image
+
+from app.config import settings
+
+_HASH_SIZE = 8
+_SAMPLE_SIZE = 32
+
+# DCT-II 계수 테이블 (저주파 8개만 필요)
+_DCT_TABLE = [
+    [math.cos(math.pi * (2 * x + 1) * u / (2 * _SAMPLE_SIZE)) for x in range(_SAMPLE_SIZE)]
+    for u in range(_HASH_SIZE)
+]
+
+
+def perceptual_hash(image_bytes: bytes) -> int:
+    """64bit pHash (작은 변화 - 압축, 약간의 밝기/리사이즈 - 에 강함)"""
+    img = Image.open(io.BytesIO(image_bytes))
+    img.draft("L", (_SAMPLE_SIZE * 2, _SAMPLE_SIZE * 2))  # JPEG: 축소 디코딩
+    img = img.convert("L").resize((_SAMPLE_SIZE, _SAMPLE_SIZE), Image.Resampling.BILINEAR)
+    pixels = list(img.getdata())
+    rows = [pixels[y * _SAMPLE_SIZE:(y + 1) * _SAMPLE_SIZE] for y in range(_SAMPLE_SIZE)]
+
+    # 행 방향 DCT (32 x 8) → 열 방향 DCT (8 x 8)
+    row_dct = [[sum(c * p for c, p in zip(_DCT_TABLE[u], row)) for u in range(_HASH_SIZE)] for row in rows]
+    coeffs = [
+        sum(_DCT_TABLE[v][y] * row_dct[y][u] for y in range(_SAMPLE_SIZE))
+        for v in range(_HASH_SIZE)
+        for u in range(_HASH_SIZE)
+    ]
+
+    # DC 성분(전체 밝기)을 제외한 중앙값 기준으로 비트화
+    median = sorted(coeffs[1:])[len(coeffs[1:]) // 2]
+    value = 0
+    for c in coeffs:
+        value = (value << 1) | (1 if c > median else 0)
+    return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def cluster_hashes(
+    hashes: Sequence[Optional[int]],
+    sizes: Sequence[int],
+    max_distance: int
+) -> List[List[int]]:
+    """
+    해시 목록 → 묶음 목록 (각 묶음의 첫 번째가 대표 인덱스)
+
+    해시가 None인 항목(로드/디코딩 실패)은 항상 단독 묶음입니다.
+    묶음은 첫 멤버의 원래 순서대로 반환됩니다.
+    """
+    leaders: List[int] = []          # 묶음 기준 해시의 인덱스
+    members: List[List[int]] = []
+
+    for i, h in enumerate(hashes):
+        if h is not None:
+            for c, leader in enumerate(leaders):
+                if hashes[leader] is not None and hamming_distance(hashes[leader], h) <= max_distance:
+                    members[c].append(i)
+                    break
+            else:
+                leaders.append(i)
+                members.append([i])
+        else:
+            leaders.append(i)
+            members.append([i])
+
+    clusters = []
+    for group in members:
+        representative = max(group, key=lambda i: sizes[i])
+        clusters.append([representative] + [i for i in group if i != representative])
+    return clusters
+
+
+def _hash_all(images: Sequence[Union[tuple, Exception]]) -> List[Optional[int]]:
+    hashes = []
+    for image in images:
+        if isinstance(image, Exception):
+            hashes.append(None)
+            continue
+        try:
+            hashes.append(perceptual_hash(image[0]))
+        except Exception as e:
+            print(f"Perceptual hash failed ({e}), treating image as unique")
+            hashes.append(None)
+    return hashes
+
+
+def _sizes(images: Sequence[Union[tuple, Exception]]) -> List[int]:
+    return [0 if isinstance(image, Exception) else len(image[0]) for image in images]
+
+
+async def compute_hashes(images: Sequence[Union[tuple, Exception]]) -> List[Optional[int]]:
+    """load_images() 결과 → pHash 리스트 (실패한 이미지는 None)"""
+    return await asyncio.to_thread(_hash_all, images)
+
+
+def group_near_duplicates(
+    images: Sequence[Union[tuple, Exception]],
+    hashes: Sequence[Optional[int]]
+) -> List[List[int]]:
+    """
+    load_images() 결과 → 근접 중복 묶음 (DEDUPE_ENABLED가 꺼져 있으면 모두 단독)
+
+    Args:
+        images: (이미지 바이트, media_type) 또는 Exception 리스트
+        hashes: compute_hashes() 결과
+
+    Returns:
+        묶음 리스트 (각 묶음은 인덱스 리스트, 첫 번째가 대표)
+    """
+    if not settings.DEDUPE_ENABLED or len(images) < 2:
+        return [[i] for i in range(len(images))]
+    return cluster_hashes(hashes, _sizes(images), settings.DEDUPE_MAX_DISTANCE)
+
+
+def prioritize(
+    indices: Sequence[int],
+    images: Sequence[Union[tuple, Exception]],
+    hashes: Sequence[Optional[int]]
+) -> List[int]:
+    """
+    검수 순서 결정 (마감 시간 안에 정보량이 많은 사진부터 보내도록)
+
+    1. JPEG 크기(디테일, 근접 촬영일수록 큼)가 가장 큰 사진
+    2. 이후 이미 고른 사진들과의 최소 해밍 거리가 가장 큰 사진 (다른 각도)
+       - 동률이면 디테일이 큰 사진
+    해시가 없는 사진(로드 실패)은 마지막
+    """
+    sizes = _sizes(images)
+    remaining = [i for i in indices if hashes[i] is not None]
+    unhashed = [i for i in indices if hashes[i] is None]
+    if not remaining:
+        return list(unhashed)
+
+    first = max(remaining, key=lambda i: sizes[i])
+    order = [first]
+    remaining.remove(first)
+    min_distance = {i: hamming_distance(hashes[i], hashes[first]) for i in remaining}
+
+    while remaining:
+        pick = max(remaining, key=lambda i: (min_distance[i], sizes[i]))
+        order.append(pick)
+        remaining.remove(pick)
+        for i in remaining:
+            min_distance[i] = min(min_distance[i], hamming_distance(hashes[i], hashes[pick]))
+
+    return order + unhashed
@@ -0,0 +1,234 @@
+"""
+이미지 전처리 서비스 (프로세스 풀)
+
+디코딩/리사이즈/보정/JPEG 인코딩은 GIL을 잡는 CPU 작업이라 asyncio.to_thread로는
+배치 안의 이미지들이 사실상 순차 처리됩니다. 이 서비스는 전처리를 프로세스 풀에서
+실행하고, 검수(Gemini/Claude)와 설명 생성이 모두 같은 경로를 사용합니다.
+
+파이프라인 (이미지마다, 여러 이미지가 동시에 다른 단계를 진행):
+    캐시 확인 → S3 GET (비동기, 캐시가 있으면 조건부) → [워커 프로세스] 디코딩(JPEG draft) → 리사이즈
+    → 보정(콘트라스트/샤프니스) → JPEG 인코딩 → 캐시 저장 (스레드)
+
+- 변형(variant)별 설정은 VARIANTS (캐시 변형 이름 = 용도 + 크기)
+- JPEG는 draft 모드로 목표 크기 이상인 1/2, 1/4, 1/8 배율로 바로 디코딩
+- 보정은 리사이즈 후 적용 (원본 해상도에서 하던 것보다 수십 배 적은 픽셀)
+- 단계별 시간은 inspect_image_stage_seconds{variant, stage}로 기록
+  (stage: cache, fetch, queue, decode, resize, enhance, encode, store)
+- S3 접근은 s3_client (aiobotocore), 캐시된 변형은 If-None-Match로 검증
+- PREPROCESS_WORKERS=0이면 프로세스 풀 없이 스레드에서 실행
+
+사용 예시:
+    image_bytes = await image_preprocessor.load(s3_path, "inspect_1200.jpg")
+"""
+import asyncio
+import io
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from PIL import Image, ImageEnhance
+
+from app.config import settings
+from app.services.s3_client import parse_s3_path, s3_client
+from app.utils.image_cache import get_image_cache
+from app.utils.metrics import IMAGE_CACHE_REQUESTS, IMAGE_STAGE_SECONDS
+
+
+@dataclass(frozen=True)
+class VariantProfile:
+    """전처리 설정"""
+    max_long_edge: int
+    quality: int
+    enhance: bool = False  # 콘트라스트 1.2 + 샤프니스 1.1 (스크래치/세부 강조)
+
+
+VARIANTS: Dict[str, VariantProfile] = {
+    # Gemini 결함 검수: 1200px + 보정, JPEG 85
+    "inspect_1200.jpg": VariantProfile(1200, 85, enhance=True),
+    # Claude 결함 검수: 1200px, JPEG 85
+    "claude_1200.jpg": VariantProfile(1200, 85),
+    # 설명 생성: 고해상도 불필요 → 800px, JPEG 70
+    "desc_800.jpg": VariantProfile(800, 70),
+}
+
+
+# ---- 워커 (프로세스 풀에서 실행, picklable 최상위 함수) ----
+
+def preprocess_image(image_bytes: bytes, variant: str) -> tuple[Optional[bytes], Dict[str, float]]:
+    """
+    원본 바이트 → 변형 JPEG 바이트
+
+    Returns:
+        (전처리된 바이트 - 실패 시 None, {"started": 시작 시각(monotonic), 단계: 초})
+    """
+    profile = VARIANTS[variant]
+    timings: Dict[str, float] = {"started": time.monotonic()}
+    try:
+        stage_start = time.perf_counter()
+        img = Image.open(io.BytesIO(image_bytes))
+        # JPEG: 목표 크기 이상인 가장 작은 배율로 디코딩
+        img.draft("RGB", (profile.max_long_edge, profile.max_long_edge))
+
+        # RGB 변환 (RGBA/P → 흰 배경 합성)
+        if img.mode in ('RGBA', 'LA', 'P'):
+            if img.mode == 'P':
+                img = img.convert('RGBA')
+            background = Image.new('RGB', img.size, (255, 255, 255))
+            background.paste(img, mask=img.split()[-1])
+            img = background
+        elif img.mode != 'RGB':
+            img = img.convert('RGB')
+        else:
+            img.load()
+        timings["decode"] = time.perf_counter() - stage_start
+
+        # 긴 쪽이 max_long_edge를 초과하면 리사이즈
+        stage_start = time.perf_counter()
+        if max(img.size) > profile.max_long_edge:
+            ratio = profile.max_long_edge / max(img.size)
+            new_size = tuple(max(1, int(s * ratio)) for s in img.size)
+            img = img.resize(new_size, Image.Resampling.LANCZOS)
+        timings["resize"] = time.perf_counter() - stage_start
+
+        if profile.enhance:
+            stage_start = time.perf_counter()
+            img = ImageEnhance.Contrast(img).enhance(1.2)   # 결함 더 명확히
+            img = ImageEnhance.Sharpness(img).enhance(1.1)  # 세부 정보 강조
+            timings["enhance"] = time.perf_counter() - stage_start
+
+        stage_start = time.perf_counter()
+        buffer = io.BytesIO()
+        img.save(buffer, format='JPEG', quality=profile.quality, optimize=True)
+        timings["encode"] = time.perf_counter() - stage_start
+        return buffer.getvalue(), timings
+
+    except Exception as e:
+        print(f"Image optimization failed ({variant}): {e}, using original")
+        return None, timings
+
+
+class ImagePreprocessor:
+    """S3 로드 + 전처리 (프로세스 풀) + 공유 이미지 캐시"""
+
+    def __init__(self, workers: int):
+        self.workers = max(0, workers)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._in_flight = 0
+
+    def _executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.workers == 0:
+            return None
+        with self._pool_lock:
+            if self._pool is None:
+                # spawn: 스레드가 있는 프로세스에서 fork하지 않음
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    async def preprocess(self, image_bytes: bytes, variant: str) -> bytes:
+        """원본 바이트 → 변형 바이트 (실패 시 원본 그대로)"""
+        submitted = time.monotonic()
+        self._in_flight += 1
+        try:
+            executor = self._executor()
+            if executor is None:
+                processed, timings = await asyncio.to_thread(preprocess_image, image_bytes, variant)
+            else:
+                try:
+                    processed, timings = await asyncio.get_running_loop().run_in_executor(
+                        executor, preprocess_image, image_bytes, variant
+                    )
+                except BrokenProcessPool:
+                    # 워커가 비정상 종료 (OOM 등) → 풀 재생성은 다음 요청에서, 이번 요청은 스레드로
+                    print(f"Preprocess pool broken, rebuilding ({variant})")
+                    self._reset(executor)
+                    processed, timings = await asyncio.to_thread(preprocess_image, image_bytes, variant)
+        finally:
+            self._in_flight -= 1
+
+        IMAGE_STAGE_SECONDS.labels(variant, "queue").observe(max(0.0, timings.pop("started") - submitted))
+        for stage, seconds in timings.items():
+            IMAGE_STAGE_SECONDS.labels(variant, stage).observe(seconds)
+        return processed if processed is not None else image_bytes
+
+    async def load(self, s3_path: str, variant: str) -> bytes:
+        """
+        S3 이미지를 전처리된 변형으로 로드 (공유 이미지 캐시 read-through)
+
+        캐시 인덱스에 같은 객체/변형이 있으면 그 ETag로 조건부 GET을 보내 304면 캐시된
+        바이트를 반환합니다. 없거나 객체가 바뀌었으면 받은 본문을 전처리해 캐시에 저장합니다.
+        gaussian_ai가 같은 IMAGE_CACHE_DIR을 쓰므로 서비스 간 재사용됩니다.
+
+        Args:
+            s3_path: S3 경로
+            variant: VARIANTS의 변형 이름 (예: inspect_1200.jpg, desc_800.jpg)
+
+        Returns:
+            전처리된 이미지 바이트
+        """
+        bucket, key = parse_s3_path(s3_path)
+        cache = get_image_cache()
+
+        cached_etag, cached = None, None
+        if cache is not None:
+            stage_start = time.perf_counter()
+            cached_etag, cached = await asyncio.to_thread(cache.cached_variant, bucket, key, variant)
+            IMAGE_STAGE_SECONDS.labels(variant, "cache").observe(time.perf_counter() - stage_start)
+
+        # S3 GET (캐시된 변형이 있으면 If-None-Match → 변경 없으면 304, 본문 없이 1회 왕복)
+        stage_start = time.perf_counter()
+        obj = await s3_client.get(bucket, key, if_none_match=cached_etag)
+        IMAGE_STAGE_SECONDS.labels(variant, "fetch").observe(time.perf_counter() - stage_start)
+        if obj is None:
+            IMAGE_CACHE_REQUESTS.labels("hit").inc()
+            return cached
+        if cache is not None:
+            IMAGE_CACHE_REQUESTS.labels("stale" if cached_etag else "miss").inc()
+
+        processed = await self.preprocess(obj.data, variant)
+
+        # 전처리 실패(원본 그대로 반환)는 캐시하지 않음
+        if cache is not None and processed is not obj.data:
+            stage_start = time.perf_counter()
+            await asyncio.to_thread(self._store, cache, bucket, key, obj.etag, obj.data, variant, processed)
+            IMAGE_STAGE_SECONDS.labels(variant, "store").observe(time.perf_counter() - stage_start)
+
+        return processed
+
+    @staticmethod
+    def _store(cache, bucket: str, key: str, etag: str, image_bytes: bytes, variant: str, processed: bytes) -> None:
+        try:
+            cache.store(bucket, key, etag, image_bytes, variant, processed)
+        except OSError as e:
+            print(f"Image cache write failed: {e}")
+
+    def _reset(self, broken: ProcessPoolExecutor) -> None:
+        with self._pool_lock:
+            if self._pool is broken:
+                self._pool = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def close(self) -> None:
+        """워커 프로세스 종료 (lifespan 종료 시)"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "mode": "process" if self.workers else "thread",
+            "in_flight": self._in_flight,
+        }
+
+
+# 프로세스 공용 전처리기
+image_preprocessor = ImagePreprocessor(settings.PREPROCESS_WORKERS)
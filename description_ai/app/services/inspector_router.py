@@ -0,0 +1,334 @@
+"""
+검수 프로바이더 라우터 (Gemini 기본, Claude 백업)
+
+- Hedged request: 기본 프로바이더 호출이 최근 p95 지연을 넘기거나 실패하면
+  다른 프로바이더로 백업 요청을 보내고, 먼저 도착한 유효한 결과를 사용
+  (나머지 호출은 취소)
+- 일부 이미지만 실패하면 실패한 이미지만 백업 프로바이더로 재시도
+- Circuit breaker: 연속 실패 CIRCUIT_FAILURE_THRESHOLD회 → CIRCUIT_RESET_SECONDS 동안
+  해당 프로바이더를 건너뜀 (이후 1회 시험 호출로 복구 확인)
+- 비용: 프로바이더별 누적 비용은 metrics.record_llm_cost (각 inspector가 기록)
+- 이미지 로드 실패는 프로바이더 호출 없이 실패로 반환하고, 실제 API 호출이 없었던
+  호출(결과 캐시 적중 등)은 breaker/p95/hedging에 반영하지 않음
+  (p95는 rate limiter 대기를 뺀 API 호출 시간 - metrics.track_provider_calls)
+
+Claude는 선택 사항입니다. anthropic 패키지나 ANTHROPIC_API_KEY가 없으면
+Gemini만 사용합니다 (hedging 없음).
+
+사용 예시:
+    results = await inspector_router.analyze_batch(s3_paths, "물품", images=images)
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Dict, List, Optional, Union
+
+from app.config import settings
+from app.schemas.inspection import InspectionResult
+from app.services.claude_inspector import get_claude_inspector, claude_unavailable_reason
+from app.services.gemini_inspector import analyze_defects_batch
+from app.utils.metrics import (
+    CIRCUIT_OPEN,
+    INSPECTOR_CALLS,
+    INSPECTOR_HEDGES,
+    llm_cost_totals,
+    track_provider_calls
+)
+
+BatchResult = List[Union[InspectionResult, Exception]]
+
+
+class CircuitBreaker:
+    """closed → (연속 실패) → open → (reset_seconds 후) half_open → 성공 시 closed"""
+
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        CIRCUIT_OPEN.labels(name).set(0)
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open":
+            if time.monotonic() - self._opened_at < self.reset_seconds:
+                return False
+            self.state = "half_open"
+            self._trial_in_flight = False
+        # half_open: 시험 호출 1건만 허용
+        if self._trial_in_flight:
+            return False
+        self._trial_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._trial_in_flight = False
+        if self.state != "closed":
+            print(f"[{self.name}] circuit closed")
+        self.state = "closed"
+        CIRCUIT_OPEN.labels(self.name).set(0)
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._trial_in_flight = False
+        if self.state == "half_open" or self._failures >= self.failure_threshold:
+            if self.state != "open":
+                print(f"[{self.name}] circuit opened after {self._failures} failures")
+            self.state = "open"
+            self._opened_at = time.monotonic()
+            CIRCUIT_OPEN.labels(self.name).set(1)
+
+    def release(self) -> None:
+        """시험 호출이 결과 없이 취소된 경우"""
+        self._trial_in_flight = False
+
+    def stats(self) -> dict:
+        return {"state": self.state, "consecutive_failures": self._failures}
+
+
+class ProviderHealth:
+    """프로바이더별 최근 호출 지연 + circuit breaker"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies: deque = deque(maxlen=200)
+        self.breaker = CircuitBreaker(
+            name, settings.CIRCUIT_FAILURE_THRESHOLD, settings.CIRCUIT_RESET_SECONDS
+        )
+
+    def p95(self) -> Optional[float]:
+        if len(self.latencies) < settings.HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def hedge_delay(self) -> float:
+        """이 시간 안에 응답이 없으면 백업 요청 (p95, 표본 부족 시 기본값)"""
+        p95 = self.p95()
+        if p95 is None:
+            return settings.HEDGE_DEFAULT_DELAY_SECONDS
+        return max(settings.HEDGE_MIN_DELAY_SECONDS, p95)
+
+    def stats(self) -> dict:
+        p95 = self.p95()
+        return {
+            **self.breaker.stats(),
+            "p95_seconds": round(p95, 2) if p95 is not None else None,
+            "samples": len(self.latencies),
+        }
+
+
+def _is_valid(results) -> bool:
+    """이미지 중 하나라도 결과가 있으면 유효"""
+    return isinstance(results, list) and any(not isinstance(r, Exception) for r in results)
+
+
+class InspectorRouter:
+    """Gemini/Claude 간 hedging + failover"""
+
+    PROVIDERS = ("gemini", "claude")
+
+    def __init__(self):
+        self.health: Dict[str, ProviderHealth] = {name: ProviderHealth(name) for name in self.PROVIDERS}
+
+    def _configured(self, provider: str) -> bool:
+        if provider == "gemini":
+            return bool(settings.GEMINI_API_KEY)
+        return settings.INSPECTOR_HEDGING_ENABLED and get_claude_inspector() is not None
+
+    def _call(self, provider: str, s3_paths: List[str], item_category: str, images, use_cache: bool):
+        if provider == "gemini":
+            return analyze_defects_batch(s3_paths, item_category, use_cache=use_cache, images=images)
+        return get_claude_inspector().analyze_images(s3_paths, item_category, images=images)
+
+    async def _timed_call(self, provider: str, calls: list, *args) -> BatchResult:
+        """
+        호출 + API 호출 지연/성공 여부를 프로바이더 상태에 기록
+
+        calls에는 실제 API 호출 시간이 쌓임 (실패한 호출은 None). 비어 있으면
+        프로바이더를 호출하지 않은 것이므로 breaker에 반영하지 않음.
+        """
+        health = self.health[provider]
+        try:
+            with track_provider_calls(calls):
+                results = await self._call(provider, *args)
+        except asyncio.CancelledError:
+            INSPECTOR_CALLS.labels(provider, "cancelled").inc()
+            health.breaker.release()
+            raise
+        except Exception:
+            INSPECTOR_CALLS.labels(provider, "error").inc()
+            if calls:
+                health.breaker.record_failure()
+            else:
+                health.breaker.release()
+            raise
+
+        health.latencies.extend(elapsed for elapsed in calls if elapsed is not None)
+        if not calls:
+            health.breaker.release()
+            INSPECTOR_CALLS.labels(provider, "cached" if _is_valid(results) else "error").inc()
+        elif _is_valid(results):
+            health.breaker.record_success()
+            INSPECTOR_CALLS.labels(provider, "success").inc()
+        else:
+            health.breaker.record_failure()
+            INSPECTOR_CALLS.labels(provider, "error").inc()
+        return results
+
+    def _pick(self, exclude: Optional[str] = None) -> Optional[str]:
+        """breaker가 허용하는 첫 프로바이더 (선호 순서)"""
+        for provider in self.PROVIDERS:
+            if provider != exclude and self._configured(provider) and self.health[provider].breaker.allow():
+                return provider
+        return None
+
+    async def analyze_batch(
+        self,
+        s3_paths: List[str],
+        item_category: str = "물품",
+        images: Optional[list] = None,
+        use_cache: bool = True
+    ) -> BatchResult:
+        """
+        이미지 청크 검수 (analyze_defects_batch와 같은 반환 형태)
+
+        Returns:
+            s3_paths와 같은 순서의 결과 리스트 (실패한 이미지는 Exception)
+        """
+        # 로드 실패 이미지는 프로바이더 호출 없이 그대로 실패 처리
+        # (prioritize가 실패 이미지를 한 청크로 모으므로 breaker를 열지 않도록)
+        if images is not None and any(isinstance(image, Exception) for image in images):
+            results: BatchResult = list(images)
+            loaded = [i for i, image in enumerate(images) if not isinstance(image, Exception)]
+            if loaded:
+                inspected = await self.analyze_batch(
+                    [s3_paths[i] for i in loaded], item_category, [images[i] for i in loaded], use_cache
+                )
+                for i, result in zip(loaded, inspected):
+                    results[i] = result
+            return results
+
+        primary = self._pick()
+        if primary is None:
+            raise RuntimeError("No inspection provider available (circuits open or not configured)")
+        if primary != self.PROVIDERS[0]:
+            INSPECTOR_HEDGES.labels("circuit_open").inc()
+
+        args = (s3_paths, item_category, images, use_cache)
+        tasks: Dict[asyncio.Task, str] = {}
+        api_calls: Dict[asyncio.Task, list] = {}
+        hedged = False
+        last: Union[BatchResult, Exception, None] = None
+
+        def _start(provider: str) -> None:
+            calls: list = []
+            task = asyncio.create_task(self._timed_call(provider, calls, *args))
+            tasks[task] = provider
+            api_calls[task] = calls
+
+        def _hedge(reason: str) -> bool:
+            nonlocal hedged
+            hedged = True
+            backup = self._pick(exclude=primary)
+            if backup is None:
+                return False
+            INSPECTOR_HEDGES.labels(reason).inc()
+            _start(backup)
+            return True
+
+        _start(primary)
+
+        try:
+            while tasks:
+                timeout = None if hedged else self.health[primary].hedge_delay()
+                done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # 기본 프로바이더가 p95를 넘김 → 백업 요청 (둘 중 먼저 오는 결과 사용)
+                    _hedge("latency")
+                    continue
+
+                for task in done:
+                    provider = tasks.pop(task)
+                    try:
+                        results = task.result()
+                    except Exception as e:
+                        results = e
+
+                    if _is_valid(results):
+                        return await self._fill_failures(provider, results, *args)
+
+                    last = results
+                    # API 호출 전에 실패했으면 (프로바이더 문제 아님) 백업 요청 없음
+                    if not hedged and api_calls[task]:
+                        _hedge("error")
+        finally:
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+        if isinstance(last, Exception):
+            raise last
+        return last
+
+    async def _fill_failures(
+        self,
+        provider: str,
+        results: BatchResult,
+        s3_paths: List[str],
+        item_category: str,
+        images: Optional[list],
+        use_cache: bool
+    ) -> BatchResult:
+        """일부 이미지만 실패한 경우 그 이미지만 다른 프로바이더로 재시도 (로드 실패 제외)"""
+        failed = [
+            i for i, result in enumerate(results)
+            if isinstance(result, Exception) and not (images is not None and isinstance(images[i], Exception))
+        ]
+        if not failed:
+            return results
+
+        backup = self._pick(exclude=provider)
+        if backup is None:
+            return results
+
+        INSPECTOR_HEDGES.labels("error").inc()
+        try:
+            retried = await self._timed_call(
+                backup,
+                [],
+                [s3_paths[i] for i in failed],
+                item_category,
+                [images[i] for i in failed] if images is not None else None,
+                use_cache
+            )
+        except Exception as e:
+            print(f"Backup inspection via {backup} failed: {e}")
+            return results
+
+        results = list(results)
+        for i, result in zip(failed, retried):
+            if not isinstance(result, Exception):
+                results[i] = result
+        return results
+
+    def stats(self) -> dict:
+        return {
+            "providers": {
+                name: {**health.stats(), "configured": self._configured(name)}
+                for name, health in self.health.items()
+            },
+            "claude_unavailable_reason": claude_unavailable_reason(),
+            "cost_usd": llm_cost_totals(),
+        }
+
+
+# 프로세스 공용 라우터
+inspector_router = InspectorRouter()
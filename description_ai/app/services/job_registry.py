@@ -0,0 +1,181 @@
+"""
+진행 중 작업 레지스트리 (product_id당 실행 중인 작업 1개)
+
+/inspect/fault_desc를 같은 product_id로 두 번 보내면 파이프라인이 두 번 돌면서
+같은 fault_description 행을 번갈아 덮어쓰고 job_count도 두 번 올렸습니다.
+이제 작업 태스크는 레지스트리가 관리합니다.
+
+- 실행 중 + 같은 입력      → 합류 (새 파이프라인 없음)
+- 실행 중 + 다른 입력      → 교체: 기존 태스크 취소, 정리가 끝난 뒤 새 작업 시작
+- Idempotency-Key 헤더     → 같은 키로 제출된 실행 중 작업에 바로 합류 (지문 계산 생략)
+- cancel(product_id)       → DELETE /inspect/jobs/{id}: 대기/실행 중 작업 취소
+
+입력 지문은 S3 ETag(내용 해시) + 결과에 영향을 주는 값(제품명, 모델)으로 계산하고,
+완료 시 fault_description.input_fingerprint에 저장해 같은 입력의 재제출은
+즉시 완료로 응답합니다 (api/inspect.py).
+
+사용 예시:
+    outcome, entry = await inspect_registry.submit(product_id, fingerprint, key, lambda: run(...))
+"""
+import asyncio
+import hashlib
+import json
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.services.s3_client import parse_s3_path, s3_client
+from app.utils.metrics import JOB_SUBMISSIONS, JOBS_CANCELLED
+
+
+def input_fingerprint(items: Iterable[Tuple[str, str]], **params) -> str:
+    """
+    작업 입력의 안정적인 해시
+
+    Args:
+        items: (s3_path, etag) 목록 (제출 순서)
+        params: 결과에 영향을 주는 나머지 입력 (제품명, 모델 등)
+    """
+    payload = json.dumps({"items": list(items), "params": params}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+async def head_etags(s3_paths: List[str]) -> List[Tuple[str, str]]:
+    """이미지별 (s3_path, ETag) - HEAD 실패 시 빈 ETag (로드 단계에서 실패 보고)"""
+    async def _head(s3_path: str) -> Tuple[str, str]:
+        try:
+            return s3_path, await s3_client.head(*parse_s3_path(s3_path))
+        except Exception as e:
+            print(f"HEAD failed for {s3_path}: {e}")
+            return s3_path, ""
+
+    return list(await asyncio.gather(*[_head(s3_path) for s3_path in s3_paths]))
+
+
+@dataclass
+class JobEntry:
+    """실행 중인 작업"""
+    product_id: str
+    fingerprint: str
+    idempotency_key: Optional[str]
+    task: asyncio.Task
+    started_at: float = field(default_factory=time.time)
+    attached: int = 0  # 합류한 중복 제출 수
+
+
+class JobRegistry:
+    """product_id별 실행 중 태스크"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._jobs: Dict[str, JobEntry] = {}
+        self._locks: Dict[str, List] = {}  # product_id → [Lock, 보유 + 대기 수]
+
+    @asynccontextmanager
+    async def _product_lock(self, product_id: str) -> AsyncIterator[None]:
+        """
+        product_id별 submit/cancel 직렬화
+
+        교체/취소는 기존 태스크 정리(DB 기록 등)를 기다리므로 다른 제품의
+        제출/취소를 막지 않도록 제품별로 잠급니다.
+        """
+        slot = self._locks.setdefault(product_id, [asyncio.Lock(), 0])
+        slot[1] += 1
+        try:
+            async with slot[0]:
+                yield
+        finally:
+            slot[1] -= 1
+            if slot[1] == 0:
+                del self._locks[product_id]
+
+    def get(self, product_id: str) -> Optional[JobEntry]:
+        entry = self._jobs.get(product_id)
+        return entry if entry is not None and not entry.task.done() else None
+
+    def find_by_key(self, product_id: str, idempotency_key: Optional[str]) -> Optional[JobEntry]:
+        """idempotency_key로 제출된 product_id의 실행 중 작업"""
+        entry = self.get(product_id)
+        if entry is None or not idempotency_key or entry.idempotency_key != idempotency_key:
+            return None
+        entry.attached += 1
+        JOB_SUBMISSIONS.labels("attached").inc()
+        return entry
+
+    async def submit(
+        self,
+        product_id: str,
+        fingerprint: str,
+        idempotency_key: Optional[str],
+        run: Callable[[], Awaitable[None]]
+    ) -> Tuple[str, JobEntry]:
+        """
+        같은 입력의 작업이 실행 중이 아니면 run() 시작
+
+        Returns:
+            (outcome, entry): outcome은 "attached", "started", "superseded"
+        """
+        async with self._product_lock(product_id):
+            previous = self.get(product_id)
+            if previous is not None and previous.fingerprint == fingerprint:
+                previous.attached += 1
+                JOB_SUBMISSIONS.labels("attached").inc()
+                return "attached", previous
+
+            outcome = "started"
+            if previous is not None:
+                # 입력 변경: 기존 작업이 끝까지 정리된 뒤 새 작업 시작 (부분 기록 겹침 방지)
+                outcome = "superseded"
+                print(f"[{self.name}] Superseding running job for {product_id}")
+                await self._cancel_entry(previous, "Superseded by a new submission", "superseded")
+
+            entry = JobEntry(product_id, fingerprint, idempotency_key, asyncio.create_task(run()))
+            self._jobs[product_id] = entry
+            entry.task.add_done_callback(lambda _task: self._forget(entry))
+            JOB_SUBMISSIONS.labels(outcome).inc()
+            return outcome, entry
+
+    async def cancel(self, product_id: str, reason: str = "Cancelled by request") -> bool:
+        """
+        product_id의 대기/실행 중 작업을 취소하고 정리가 끝날 때까지 대기
+
+        Returns:
+            실행 중 작업이 없으면 False
+        """
+        async with self._product_lock(product_id):
+            entry = self.get(product_id)
+            if entry is None:
+                return False
+            print(f"[{self.name}] Cancelling job for {product_id}: {reason}")
+            await self._cancel_entry(entry, reason, "request")
+            return True
+
+    async def _cancel_entry(self, entry: JobEntry, reason: str, label: str) -> None:
+        """사유와 함께 취소 (CancelledError.args[0]) 후 태스크가 끝날 때까지 대기"""
+        entry.task.cancel(reason)
+        JOBS_CANCELLED.labels(label).inc()
+        await asyncio.gather(entry.task, return_exceptions=True)
+
+    def _forget(self, entry: JobEntry) -> None:
+        if self._jobs.get(entry.product_id) is entry:
+            del self._jobs[entry.product_id]
+
+    async def shutdown(self) -> None:
+        """실행 중 작업 모두 취소 (lifespan 종료 시)"""
+        tasks = [entry.task for entry in self._jobs.values() if not entry.task.done()]
+        for task in tasks:
+            task.cancel("Service shutting down")
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._jobs.clear()
+
+    def stats(self) -> dict:
+        return {
+            "running": len([entry for entry in self._jobs.values() if not entry.task.done()]),
+            "attached": sum(entry.attached for entry in self._jobs.values()),
+        }
+
+
+# 프로세스 공용 레지스트리 (fault_desc 작업)
+inspect_registry = JobRegistry("inspect")
@@ -0,0 +1,153 @@
+"""
+Gemini 명시적 컨텍스트 캐시 관리 (시스템 프롬프트 + Few-shot)
+
+- 첫 호출 시 client.aio.caches.create로 캐시 1개 생성 (모델별)
+- 만료 REFRESH 초 전부터는 caches.update로 TTL 연장 (재생성 없이)
+- 생성 실패(최소 토큰 미달, 모델 미지원, 권한 등) 시 None 반환 →
+  호출부는 system_instruction으로 폴백, 일정 시간 후 다시 시도
+- 캐시 조회 결과는 inspect_prompt_cache_requests_total{result} 메트릭으로 기록
+  (hit: 기존 캐시 사용, miss: 새로 생성, refresh: TTL 연장, fallback: 캐시 없이 호출)
+
+사용 예시:
+    cache_name = await prompt_cache.get()
+    config = types.GenerateContentConfig(cached_content=cache_name, ...)
+"""
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from google import genai
+from google.genai import types
+
+from app.utils.metrics import PROMPT_CACHE_REQUESTS
+
+# 생성 실패 후 재시도까지 대기 (초)
+_RETRY_AFTER_FAILURE_SECONDS = 600
+
+
+def is_cache_missing_error(error: Exception) -> bool:
+    """참조한 캐시가 만료/삭제된 경우 (404, 또는 CachedContent 권한 오류)"""
+    code = getattr(error, "code", None)
+    return code in (403, 404) and "cache" in str(error).lower()
+
+
+class PromptCacheManager:
+    """시스템 프롬프트 캐시 1개를 생성/갱신하고 이름을 제공"""
+
+    def __init__(
+        self,
+        client: genai.Client,
+        model: str,
+        system_prompt: str,
+        ttl_seconds: int = 3600,
+        refresh_seconds: int = 300,
+        enabled: bool = True
+    ):
+        self.client = client
+        self.model = model
+        self.system_prompt = system_prompt
+        self.ttl_seconds = ttl_seconds
+        self.refresh_seconds = min(refresh_seconds, ttl_seconds // 2)
+        self.enabled = enabled
+
+        self.name: Optional[str] = None
+        self._expires_at = 0.0  # time.monotonic 기준
+        self._retry_at = 0.0
+        self._last_error: Optional[str] = None
+        self._lock = asyncio.Lock()
+        self._counts = {"hit": 0, "miss": 0, "refresh": 0, "fallback": 0}
+
+    def _count(self, result: str) -> None:
+        self._counts[result] += 1
+        PROMPT_CACHE_REQUESTS.labels(result).inc()
+
+    def _set_expiry(self, cached: types.CachedContent) -> None:
+        if cached.expire_time is not None:
+            remaining = (cached.expire_time - datetime.now(timezone.utc)).total_seconds()
+        else:
+            remaining = self.ttl_seconds
+        self._expires_at = time.monotonic() + remaining
+
+    async def get(self) -> Optional[str]:
+        """
+        사용할 캐시 이름 반환 (없거나 사용할 수 없으면 None → system_instruction 폴백)
+        """
+        if not self.enabled:
+            self._count("fallback")
+            return None
+
+        async with self._lock:
+            now = time.monotonic()
+            remaining = self._expires_at - now
+
+            if self.name is not None and remaining > self.refresh_seconds:
+                self._count("hit")
+                return self.name
+
+            if self.name is not None and remaining > 0:
+                try:
+                    cached = await self.client.aio.caches.update(
+                        name=self.name,
+                        config=types.UpdateCachedContentConfig(ttl=f"{self.ttl_seconds}s")
+                    )
+                    self._set_expiry(cached)
+                    self._count("refresh")
+                    return self.name
+                except Exception as e:
+                    print(f"Prompt cache refresh failed ({e}), recreating")
+                    self.name = None
+
+            if now < self._retry_at:
+                self._count("fallback")
+                return None
+
+            try:
+                cached = await self.client.aio.caches.create(
+                    model=self.model,
+                    config=types.CreateCachedContentConfig(
+                        display_name="inspection-system-prompt",
+                        system_instruction=self.system_prompt,
+                        ttl=f"{self.ttl_seconds}s"
+                    )
+                )
+            except Exception as e:
+                # 최소 토큰 미달 / 모델 미지원 등 → 일정 시간 캐시 없이 동작
+                self.name = None
+                self._last_error = str(e)
+                self._retry_at = now + _RETRY_AFTER_FAILURE_SECONDS
+                print(f"Prompt cache unavailable, using system_instruction ({e})")
+                self._count("fallback")
+                return None
+
+            self.name = cached.name
+            self._last_error = None
+            self._set_expiry(cached)
+            self._count("miss")
+            print(f"Prompt cache created: {self.name} (ttl {self.ttl_seconds}s)")
+            return self.name
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """호출에서 캐시 만료/삭제가 확인된 경우 (다음 get()에서 재생성)"""
+        if name is None or name == self.name:
+            self.name = None
+            self._expires_at = 0.0
+
+    async def close(self) -> None:
+        """캐시 삭제 (저장 비용 중단, lifespan 종료 시)"""
+        if self.name is None:
+            return
+        try:
+            await self.client.aio.caches.delete(name=self.name)
+        except Exception as e:
+            print(f"Prompt cache delete failed: {e}")
+        self.name = None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "name": self.name,
+            "expires_in_seconds": max(0, int(self._expires_at - time.monotonic())) if self.name else 0,
+            "requests": dict(self._counts),
+            "last_error": self._last_error,
+        }
@@ -0,0 +1,204 @@
+"""
+프로세스 공용 적응형 Rate Limiter (RPM + TPM 토큰 버킷)
+
+- 요청 버킷(RPM)과 토큰 버킷(TPM)을 모두 만족할 때까지 대기
+- 429 / RESOURCE_EXHAUSTED 수신 시 유효 한도를 절반으로 줄이고 (Retry-After 만큼) 쿨다운
+- 성공할 때마다 유효 RPM을 1씩 회복 (AIMD), 설정값이 상한
+- 실제 토큰 사용량으로 예약량을 보정 (record_usage)
+- 대기 시간은 inspect_rate_limit_wait_seconds 메트릭으로 기록
+
+사용 예시:
+    result = await gemini_rate_limiter.run(
+        lambda: inspector.analyze_image(s3_path),
+        estimated_tokens=4000
+    )
+
+    # 실제 호출부 (동기 스레드 포함)에서 사용량 보정
+    gemini_rate_limiter.record_usage(total_tokens)
+"""
+import asyncio
+import contextvars
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from app.config import settings
+from app.utils.metrics import (
+    RATE_LIMIT_WAIT_SECONDS,
+    RATE_LIMIT_HITS,
+    RATE_LIMIT_EFFECTIVE_RPM
+)
+
+T = TypeVar("T")
+
+_RETRY_DELAY_PATTERN = re.compile(r"retry[_ -]?delay['\"]?\s*[:=]\s*['\"]?(\d+(?:\.\d+)?)s", re.IGNORECASE)
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Gemini(ClientError 429 / RESOURCE_EXHAUSTED), Claude(RateLimitError) 공통 판별"""
+    if getattr(error, "code", None) == 429 or getattr(error, "status_code", None) == 429:
+        return True
+    return "RESOURCE_EXHAUSTED" in str(error) or type(error).__name__ == "RateLimitError"
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """에러에서 재시도 대기 시간 추출 (Retry-After 헤더 또는 Gemini RetryInfo.retryDelay)"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers is not None:
+        value = headers.get("retry-after")
+        if value:
+            try:
+                return float(value)
+            except ValueError:
+                pass
+
+    match = _RETRY_DELAY_PATTERN.search(str(error))
+    return float(match.group(1)) if match else None
+
+
+@dataclass
+class _Reservation:
+    limiter: "AdaptiveRateLimiter"
+    estimated_tokens: int
+    settled: bool = False
+
+
+# acquire()에서 설정, 같은 태스크의 코루틴(및 asyncio.to_thread 스레드)에 전파됨
+_current_reservation: contextvars.ContextVar[Optional[_Reservation]] = contextvars.ContextVar(
+    "rate_limit_reservation", default=None
+)
+
+
+class AdaptiveRateLimiter:
+    """RPM/TPM 토큰 버킷 + AIMD 적응"""
+
+    def __init__(self, name: str, rpm: int, tpm: int, max_retries: int = 4):
+        self.name = name
+        self.max_rpm = float(rpm)
+        self.max_tpm = float(tpm)
+        self.max_retries = max_retries
+
+        self.rpm = self.max_rpm
+        self.tpm = self.max_tpm
+        self._requests = self.rpm
+        self._tokens = self.tpm
+        self._updated = time.monotonic()
+        self._cooldown_until = 0.0
+        self._consecutive_limits = 0
+        self._lock = threading.Lock()
+
+        RATE_LIMIT_EFFECTIVE_RPM.labels(name).set(self.rpm)
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60.0)
+        self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60.0)
+
+    def _wait_time(self, tokens: int, now: float) -> float:
+        wait = max(0.0, self._cooldown_until - now)
+        if self._requests < 1:
+            wait = max(wait, (1 - self._requests) * 60.0 / self.rpm)
+        if self._tokens < tokens:
+            wait = max(wait, (tokens - self._tokens) * 60.0 / self.tpm)
+        return wait
+
+    async def acquire(self, estimated_tokens: int = 0) -> None:
+        """요청 1건 + 예상 토큰만큼 예약 (필요하면 대기)"""
+        start = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                tokens = min(estimated_tokens, int(self.tpm))
+                wait = self._wait_time(tokens, now)
+                if wait <= 0:
+                    self._requests -= 1
+                    self._tokens -= tokens
+                    break
+            await asyncio.sleep(min(wait, 5.0))
+
+        RATE_LIMIT_WAIT_SECONDS.labels(self.name).observe(time.monotonic() - start)
+        _current_reservation.set(_Reservation(self, estimated_tokens))
+
+    def record_usage(self, total_tokens: int) -> None:
+        """
+        실제 사용 토큰 기록
+
+        현재 컨텍스트의 예약이 있으면 예상치와의 차이만 보정하고, 예약 없이
+        추가로 발생한 호출(분할 재시도 등)은 요청 1건 + 전체 토큰을 차감
+        """
+        reservation = _current_reservation.get()
+        with self._lock:
+            self._refill(time.monotonic())
+            if reservation is not None and reservation.limiter is self and not reservation.settled:
+                self._tokens -= total_tokens - reservation.estimated_tokens
+                reservation.settled = True
+            else:
+                self._requests -= 1
+                self._tokens -= total_tokens
+
+    def on_rate_limited(self, retry_after: Optional[float] = None) -> float:
+        """429 수신: 유효 한도 절반 + 쿨다운, 적용한 쿨다운(초) 반환"""
+        with self._lock:
+            self._consecutive_limits += 1
+            self.rpm = max(1.0, self.rpm * 0.5)
+            self.tpm = max(1000.0, self.tpm * 0.5)
+            self._requests = min(self._requests, 0.0)
+            cooldown = retry_after if retry_after is not None else min(60.0, 2.0 ** self._consecutive_limits)
+            self._cooldown_until = max(self._cooldown_until, time.monotonic() + cooldown)
+
+        RATE_LIMIT_HITS.labels(self.name).inc()
+        RATE_LIMIT_EFFECTIVE_RPM.labels(self.name).set(self.rpm)
+        return cooldown
+
+    def on_success(self) -> None:
+        """성공: 유효 RPM +1, TPM은 같은 비율로 회복 (설정값이 상한)"""
+        with self._lock:
+            self._consecutive_limits = 0
+            if self.rpm < self.max_rpm:
+                self.rpm = min(self.max_rpm, self.rpm + 1)
+                self.tpm = min(self.max_tpm, self.max_tpm * self.rpm / self.max_rpm)
+        RATE_LIMIT_EFFECTIVE_RPM.labels(self.name).set(self.rpm)
+
+    async def run(self, call: Callable[[], Awaitable[T]], estimated_tokens: int = 0) -> T:
+        """
+        한도 내에서 호출 실행, 429면 백오프 후 재시도 (최대 max_retries회)
+
+        Args:
+            call: 코루틴을 반환하는 함수 (재시도마다 새로 호출)
+            estimated_tokens: 입력+출력 예상 토큰
+        """
+        for attempt in range(self.max_retries + 1):
+            await self.acquire(estimated_tokens)
+            try:
+                result = await call()
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == self.max_retries:
+                    raise
+                cooldown = self.on_rate_limited(retry_after_seconds(e))
+                print(
+                    f"[{self.name}] rate limited (attempt {attempt + 1}), "
+                    f"cooldown {cooldown:.1f}s, effective RPM {self.rpm:.0f}"
+                )
+                continue
+            self.on_success()
+            return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "rpm": round(self.rpm, 1),
+                "tpm": int(self.tpm),
+                "max_rpm": self.max_rpm,
+                "max_tpm": int(self.max_tpm),
+                "cooldown_seconds": max(0.0, round(self._cooldown_until - time.monotonic(), 1)),
+            }
+
+
+# 프로세스 공용 인스턴스 (모든 작업/요청이 공유)
+gemini_rate_limiter = AdaptiveRateLimiter("gemini", settings.GEMINI_RPM, settings.GEMINI_TPM, settings.RATE_LIMIT_MAX_RETRIES)
+claude_rate_limiter = AdaptiveRateLimiter("claude", settings.CLAUDE_RPM, settings.CLAUDE_TPM, settings.RATE_LIMIT_MAX_RETRIES)
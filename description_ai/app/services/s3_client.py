@@ -0,0 +1,172 @@
+"""
+비동기 S3 클라이언트 (aiobotocore)
+
+boto3는 sync only라 이미지마다 스레드를 하나씩 잡고 GET이 끝날 때까지 기다렸고,
+동시 작업이 많으면 기본 스레드 풀 크기가 S3 동시성의 상한이 됐습니다.
+이 모듈은 이벤트 루프에서 직접 S3를 호출합니다.
+
+- 프로세스당 세션/클라이언트 1개 (커넥션 풀 S3_MAX_CONNECTIONS 공유)
+- 재시도: adaptive 모드, 최대 S3_MAX_ATTEMPTS회 (스로틀링 시 자동 감속)
+- 조건부 GET (If-None-Match): 캐시된 ETag와 같으면 304 → 본문 없이 None 반환
+  (HEAD 후 GET 2회 왕복 → 1회)
+- 범위 GET (Range): 헤더/앞부분만 필요할 때
+- S3_ENDPOINT_URL: MinIO 등 S3 호환 서버 (로컬 테스트, path-style 주소)
+
+사용 예시:
+    obj = await s3_client.get(bucket, key, if_none_match=cached_etag)
+    if obj is None:
+        ...  # 변경 없음 (캐시 사용)
+"""
+import asyncio
+import contextlib
+import time
+import unicodedata
+from dataclasses import dataclass
+from typing import Optional
+
+from aiobotocore.config import AioConfig
+from aiobotocore.session import get_session
+from botocore.exceptions import ClientError
+
+from app.config import settings
+from app.utils.metrics import S3_DOWNLOAD_BYTES, S3_DOWNLOAD_SECONDS, S3_REQUESTS
+
+
+@dataclass
+class S3Object:
+    """GET 결과"""
+    data: bytes
+    etag: str
+    content_range: Optional[str] = None  # 범위 GET일 때 "bytes 0-1023/52311"
+
+
+def parse_s3_path(s3_path: str) -> tuple[str, str]:
+    """s3://bucket/key 또는 bucket/key → (bucket, key), 한글 파일명 NFC 정규화"""
+    if s3_path.startswith('s3://'):
+        s3_path = s3_path[5:]
+
+    parts = s3_path.split('/', 1)
+    bucket = parts[0]
+    key = parts[1] if len(parts) > 1 else ''
+
+    # 한글 파일명 정규화 (NFC 통일 - cross-platform)
+    return bucket, unicodedata.normalize('NFC', key)
+
+
+def _is_not_modified(error: ClientError) -> bool:
+    status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+    return status == 304 or error.response.get("Error", {}).get("Code") in ("304", "NotModified")
+
+
+class AsyncS3Client:
+    """공유 aiobotocore S3 클라이언트 (첫 호출 시 생성, lifespan 종료 시 close)"""
+
+    def __init__(self):
+        self._stack: Optional[contextlib.AsyncExitStack] = None
+        self._client = None
+        self._lock = asyncio.Lock()
+        self._in_flight = 0
+
+    def _config(self) -> AioConfig:
+        return AioConfig(
+            max_pool_connections=settings.S3_MAX_CONNECTIONS,
+            connect_timeout=settings.S3_CONNECT_TIMEOUT_SECONDS,
+            read_timeout=settings.S3_READ_TIMEOUT_SECONDS,
+            retries={"max_attempts": settings.S3_MAX_ATTEMPTS, "mode": "adaptive"},
+            # S3 호환 로컬 서버는 가상 호스트 주소(bucket.host)를 지원하지 않는 경우가 많음
+            s3={"addressing_style": "path"} if settings.S3_ENDPOINT_URL else None
+        )
+
+    async def _get_client(self):
+        if self._client is not None:
+            return self._client
+        async with self._lock:
+            if self._client is None:
+                stack = contextlib.AsyncExitStack()
+                self._client = await stack.enter_async_context(get_session().create_client(
+                    's3',
+                    region_name=settings.AWS_DEFAULT_REGION,
+                    endpoint_url=settings.S3_ENDPOINT_URL or None,
+                    # 비어 있으면 기본 자격 증명 체인 (~/.aws, IAM role)
+                    aws_access_key_id=settings.AWS_ACCESS_KEY_ID or None,
+                    aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY or None,
+                    config=self._config()
+                ))
+                self._stack = stack
+            return self._client
+
+    async def get(
+        self,
+        bucket: str,
+        key: str,
+        byte_range: Optional[tuple[int, int]] = None,
+        if_none_match: Optional[str] = None
+    ) -> Optional[S3Object]:
+        """
+        객체 다운로드
+
+        Args:
+            bucket: 버킷
+            key: 키
+            byte_range: (시작, 끝) 바이트, 끝 포함 (None이면 전체)
+            if_none_match: 이 ETag와 같으면 본문을 받지 않음
+
+        Returns:
+            S3Object, 또는 if_none_match와 ETag가 같으면 None (304 Not Modified)
+        """
+        params = {"Bucket": bucket, "Key": key}
+        if byte_range is not None:
+            params["Range"] = f"bytes={byte_range[0]}-{byte_range[1]}"
+        if if_none_match:
+            params["IfNoneMatch"] = if_none_match
+
+        client = await self._get_client()
+        start = time.perf_counter()
+        self._in_flight += 1
+        try:
+            response = await client.get_object(**params)
+            async with response["Body"] as stream:
+                data = await stream.read()
+        except ClientError as e:
+            if if_none_match and _is_not_modified(e):
+                S3_REQUESTS.labels("get", "not_modified").inc()
+                return None
+            S3_REQUESTS.labels("get", "error").inc()
+            raise
+        finally:
+            self._in_flight -= 1
+
+        S3_REQUESTS.labels("get", "ok").inc()
+        S3_DOWNLOAD_SECONDS.observe(time.perf_counter() - start)
+        S3_DOWNLOAD_BYTES.observe(len(data))
+        return S3Object(data, response.get("ETag", ""), response.get("ContentRange"))
+
+    async def head(self, bucket: str, key: str) -> str:
+        """객체 ETag"""
+        client = await self._get_client()
+        try:
+            response = await client.head_object(Bucket=bucket, Key=key)
+        except ClientError:
+            S3_REQUESTS.labels("head", "error").inc()
+            raise
+        S3_REQUESTS.labels("head", "ok").inc()
+        return response.get("ETag", "")
+
+    async def close(self) -> None:
+        """커넥션 풀 정리 (lifespan 종료 시)"""
+        async with self._lock:
+            if self._stack is not None:
+                await self._stack.aclose()
+            self._stack = None
+            self._client = None
+
+    def stats(self) -> dict:
+        return {
+            "endpoint": settings.S3_ENDPOINT_URL or "aws",
+            "max_connections": settings.S3_MAX_CONNECTIONS,
+            "in_flight": self._in_flight,
+        }
+
+
+# 프로세스 공용 S3 클라이언트
+s3_client = AsyncS3Client()
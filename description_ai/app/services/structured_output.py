@@ -0,0 +1,123 @@
+"""
+구조화 출력 (JSON 모드) 검증
+
+- 응답 형식은 pydantic 모델(InspectionResponse / MultiInspectionResponse)로 지정
+  (Gemini: response_schema, Claude: 강제 tool 호출의 input_schema)
+- 스트리밍 응답은 JsonPrefixValidator로 청크마다 검사해, 유효한 JSON 문서의
+  앞부분이 될 수 없는 출력(마크다운 래퍼, 괄호 불일치, 문서 뒤 텍스트)이면
+  생성이 끝나기 전에 중단 → 호출부에서 재시도
+- 완료된 응답은 pydantic 모델로 검증 (enum, 값 범위, 필수 필드)
+- 결과는 inspect_structured_outputs_total{provider, operation, result}로 기록
+  (실패율 = result!="ok" / 전체)
+
+사용 예시:
+    validator = JsonPrefixValidator()
+    async for chunk in stream:
+        validator.feed(chunk.text)          # 잘못된 출력이면 StructuredOutputError
+    parsed = parse_structured(validator.finish(), InspectionResponse, "gemini", "analyze_image")
+"""
+from typing import Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+from app.utils.metrics import STRUCTURED_OUTPUTS
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+_OPENERS = {"{": "}", "[": "]"}
+# 문자열 밖에서 허용되는 문자 (숫자, true/false/null, 구분자)
+_SCALAR_CHARS = set("0123456789+-.eEtrufalsn:,")
+_WHITESPACE = set(" \t\r\n")
+
+
+class StructuredOutputError(ValueError):
+    """
+    구조화 출력 실패
+
+    stage:
+        stream     - 생성 도중 JSON이 될 수 없는 출력 감지 (재시도 가능)
+        truncated  - 출력 한도에 걸려 문서가 닫히지 않음 (같은 크기로 재시도해도 소용없음)
+        invalid    - JSON 파싱 또는 스키마 검증 실패 (재시도 가능)
+    """
+
+    def __init__(self, stage: str, message: str):
+        super().__init__(f"{stage}: {message}")
+        self.stage = stage
+
+    @property
+    def retryable(self) -> bool:
+        return self.stage != "truncated"
+
+
+class JsonPrefixValidator:
+    """스트리밍 텍스트가 JSON 객체 하나의 접두어인지 점진적으로 검사"""
+
+    def __init__(self):
+        self._parts: list[str] = []
+        self._stack: list[str] = []
+        self._started = False
+        self._closed = False
+        self._in_string = False
+        self._escape = False
+        self._length = 0
+
+    def feed(self, text: str) -> None:
+        """청크 추가 (JSON이 될 수 없으면 StructuredOutputError("stream"))"""
+        for offset, ch in enumerate(text):
+            position = self._length + offset
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                elif ch < " ":
+                    raise StructuredOutputError("stream", f"control character in string at {position}")
+                continue
+
+            if ch in _WHITESPACE:
+                continue
+            if self._closed:
+                raise StructuredOutputError("stream", f"text after JSON document at {position}: {ch!r}")
+            if not self._started:
+                if ch != "{":
+                    raise StructuredOutputError("stream", f"response does not start with a JSON object: {ch!r}")
+                self._started = True
+
+            if ch in _OPENERS:
+                self._stack.append(_OPENERS[ch])
+            elif ch in "}]":
+                if not self._stack or self._stack.pop() != ch:
+                    raise StructuredOutputError("stream", f"unbalanced {ch!r} at {position}")
+                if not self._stack:
+                    self._closed = True
+            elif ch == '"':
+                self._in_string = True
+            elif ch not in _SCALAR_CHARS:
+                raise StructuredOutputError("stream", f"unexpected {ch!r} at {position}")
+
+        self._parts.append(text)
+        self._length += len(text)
+
+    def finish(self) -> str:
+        """스트림 종료 후 전체 텍스트 (문서가 닫히지 않았으면 StructuredOutputError("truncated"))"""
+        if not self._closed:
+            raise StructuredOutputError("truncated", f"JSON document not closed after {self._length} chars")
+        return "".join(self._parts)
+
+
+def record_structured_output(provider: str, operation: str, result: str) -> None:
+    STRUCTURED_OUTPUTS.labels(provider, operation, result).inc()
+
+
+def parse_structured(text: str, model: Type[ModelT], provider: str, operation: str) -> ModelT:
+    """완료된 JSON 텍스트 → pydantic 모델 (실패 시 StructuredOutputError("invalid"))"""
+    try:
+        parsed = model.model_validate_json(text)
+    except ValidationError as e:
+        record_structured_output(provider, operation, "invalid")
+        raise StructuredOutputError("invalid", f"{e.error_count()} schema errors: {e.errors()[0]['msg']}") from e
+    record_structured_output(provider, operation, "ok")
+    return parsed
@@ -0,0 +1,36 @@
+"""
+공유 이미지 캐시 (설정 연결)
+
+캐시 구현은 저장소 루트의 shared/image_cache.py 하나를 gaussian_ai와 함께 사용합니다.
+같은 IMAGE_CACHE_DIR을 가리키면 같은 상품 사진의 전처리 결과를 서비스 간에 재사용합니다.
+캐시된 변형은 If-None-Match 조건부 GET으로 검증합니다 (image_preprocess.load).
+"""
+import sys
+import threading
+from pathlib import Path
+from typing import Optional
+
+from app.config import settings
+
+# 저장소 루트 (shared/ 패키지)
+_REPO_ROOT = str(Path(__file__).resolve().parents[3])
+if _REPO_ROOT not in sys.path:
+    sys.path.append(_REPO_ROOT)
+
+from shared.image_cache import ImageCache  # noqa: E402
+
+__all__ = ["ImageCache", "get_image_cache"]
+
+_cache: Optional[ImageCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_image_cache() -> Optional[ImageCache]:
+    """공용 캐시 인스턴스 (IMAGE_CACHE_ENABLED가 꺼져 있으면 None)"""
+    global _cache
+    if not settings.IMAGE_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ImageCache(settings.IMAGE_CACHE_DIR, settings.IMAGE_CACHE_MAX_MB * 1024 * 1024, log=print)
+        return _cache
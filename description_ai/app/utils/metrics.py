@@ -0,0 +1,305 @@
+"""
+Prometheus 메트릭 (GET /metrics 로 노출)
+
+Gemini 호출 지연/토큰 사용량, 프로바이더별 비용, S3 다운로드 시간/크기, DB 호출 지연,
+대기열 깊이/대기 시간, 작업 처리 시간
+"""
+import asyncio
+import functools
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# 버킷
+_FAST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+_CALL_BUCKETS = (0.25, 0.5, 1, 2, 3, 5, 7.5, 10, 15, 20, 30, 45, 60, 90)
+_JOB_BUCKETS = (1, 5, 10, 20, 30, 45, 60, 90, 120, 180, 300, 600)
+_BYTES_BUCKETS = tuple(2 ** i for i in range(14, 29, 2))  # 16KB ~ 256MB
+
+
+GEMINI_CALL_SECONDS = Histogram(
+    "inspect_gemini_call_seconds",
+    "Gemini generate_content latency",
+    ["operation"],
+    buckets=_CALL_BUCKETS
+)
+GEMINI_BATCH_IMAGES = Histogram(
+    "inspect_gemini_batch_images",
+    "Images sent per multi-image generate_content call",
+    buckets=(1, 2, 3, 4, 5, 6, 8, 10, 12, 16, 20, 30)
+)
+GEMINI_TOKENS = Counter(
+    "inspect_gemini_tokens_total",
+    "Gemini token usage by kind (prompt, output, thoughts, cached)",
+    ["operation", "kind"]
+)
+PROMPT_CACHE_REQUESTS = Counter(
+    "inspect_prompt_cache_requests_total",
+    "Gemini context cache lookups by result (hit, miss, refresh, fallback)",
+    ["result"]
+)
+STRUCTURED_OUTPUTS = Counter(
+    "inspect_structured_outputs_total",
+    "Structured (JSON) inspection responses by result "
+    "(ok, stream = aborted mid-stream, truncated, invalid = failed schema validation)",
+    ["provider", "operation", "result"]
+)
+LLM_COST_USD = Counter(
+    "inspect_llm_cost_usd_total",
+    "Estimated LLM spend at list prices",
+    ["provider", "operation"]
+)
+INSPECTOR_CALLS = Counter(
+    "inspect_inspector_calls_total",
+    "Inspection calls by provider and result (success, error, cached = no API call, cancelled = lost a hedge race)",
+    ["provider", "result"]
+)
+INSPECTOR_HEDGES = Counter(
+    "inspect_inspector_hedges_total",
+    "Backup requests sent to the other provider, by trigger (latency, error, circuit_open)",
+    ["reason"]
+)
+CIRCUIT_OPEN = Gauge(
+    "inspect_circuit_open",
+    "1 while the provider circuit breaker is open",
+    ["provider"]
+)
+RATE_LIMIT_WAIT_SECONDS = Histogram(
+    "inspect_rate_limit_wait_seconds",
+    "Time spent waiting for the shared LLM rate limiter",
+    ["provider"],
+    buckets=(0.001, 0.01, 0.1, 0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+)
+RATE_LIMIT_HITS = Counter(
+    "inspect_rate_limit_hits_total",
+    "429 / RESOURCE_EXHAUSTED responses",
+    ["provider"]
+)
+RATE_LIMIT_EFFECTIVE_RPM = Gauge(
+    "inspect_rate_limit_effective_rpm",
+    "Current adaptive RPM budget",
+    ["provider"]
+)
+S3_DOWNLOAD_SECONDS = Histogram(
+    "inspect_s3_download_seconds",
+    "Per-image S3 download time",
+    buckets=_FAST_BUCKETS
+)
+S3_DOWNLOAD_BYTES = Histogram(
+    "inspect_s3_download_bytes",
+    "Per-image S3 download size",
+    buckets=_BYTES_BUCKETS
+)
+S3_REQUESTS = Counter(
+    "inspect_s3_requests_total",
+    "S3 requests by operation and result (ok, not_modified, error)",
+    ["operation", "result"]
+)
+IMAGE_STAGE_SECONDS = Histogram(
+    "inspect_image_stage_seconds",
+    "Image load/preprocess time per pipeline stage "
+    "(cache, fetch, queue = waiting for a worker, decode, resize, enhance, encode, store)",
+    ["variant", "stage"],
+    buckets=_FAST_BUCKETS
+)
+IMAGE_CACHE_REQUESTS = Counter(
+    "inspect_image_cache_requests_total",
+    "Shared image cache lookups by result (hit, miss, stale)",
+    ["result"]
+)
+RESULT_CACHE_REQUESTS = Counter(
+    "inspect_result_cache_requests_total",
+    "Inspection result cache lookups per image by result (hit, miss, bypass)",
+    ["result"]
+)
+DEDUPE_IMAGES = Counter(
+    "inspect_dedupe_images_total",
+    "fault_desc images by dedupe role (representative = inspected, duplicate = result reused)",
+    ["role"]
+)
+DEADLINE_IMAGES = Counter(
+    "inspect_deadline_images_total",
+    "fault_desc images by deadline outcome (completed, skipped = not sent or cancelled at the deadline)",
+    ["outcome"]
+)
+FAULT_DESC_PARTIAL_WRITES = Counter(
+    "inspect_fault_desc_partial_writes_total",
+    "In-progress fault_description updates (written, coalesced = superseded before being written)",
+    ["result"]
+)
+DESCRIPTION_REQUESTS = Counter(
+    "inspect_description_requests_total",
+    "Description requests by outcome (cache_hit, coalesced, generated, sla_fallback, error)",
+    ["priority", "result"]
+)
+DESCRIPTION_BATCH_SIZE = Histogram(
+    "inspect_description_batch_size",
+    "Products per description generation call",
+    buckets=(1, 2, 3, 4, 6, 8, 12, 16)
+)
+DESCRIPTION_FIRST_TEXT_SECONDS = Histogram(
+    "inspect_description_first_text_seconds",
+    "Streaming description: time from request to the first generated text",
+    buckets=_CALL_BUCKETS
+)
+DB_CALL_SECONDS = Histogram(
+    "inspect_db_call_seconds",
+    "Database call latency",
+    ["operation"],
+    buckets=_FAST_BUCKETS
+)
+QUEUE_DEPTH = Gauge(
+    "inspect_queue_depth",
+    "fault_desc jobs waiting for a processing slot"
+)
+JOBS_RUNNING = Gauge(
+    "inspect_jobs_running",
+    "fault_desc jobs currently holding a processing slot"
+)
+QUEUE_WAIT_SECONDS = Histogram(
+    "inspect_queue_wait_seconds",
+    "Time a fault_desc job waited for a processing slot",
+    buckets=_JOB_BUCKETS
+)
+JOB_DURATION_SECONDS = Histogram(
+    "inspect_job_duration_seconds",
+    "fault_desc job duration (after acquiring a slot)",
+    ["status"],
+    buckets=_JOB_BUCKETS
+)
+JOB_SUBMISSIONS = Counter(
+    "inspect_job_submissions_total",
+    "POST /inspect/fault_desc outcomes (started, attached, superseded, completed)",
+    ["outcome"]
+)
+JOBS_CANCELLED = Counter(
+    "inspect_jobs_cancelled_total",
+    "Jobs cancelled while running (request, superseded)",
+    ["reason"]
+)
+
+
+def record_gemini_usage(operation: str, response) -> None:
+    """Gemini 응답의 usage_metadata를 토큰 카운터에 기록"""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+
+    token_fields = {
+        "prompt": "prompt_token_count",
+        "output": "candidates_token_count",
+        "thoughts": "thoughts_token_count",
+        "cached": "cached_content_token_count",
+    }
+    for kind, field in token_fields.items():
+        count = getattr(usage, field, None)
+        if count:
+            GEMINI_TOKENS.labels(operation, kind).inc(count)
+
+
+# USD / 1M 토큰 (입력, 출력, 캐시된 입력) - 모델명 prefix 매칭 (긴 것 우선), 공개 가격 기준
+MODEL_PRICING = {
+    "gemini-2.5-flash-lite": (0.10, 0.40, 0.025),
+    "gemini-2.5-flash": (0.30, 2.50, 0.075),
+    "gemini-2.5-pro": (1.25, 10.00, 0.31),
+    "gemini-2.0-flash": (0.10, 0.40, 0.025),
+    "gemini-1.5-flash": (0.075, 0.30, 0.01875),
+    "claude-3-haiku": (0.25, 1.25, 0.03),
+    "claude-3-5-haiku": (0.80, 4.00, 0.08),
+}
+
+_cost_totals: dict = {}
+_cost_lock = threading.Lock()
+
+
+def model_pricing(model: str) -> tuple[float, float, float]:
+    for prefix in sorted(MODEL_PRICING, key=len, reverse=True):
+        if model.startswith(prefix):
+            return MODEL_PRICING[prefix]
+    return (0.0, 0.0, 0.0)
+
+
+def record_llm_cost(
+    provider: str,
+    operation: str,
+    model: str,
+    input_tokens: int,
+    output_tokens: int,
+    cached_tokens: int = 0
+) -> float:
+    """
+    호출 비용(USD) 추정 후 프로바이더별로 누적
+
+    Args:
+        input_tokens: 캐시되지 않은 입력 토큰
+        output_tokens: 출력 토큰 (thoughts 포함)
+        cached_tokens: 캐시에서 읽은 입력 토큰
+    """
+    input_price, output_price, cached_price = model_pricing(model)
+    cost = (input_tokens * input_price + output_tokens * output_price + cached_tokens * cached_price) / 1_000_000
+    LLM_COST_USD.labels(provider, operation).inc(cost)
+    with _cost_lock:
+        _cost_totals[provider] = _cost_totals.get(provider, 0.0) + cost
+    return cost
+
+
+def llm_cost_totals() -> dict:
+    """프로세스 시작 이후 프로바이더별 누적 비용 (USD)"""
+    with _cost_lock:
+        return {provider: round(cost, 6) for provider, cost in _cost_totals.items()}
+
+
+# 라우팅 호출 1건 동안의 실제 프로바이더 API 호출 (inspector_router가 설정, 각 inspector가 기록)
+# 결과 캐시 적중/이미지 로드 실패로만 끝난 호출은 목록이 비어 있음
+_provider_calls: ContextVar[Optional[list]] = ContextVar("provider_calls", default=None)
+
+
+@contextmanager
+def track_provider_calls(calls: list):
+    """블록 안의 API 호출을 calls에 기록 (성공: 호출 시간(초), 실패: None)"""
+    token = _provider_calls.set(calls)
+    try:
+        yield calls
+    finally:
+        _provider_calls.reset(token)
+
+
+def record_provider_call(elapsed: Optional[float]) -> None:
+    """API 호출 1회 기록 (라우터 밖에서 호출되면 무시)"""
+    calls = _provider_calls.get()
+    if calls is not None:
+        calls.append(elapsed)
+
+
+def timed_db(func):
+    """DB 헬퍼 함수 지연 시간 기록 데코레이터 (label = 함수명)"""
+    histogram = DB_CALL_SECONDS.labels(func.__name__)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with histogram.time():
+            return func(*args, **kwargs)
+    return wrapper
+
+
+@asynccontextmanager
+async def queued_slot(semaphore: asyncio.Semaphore):
+    """대기열 깊이/대기 시간을 기록하며 처리 슬롯 획득"""
+    queued_at = time.perf_counter()
+    QUEUE_DEPTH.inc()
+    try:
+        await semaphore.acquire()
+    finally:
+        QUEUE_DEPTH.dec()
+
+    QUEUE_WAIT_SECONDS.observe(time.perf_counter() - queued_at)
+    JOBS_RUNNING.inc()
+    try:
+        yield
+    finally:
+        JOBS_RUNNING.dec()
+        semaphore.release()
@@ -0,0 +1,167 @@
+"""
+이미지별 검수 결과 영구 캐시 (SQLite)
+
+키 = sha256(이미지 내용 해시 + 모델 + 프롬프트 버전)
+- 이미지 내용 해시: 모델에 보내는 전처리된 바이트 기준
+- 프롬프트 버전: SYSTEM_PROMPT + 카테고리 프롬프트 해시
+→ 모델/프롬프트/전처리가 바뀌면 이전 결과를 반환하지 않음
+
+- 항목은 ttl_seconds 후 만료
+- 전체 크기 상한 초과 시 가장 오래 읽히지 않은 항목부터 삭제
+- 여러 워커 프로세스가 같은 DB 파일을 공유 가능 (WAL 모드, 짧은 트랜잭션)
+
+저장만 담당: 무엇을 조회하고 저장할지는 호출부가 결정합니다.
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from app.config import settings
+
+
+def result_key(image_sha256: str, model: str, prompt_version: str) -> str:
+    return hashlib.sha256(f"{image_sha256}:{model}:{prompt_version}".encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """검수 결과(JSON 텍스트) SQLite 캐시 (TTL + LRU 크기 상한)"""
+
+    def __init__(self, path: Path, max_bytes: int, ttl_seconds: int):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS inspection_results (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_inspection_results_accessed ON inspection_results (accessed_at)"
+        )
+        self._conn.commit()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """존재하고 만료되지 않은 키의 결과 (최근 사용으로 표시)"""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+
+        now = time.time()
+        placeholders = ",".join("?" * len(keys))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, payload, created_at FROM inspection_results WHERE key IN ({placeholders})",
+                keys
+            ).fetchall()
+
+            found = {key: payload for key, payload, created_at in rows if now - created_at < self.ttl_seconds}
+            expired = [key for key, _, created_at in rows if key not in found]
+            if found:
+                self._conn.executemany(
+                    "UPDATE inspection_results SET accessed_at = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+            if expired:
+                self._conn.executemany("DELETE FROM inspection_results WHERE key = ?", [(key,) for key in expired])
+            self._conn.commit()
+
+        return found
+
+    def get(self, key: str) -> Optional[str]:
+        return self.get_many([key]).get(key)
+
+    def put(self, key: str, model: str, prompt_version: str, payload: str) -> None:
+        """결과 저장 (있으면 교체), 크기 상한을 넘으면 오래된 항목 삭제"""
+        now = time.time()
+        size = len(payload.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO inspection_results "
+                "(key, model, prompt_version, payload, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, model, prompt_version, payload, size, now, now)
+            )
+            self._conn.commit()
+            total = self._total_bytes()
+
+        if total > self.max_bytes:
+            self.evict()
+
+    def _total_bytes(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM inspection_results").fetchone()[0]
+
+    def evict(self) -> int:
+        """만료 항목 삭제 후, max_bytes의 90% 이하가 될 때까지 LRU 순으로 삭제 (삭제한 행 수 반환)"""
+        with self._lock:
+            deleted = self._conn.execute(
+                "DELETE FROM inspection_results WHERE created_at < ?",
+                (time.time() - self.ttl_seconds,)
+            ).rowcount
+
+            total = self._total_bytes()
+            target = int(self.max_bytes * 0.9)
+            if total > target:
+                stale = []
+                for key, size in self._conn.execute(
+                    "SELECT key, size FROM inspection_results ORDER BY accessed_at"
+                ):
+                    if total <= target:
+                        break
+                    stale.append((key,))
+                    total -= size
+                self._conn.executemany("DELETE FROM inspection_results WHERE key = ?", stale)
+                deleted += len(stale)
+            self._conn.commit()
+
+        if deleted:
+            print(f"Result cache evicted {deleted} entries")
+        return deleted
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM inspection_results"
+            ).fetchone()
+        return {
+            "path": str(self.path),
+            "entries": count,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+
+_cache: Optional[ResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """공용 캐시 인스턴스 (RESULT_CACHE_ENABLED가 꺼져 있으면 None)"""
+    global _cache
+    if not settings.RESULT_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache(
+                settings.RESULT_CACHE_PATH,
+                settings.RESULT_CACHE_MAX_MB * 1024 * 1024,
+                settings.RESULT_CACHE_TTL_HOURS * 3600
+            )
+        return _cache
@@ -0,0 +1,7 @@
+-- fault_description 완료 기록 멱등 키 (init.sql로 만든 기존 DB용)
+-- complete_fault_description()은 같은 completion_key를 한 번만 반영해
+-- 재시도 시 product.job_count가 중복 증가하지 않도록 함
+USE `marketplace`;
+
+ALTER TABLE `fault_description`
+    ADD COLUMN `completion_key` VARCHAR(64) NULL AFTER `error_msg`;
@@ -0,0 +1,7 @@
+-- fault_description 입력 지문 (init.sql로 만든 기존 DB용)
+-- 같은 입력(S3 ETag + 제품명 + 모델)으로 이미 DONE인 제품은
+-- /inspect/fault_desc 재제출 시 다시 분석하지 않고 바로 완료로 응답
+USE `marketplace`;
+
+ALTER TABLE `fault_description`
+    ADD COLUMN `input_fingerprint` CHAR(64) NULL AFTER `error_msg`;
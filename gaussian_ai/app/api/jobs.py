@@ -2,9 +2,10 @@
 Job management API endpoints
 """
 import asyncio
+import shutil
 from pathlib import Path
-from typing import List
-from fastapi import APIRouter, HTTPException, Query, BackgroundTasks, status
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Header, Response, status
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 
@@ -15,20 +16,23 @@ from app.db.mysql_db import (
     create_job_3dgs,
     update_job_3dgs_status,
     increment_job_count_and_activate,
-    update_product_sell_status
+    update_product_sell_status,
+    get_product_seller
 )
 from app.schemas.job import JobCreateRequest, JobCreateResponse, JobStatusResponse, JobListResponse
-from app.utils.s3_utils import download_s3_images
+from app.utils.s3_utils import download_s3_images, head_etags
+from app.utils.job_registry import recon_registry, input_fingerprint
+from app.utils.resource_monitor import start_job_sampler, stop_job_sampler, load_job_resources
+from app.utils.metrics import StageTimer, queued_slot, PLY_SERVED_BYTES, JOB_SUBMISSIONS, STAGE_TIMEOUTS
 from app.utils.logger import setup_logger
 from app.core.colmap import COLMAPPipeline
 from app.core.gaussian_splatting import GaussianSplattingTrainer
+from app.core.scheduler import job_scheduler, estimate_cost
+from app.core.pipeline import WatchdogTimeout, run_stage, stage_budget
 
 logger = setup_logger(__name__)
 router = APIRouter(prefix="/recon", tags=["reconstruction"])
 
-# Job processing semaphore
-job_semaphore = asyncio.Semaphore(settings.MAX_CONCURRENT_JOBS)
-
 
 def get_db() -> Session:
     """Get database session"""
@@ -40,16 +44,30 @@ def get_db() -> Session:
 
 
 @router.post("/jobs", status_code=status.HTTP_202_ACCEPTED)
-async def create_job(request: JobCreateRequest, background_tasks: BackgroundTasks):
+async def create_job(
+    request: JobCreateRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
     """
     Create new reconstruction job with S3 images
 
+    Idempotent per product_id (see app/utils/job_registry.py):
+    - same inputs (S3 ETags + iterations) while running → attach to the running job
+    - same inputs as the last completed job → 200 with the existing result
+    - different inputs while running → the running job is cancelled and replaced
+
+    request.priority picks the scheduling class and request.seller_id (or
+    product.member_id) the fair-share group (see app/core/scheduler.py).
+
     Args:
         request: Job creation request with product_id and S3 image paths
-        background_tasks: FastAPI BackgroundTasks
+        response: Response (status code 200 for an already completed job)
+        idempotency_key: Optional Idempotency-Key header (retries skip the input HEADs)
 
     Returns:
-        202 Accepted: 작업이 큐에 추가됨
+        202 Accepted: 작업이 큐에 추가됨 (or attached to the running job)
+        200 OK: identical inputs were already reconstructed
     """
     # Validate image count (IMPLEMENT.md: 3~20장)
     image_count = len(request.s3_images)
@@ -58,11 +76,37 @@ async def create_job(request: JobCreateRequest, background_tasks: BackgroundTask
     if image_count > settings.MAX_IMAGES:
         raise HTTPException(400, f"이미지 {settings.MIN_IMAGES}~{settings.MAX_IMAGES}장만 허용합니다. (현재: {image_count}장)")
 
+    # Retry of a submission that is still running: no need to HEAD the inputs again
+    entry = recon_registry.find_by_key(request.product_id, idempotency_key)
+    if entry is not None:
+        return _job_accepted(request.product_id, "attached")
+
+    fingerprint = input_fingerprint(await head_etags(request.s3_images), iterations=request.iterations)
+
+    if recon_registry.get(request.product_id) is None:
+        db = SessionLocal()
+        try:
+            previous = crud.get_job_by_product_id(db, request.product_id)
+        finally:
+            db.close()
+        if previous is not None and previous.status == "COMPLETED" and previous.input_fingerprint == fingerprint:
+            JOB_SUBMISSIONS.labels("completed").inc()
+            logger.info(f"Job for {request.product_id} already completed with identical inputs")
+            response.status_code = status.HTTP_200_OK
+            return {
+                "product_id": request.product_id,
+                "status": "COMPLETED",
+                "message": "동일한 입력으로 이미 완료된 작업입니다.",
+                "viewer_url": f"{settings.BASE_URL}/v/{request.product_id}"
+            }
+
     async def _process_job_background():
         """백그라운드에서 S3 다운로드 및 재구성 처리"""
         try:
-            # Create job directory
+            # Create job directory (previous run's files belong to other inputs)
             job_dir = settings.DATA_DIR / request.product_id
+            if job_dir.exists():
+                await asyncio.to_thread(shutil.rmtree, job_dir, True)
             upload_dir = job_dir / "upload" / "images"
             upload_dir.mkdir(parents=True, exist_ok=True)
 
@@ -95,6 +139,9 @@ async def create_job(request: JobCreateRequest, background_tasks: BackgroundTask
                 update_product_sell_status(request.product_id, 'FAILED')
                 return
 
+            # Fair-share key: the seller's other jobs share one queue budget
+            seller_id = request.seller_id or await asyncio.to_thread(get_product_seller, request.product_id)
+
             # Create SQLite database record (internal tracking)
             db = SessionLocal()
             try:
@@ -102,7 +149,10 @@ async def create_job(request: JobCreateRequest, background_tasks: BackgroundTask
                     db=db,
                     product_id=request.product_id,
                     image_count=downloaded_count,
-                    iterations=request.iterations
+                    iterations=request.iterations,
+                    input_fingerprint=fingerprint,
+                    priority=request.priority,
+                    seller_id=seller_id
                 )
                 db.commit()
             finally:
@@ -111,6 +161,11 @@ async def create_job(request: JobCreateRequest, background_tasks: BackgroundTask
             # Start reconstruction processing (always resize images to 1600px)
             await process_job(request.product_id)
 
+        except asyncio.CancelledError as e:
+            # DELETE /recon/jobs/{id}, superseding submission or shutdown
+            _record_cancellation(request.product_id, e.args[0] if e.args else "Cancelled")
+            raise
+
         except Exception as e:
             # 백그라운드 태스크에서 예상치 못한 에러 발생
             logger.error(f"Background task failed for product_id={request.product_id}: {str(e)}", exc_info=True)
@@ -122,15 +177,62 @@ async def create_job(request: JobCreateRequest, background_tasks: BackgroundTask
             except Exception as db_error:
                 logger.error(f"Failed to update DB with error status: {str(db_error)}")
 
-    # 백그라운드 태스크 등록 및 즉시 응답
-    background_tasks.add_task(_process_job_background)
+    # 작업 등록 (같은 입력이 실행 중이면 합류, 다른 입력이면 기존 작업 취소 후 교체) 및 즉시 응답
+    outcome, _ = await recon_registry.submit(
+        request.product_id, fingerprint, idempotency_key, _process_job_background
+    )
+
+    logger.info(f"Job {outcome}: product_id={request.product_id}")
+
+    return _job_accepted(request.product_id, outcome)
+
+
+def _record_cancellation(product_id: str, reason: str) -> None:
+    """Mark a cancelled job (sell_status is left alone: the product was deleted or resubmitted)"""
+    logger.info(f"Job {product_id} cancelled: {reason}")
+    db = SessionLocal()
+    try:
+        crud.update_job_status(db, product_id, "CANCELLED", error_message=reason)
+        crud.update_job_step(db, product_id, "CANCELLED", 0)
+        db.commit()
+    except Exception as db_error:
+        logger.error(f"Failed to record cancellation for {product_id}: {db_error}")
+    finally:
+        db.close()
+    update_job_3dgs_status(product_id, 'FAILED', error_msg=f"Cancelled: {reason}")
+
+
+@router.delete("/jobs/{product_id}")
+async def cancel_job(product_id: str):
+    """
+    Cancel a queued or running reconstruction job
+
+    A queued job leaves the queue; a running one has its COLMAP/train.py
+    process group terminated (SIGTERM, then SIGKILL after
+    SUBPROCESS_TERM_GRACE_SECONDS) and its processing slot released.
+
+    Args:
+        product_id: Product UUID
+
+    Returns:
+        404 if no job is queued or running for product_id
+    """
+    if not await recon_registry.cancel(product_id, "Cancelled by request"):
+        raise HTTPException(404, "No queued or running job for this product")
+    return {"product_id": product_id, "status": "CANCELLED"}
 
-    logger.info(f"Job queued: product_id={request.product_id}")
 
+def _job_accepted(product_id: str, outcome: str) -> dict:
+    """202 response body for a started / attached / superseding submission"""
+    if outcome == "attached":
+        message = "동일한 입력의 작업이 이미 진행 중입니다. job_3dgs 테이블에서 진행 상황을 확인할 수 있습니다."
+    else:
+        message = "재구성 작업이 큐에 추가되었습니다. job_3dgs 테이블에서 진행 상황을 확인할 수 있습니다."
     return {
-        "product_id": request.product_id,
+        "product_id": product_id,
         "status": "QUEUED",
-        "message": f"재구성 작업이 큐에 추가되었습니다. job_3dgs 테이블에서 진행 상황을 확인할 수 있습니다."
+        "submission": outcome,
+        "message": message
     }
 
 
@@ -151,27 +253,24 @@ async def get_job_status(product_id: str):
         if not job:
             raise HTTPException(404, "Job not found")
 
-        # Calculate queue position if PENDING
+        # Calculate queue position if PENDING (scheduler dispatch order, not created_at)
         queue_position = None
+        estimated_wait_seconds = None
         if job.status == "PENDING":
-            # Count how many jobs are ahead in the queue
-            pending_jobs = crud.get_pending_jobs(db)
-            for idx, pending_job in enumerate(pending_jobs):
-                if pending_job.product_id == product_id:
-                    queue_position = idx + 1
-                    break
-
-            # Count currently running jobs
-            running_count = len(crud.get_running_jobs(db))
+            entry = job_scheduler.position(product_id)
+            running_count = len(job_scheduler.running())
 
             # Add queue info to log
-            if queue_position:
+            if entry:
+                queue_position = entry["position"]
+                estimated_wait_seconds = entry["estimated_wait_seconds"]
                 if queue_position == 1 and running_count < settings.MAX_CONCURRENT_JOBS:
                     log_tail = [f">> [QUEUE] Job is next in queue. Starting soon..."]
                 else:
                     log_tail = [
-                        f">> [QUEUE] Position in queue: {queue_position}",
+                        f">> [QUEUE] Position in queue: {queue_position} ({entry['priority']})",
                         f">> [QUEUE] Currently running: {running_count}/{settings.MAX_CONCURRENT_JOBS} jobs",
+                        f">> [QUEUE] Estimated wait: ~{estimated_wait_seconds // 60} min",
                         f">> [QUEUE] Waiting for processing slot..."
                     ]
             else:
@@ -203,54 +302,96 @@ async def get_job_status(product_id: str):
             started_at=job.started_at.isoformat() if job.started_at else None,
             completed_at=job.completed_at.isoformat() if job.completed_at else None,
             queue_position=queue_position,
+            estimated_wait_seconds=estimated_wait_seconds,
             image_count=job.image_count,
             iterations=job.iterations,
             colmap_registered_images=job.colmap_registered_images,
             colmap_points=job.colmap_points,
             processing_time_seconds=job.processing_time_seconds,
-            error_stage=job.error_stage
+            error_stage=job.error_stage,
+            peak_gpu_memory_mb=job.peak_gpu_memory_mb,
+            peak_gpu_utilization_percent=job.peak_gpu_utilization_percent,
+            peak_rss_mb=job.peak_rss_mb,
+            peak_cpu_percent=job.peak_cpu_percent
         )
     finally:
         db.close()
 
 
+@router.get("/jobs/{product_id}/resources")
+async def get_job_resources(
+    product_id: str,
+    limit: int = Query(600, ge=1, le=settings.RESOURCE_SAMPLE_BUFFER)
+):
+    """
+    Get sampled resource usage time series for a job
+
+    Samples (GPU memory/utilization, CPU/RSS of COLMAP or train.py) are taken
+    every RESOURCE_SAMPLE_INTERVAL seconds while the job is running.
+
+    Args:
+        product_id: Product UUID
+        limit: Return only the most recent N samples
+
+    Returns:
+        Backend name, peak values and samples ({t, gpus, cpu_percent, rss_mb})
+    """
+    resources = load_job_resources(product_id, limit=limit)
+    if resources is None:
+        raise HTTPException(404, "No resource samples for this job")
+    return resources
+
+
 @router.get("/queue")
 async def get_queue_status():
     """
     Get current queue status
 
+    Pending jobs are listed in scheduler dispatch order (priority class, then
+    per-seller fair share with shortest-job-first and aging).
+
     Returns:
         Queue information including running and pending jobs
     """
+    running_jobs = job_scheduler.running()
+    pending_jobs = job_scheduler.queue()
+
+    return {
+        "max_concurrent": settings.MAX_CONCURRENT_JOBS,
+        "running_count": len(running_jobs),
+        "pending_count": len(pending_jobs),
+        "running_jobs": running_jobs,
+        "pending_jobs": pending_jobs
+    }
+
+
+@router.get("/stages/stats")
+async def get_stage_stats():
+    """
+    Typical pipeline stage durations and the current budgets
+
+    Use p95 / seconds_per_image_p95 to tune STAGE_BUDGETS; budget_used_p95
+    close to 1.0 means the budget is about to kill healthy jobs.
+
+    Returns:
+        Per-stage stats from stage_runs and the configured budget formulas
+    """
     db = SessionLocal()
     try:
-        running_jobs = crud.get_running_jobs(db)
-        pending_jobs = crud.get_pending_jobs(db)
-
-        return {
-            "max_concurrent": settings.MAX_CONCURRENT_JOBS,
-            "running_count": len(running_jobs),
-            "pending_count": len(pending_jobs),
-            "running_jobs": [
-                {
-                    "product_id": job.product_id,
-                    "created_at": job.created_at.isoformat() if job.created_at else None,
-                    "started_at": job.started_at.isoformat() if job.started_at else None
-                }
-                for job in running_jobs
-            ],
-            "pending_jobs": [
-                {
-                    "product_id": job.product_id,
-                    "position": idx + 1,
-                    "created_at": job.created_at.isoformat() if job.created_at else None
-                }
-                for idx, job in enumerate(pending_jobs)
-            ]
-        }
+        stats = crud.get_stage_duration_stats(db)
     finally:
         db.close()
 
+    return {
+        "stages": stats,
+        "budgets": {
+            stage: {"base": base, "per_image": per_image, "per_1k_iterations": per_1k_iterations}
+            for stage, (base, per_image, per_1k_iterations) in settings.STAGE_BUDGETS.items()
+        },
+        "budget_scale": settings.STAGE_BUDGET_SCALE,
+        "stall_timeout_seconds": settings.STALL_TIMEOUT_SECONDS
+    }
+
 
 @router.get("/pub/{product_id}/cloud.ply")
 async def get_point_cloud(
@@ -315,7 +456,9 @@ async def get_point_cloud(
                 raise HTTPException(404, "Point cloud file not found")
 
         # Get file size for logging
-        file_size_mb = ply_file.stat().st_size / (1024 * 1024)
+        file_size = ply_file.stat().st_size
+        file_size_mb = file_size / (1024 * 1024)
+        PLY_SERVED_BYTES.labels(quality).observe(file_size)
         logger.info(f"Serving PLY file for {product_id}: {ply_file.name} ({file_size_mb:.2f} MB, quality={quality})")
 
         return FileResponse(
@@ -354,15 +497,45 @@ async def process_job(product_id: str):
     """
     Background job processing pipeline with step tracking
 
+    Waits for a slot from the priority / fair-share scheduler (priority,
+    seller_id and estimated cost come from the job record). Cancellation
+    (asyncio) propagates into run_command, which terminates the running
+    COLMAP/train.py process group before the slot is released.
+
+    Each external stage runs within its wall-clock budget (stage_budget,
+    scaled by image count / iterations) and run_command kills commands that
+    stop producing output; either marks the job FAILED with error_stage set.
+    Stage durations are stored in stage_runs (GET /recon/stages/stats).
+
     Args:
         product_id: Product UUID
     """
-    async with job_semaphore:
+    db = SessionLocal()
+    try:
+        job = crud.get_job_by_product_id(db, product_id)
+        image_count = job.image_count if job else 0
+        iterations = (job.iterations if job else None) or settings.TRAINING_ITERATIONS
+        ticket = job_scheduler.ticket(
+            product_id,
+            priority=(job.priority if job else None) or "listing",
+            seller_id=job.seller_id if job else None,
+            cost=estimate_cost(job.image_count, job.iterations) if job else None
+        )
+    finally:
+        db.close()
+
+    async with queued_slot(ticket):
         db = SessionLocal()
         job_dir = settings.DATA_DIR / product_id
         log_dir = job_dir / "logs"
         log_dir.mkdir(parents=True, exist_ok=True)
         log_file_path = log_dir / "process.log"
+        sampler = start_job_sampler(product_id)
+        stages = StageTimer()
+        budgets = {
+            stage: stage_budget(stage, image_count, iterations)
+            for stage in settings.STAGE_BUDGETS
+        }
 
         try:
             # Update status to PROCESSING (SQLite)
@@ -382,46 +555,60 @@ async def process_job(product_id: str):
                 # This saves 1-2 seconds per job
 
                 # Initialize COLMAP pipeline
-                colmap = COLMAPPipeline(job_dir)
+                colmap = COLMAPPipeline(job_dir, sampler=sampler)
 
                 # Step 1: Feature extraction
+                stages.enter("COLMAP_FEAT")
                 crud.update_job_step(db, product_id, "COLMAP_FEAT", 15)
                 db.commit()
                 log_file.write(">> [COLMAP_FEAT] Extracting features...\n")
                 log_file.flush()
                 colmap.database_path.parent.mkdir(parents=True, exist_ok=True)
-                await colmap.extract_features(log_file)
+                await run_stage("COLMAP_FEAT", colmap.extract_features(log_file), budgets["COLMAP_FEAT"])
 
                 # Step 2: Feature matching
+                stages.finish()  # time spent preempted is not stage time
+                await ticket.checkpoint(log_file)
+                stages.enter("COLMAP_MATCH")
                 crud.update_job_step(db, product_id, "COLMAP_MATCH", 30)
                 db.commit()
                 log_file.write(">> [COLMAP_MATCH] Matching features...\n")
                 log_file.flush()
-                await colmap.match_features(log_file)
+                await run_stage("COLMAP_MATCH", colmap.match_features(log_file), budgets["COLMAP_MATCH"])
 
                 # Step 3: Sparse reconstruction
+                stages.finish()
+                await ticket.checkpoint(log_file)
+                stages.enter("COLMAP_MAP")
                 crud.update_job_step(db, product_id, "COLMAP_MAP", 45)
                 db.commit()
                 log_file.write(">> [COLMAP_MAP] Reconstructing sparse model...\n")
                 log_file.flush()
-                model_path = await colmap.reconstruct(log_file)
+                model_path = await run_stage("COLMAP_MAP", colmap.reconstruct(log_file), budgets["COLMAP_MAP"])
 
                 # Step 4: Undistort images
+                stages.finish()
+                await ticket.checkpoint(log_file)
+                stages.enter("COLMAP_UNDIST")
                 crud.update_job_step(db, product_id, "COLMAP_UNDIST", 55)
                 db.commit()
                 log_file.write(">> [COLMAP_UNDIST] Undistorting images...\n")
                 log_file.flush()
-                work_dir = await colmap.undistort_images(model_path, log_file)
+                work_dir = await run_stage(
+                    "COLMAP_UNDIST", colmap.undistort_images(model_path, log_file), budgets["COLMAP_UNDIST"]
+                )
 
                 # Step 5: Convert to text format
+                stages.enter("COLMAP_CONVERT")
                 log_file.write(">> [COLMAP] Converting to text format...\n")
                 log_file.flush()
-                await colmap.convert_to_text(work_dir / "sparse" / "0", log_file)
+                await run_stage("COLMAP_CONVERT", colmap.convert_to_text(work_dir / "sparse" / "0", log_file), budgets["COLMAP_CONVERT"])
 
                 # Train/test split removed - not needed without evaluation
                 # Saves 5-10 seconds and disk space
 
                 # Step 5.5: Validate COLMAP reconstruction quality
+                stages.enter("COLMAP_VALIDATE")
                 crud.update_job_step(db, product_id, "COLMAP_VALIDATE", 60)
                 db.commit()
                 log_file.write(">> [COLMAP_VALIDATE] Validating reconstruction quality...\n")
@@ -441,24 +628,27 @@ async def process_job(product_id: str):
                 log_file.flush()
 
                 # Step 6: Gaussian Splatting training
+                stages.finish()
+                await ticket.checkpoint(log_file)
+                stages.enter("GS_TRAIN")
                 crud.update_job_step(db, product_id, "GS_TRAIN", 65)
                 db.commit()
                 log_file.write(">> [GS_TRAIN] Starting Gaussian Splatting training...\n")
                 log_file.flush()
 
                 output_dir = job_dir / "output"
-                gs_trainer = GaussianSplattingTrainer(work_dir, output_dir)
-
-                # Get iterations from job record
-                job_record = crud.get_job_by_product_id(db, product_id)
-                iterations = job_record.iterations if job_record else settings.TRAINING_ITERATIONS
+                gs_trainer = GaussianSplattingTrainer(work_dir, output_dir, sampler=sampler)
 
-                iteration_dir = await gs_trainer.train(log_file, iterations=iterations)
+                # iterations from the job record (read before queueing)
+                iteration_dir = await run_stage(
+                    "GS_TRAIN", gs_trainer.train(log_file, iterations=iterations), budgets["GS_TRAIN"]
+                )
 
                 # Evaluation removed - saves 30-60s per job
                 # Users can judge quality directly in 3D viewer
 
                 # Step 7: Post-processing
+                stages.enter("EXPORT_PLY")
                 crud.update_job_step(db, product_id, "EXPORT_PLY", 95)
                 db.commit()
                 log_file.write(">> [EXPORT_PLY] Post-processing results...\n")
@@ -478,6 +668,7 @@ async def process_job(product_id: str):
                                 break
 
                 # Generate lightweight versions for faster loading
+                stages.enter("OPTIMIZE")
                 log_file.write(">> [OPTIMIZE] Creating lightweight PLY versions...\n")
                 log_file.flush()
 
@@ -501,6 +692,7 @@ async def process_job(product_id: str):
                     log_file.flush()
 
                 # Update job as completed (SQLite)
+                stages.finish()
                 crud.update_job_status(db, product_id, "COMPLETED")
                 crud.update_job_step(db, product_id, "DONE", 100)
                 db.commit()
@@ -517,19 +709,35 @@ async def process_job(product_id: str):
                 log_file.flush()
                 logger.info(f"Job {product_id} completed successfully")
 
+        except asyncio.CancelledError as e:
+            # Not a stage failure; the job task records the cancellation (_record_cancellation)
+            stages.abandon()
+            if log_file_path.exists():
+                with open(log_file_path, 'a') as log_file:
+                    log_file.write(f"\n>> [CANCELLED] {e.args[0] if e.args else 'Cancelled'}\n")
+            raise
+
         except Exception as e:
             logger.error(f"Job {product_id} failed: {str(e)}")
+            error_stage = stages.current or "PIPELINE"
+            if isinstance(e, WatchdogTimeout):
+                # Stage budget exceeded or command stalled; its process group is already gone
+                STAGE_TIMEOUTS.labels(error_stage, e.kind).inc()
+                stages.fail(e.kind)
+            else:
+                stages.fail()
 
             # Log error to database (SQLite)
             crud.log_error(
                 db, product_id,
-                stage="PIPELINE",
+                stage=error_stage,
                 error_type=type(e).__name__,
                 error_message=str(e)
             )
             crud.update_job_status(
                 db, product_id, "FAILED",
-                error_message=str(e)
+                error_message=str(e),
+                error_stage=error_stage
             )
             crud.update_job_step(db, product_id, "ERROR", 0)
             db.commit()
@@ -539,7 +747,7 @@ async def process_job(product_id: str):
             # - 이미지 다운로드 실패 (이미 /recon/jobs에서 처리)
             # - COLMAP 특징점 부족 (현재 처리)
             # - Gaussian Splatting 학습 실패 (CUDA 에러, 메모리 부족 등)
-            # - 타임아웃
+            # - 타임아웃 (단계 예산 초과 / 출력 없음: WatchdogTimeout)
             update_job_3dgs_status(product_id, 'FAILED', error_msg=str(e))
 
             # MySQL: product.sell_status = 'FAILED'
@@ -550,4 +758,17 @@ async def process_job(product_id: str):
                 with open(log_file_path, 'a') as log_file:
                     log_file.write(f"\n>> [ERROR] {str(e)}\n")
         finally:
+            # Persist resource time series and record peaks on the job
+            await stop_job_sampler(product_id)
+            if sampler.peaks:
+                try:
+                    crud.update_job_resource_peaks(db, product_id, sampler.peaks)
+                except Exception as peak_error:
+                    logger.warning(f"Failed to record resource peaks for {product_id}: {peak_error}")
+            # Stage durations for budget tuning
+            if stages.records:
+                try:
+                    crud.record_stage_runs(db, product_id, stages.records, budgets, image_count, iterations)
+                except Exception as stage_error:
+                    logger.warning(f"Failed to record stage durations for {product_id}: {stage_error}")
             db.close()
@@ -1,15 +1,53 @@
 """
 Application configuration settings
 """
+import json
 import os
+import tempfile
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional, Tuple
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
 
+def _stage_budgets(defaults: Dict[str, Tuple[float, float, float]]) -> Dict[str, Tuple[float, float, float]]:
+    """
+    Default stage budgets overridden by the STAGE_BUDGETS env var
+
+    Raises:
+        ValueError: STAGE_BUDGETS is not a JSON object of known stage names to
+            [base seconds, seconds per image, seconds per 1000 iterations]
+    """
+    raw = os.getenv("STAGE_BUDGETS", "").strip()
+    if not raw:
+        return dict(defaults)
+
+    try:
+        overrides = json.loads(raw)
+    except ValueError as e:
+        raise ValueError(f"STAGE_BUDGETS is not valid JSON ({e}): {raw!r}") from None
+    if not isinstance(overrides, dict):
+        raise ValueError(f"STAGE_BUDGETS must be a JSON object like '{{\"COLMAP_MAP\": [300, 30, 0]}}', got {raw!r}")
+
+    budgets = dict(defaults)
+    for stage, budget in overrides.items():
+        if stage not in defaults:
+            raise ValueError(f"STAGE_BUDGETS: unknown stage {stage!r} (stages: {', '.join(defaults)})")
+        if (
+            not isinstance(budget, list)
+            or len(budget) != 3
+            or not all(isinstance(v, (int, float)) and not isinstance(v, bool) and v >= 0 for v in budget)
+        ):
+            raise ValueError(
+                f"STAGE_BUDGETS[{stage!r}] must be [base seconds, seconds per image, "
+                f"seconds per 1000 iterations] with non-negative numbers, got {budget!r}"
+            )
+        budgets[stage] = tuple(float(v) for v in budget)
+    return budgets
+
+
 class Settings:
     """Application settings and configuration"""
 
@@ -46,8 +84,49 @@ class Settings:
     # CORS
     CORS_ORIGINS: list = ["*"]
 
+    # S3 (optional: S3-compatible endpoint such as MinIO for local testing)
+    S3_ENDPOINT_URL: Optional[str] = os.getenv("S3_ENDPOINT_URL")
+    S3_MAX_POOL_CONNECTIONS: int = int(os.getenv("S3_MAX_POOL_CONNECTIONS", "32"))
+    S3_MAX_ATTEMPTS: int = int(os.getenv("S3_MAX_ATTEMPTS", "5"))  # adaptive retry mode
+    S3_DOWNLOAD_CONCURRENCY: int = int(os.getenv("S3_DOWNLOAD_CONCURRENCY", "16"))  # parallel GETs per job
+
+    # Content-addressed image cache (share IMAGE_CACHE_DIR with description_ai)
+    IMAGE_CACHE_ENABLED: bool = os.getenv("IMAGE_CACHE_ENABLED", "True").lower() == "true"
+    IMAGE_CACHE_DIR: Path = Path(os.getenv("IMAGE_CACHE_DIR", str(Path(tempfile.gettempdir()) / "codyssey-image-cache")))
+    IMAGE_CACHE_MAX_MB: int = int(os.getenv("IMAGE_CACHE_MAX_MB", "2048"))
+
+    # Image decode/resize worker processes
+    IMAGE_PROCESS_WORKERS: int = int(os.getenv("IMAGE_PROCESS_WORKERS", str(min(4, os.cpu_count() or 1))))
+
     # Processing limits
     MAX_CONCURRENT_JOBS: int = int(os.getenv("MAX_CONCURRENT_JOBS", "1"))
+    # Lower-priority jobs yield their slot to waiting higher-priority jobs between stages
+    PREEMPTION_ENABLED: bool = os.getenv("PREEMPTION_ENABLED", "True").lower() == "true"
+    # Job cost estimate for the fair-share scheduler (seconds; 17 images × 10000 iterations ≈ 400s)
+    COST_BASE_SECONDS: float = float(os.getenv("COST_BASE_SECONDS", "30"))
+    COST_PER_IMAGE_SECONDS: float = float(os.getenv("COST_PER_IMAGE_SECONDS", "4"))
+    COST_PER_1K_ITERATIONS_SECONDS: float = float(os.getenv("COST_PER_1K_ITERATIONS_SECONDS", "30"))
+    # Seconds of queue position credit per second waited (keeps long jobs from starving)
+    SCHEDULER_AGING_RATE: float = float(os.getenv("SCHEDULER_AGING_RATE", "1.0"))
+    # A seller's past slot usage counts against its fair share, halving every this many seconds
+    SCHEDULER_USAGE_HALF_LIFE_SECONDS: float = float(os.getenv("SCHEDULER_USAGE_HALF_LIFE_SECONDS", "3600"))
+    # Cancelled COLMAP/train.py: SIGTERM, then SIGKILL after this many seconds
+    SUBPROCESS_TERM_GRACE_SECONDS: float = float(os.getenv("SUBPROCESS_TERM_GRACE_SECONDS", "10"))
+
+    # Per-stage wall-clock budgets: (base s, s per image, s per 1000 iterations)
+    # Override single stages with STAGE_BUDGETS='{"COLMAP_MAP": [300, 30, 0]}'.
+    # Typical durations: GET /recon/stages/stats
+    STAGE_BUDGETS: Dict[str, Tuple[float, float, float]] = _stage_budgets({
+        "COLMAP_FEAT": (120, 10, 0),
+        "COLMAP_MATCH": (120, 15, 0),
+        "COLMAP_MAP": (300, 30, 0),
+        "COLMAP_UNDIST": (120, 5, 0),
+        "COLMAP_CONVERT": (60, 0, 0),
+        "GS_TRAIN": (600, 10, 120),
+    })
+    STAGE_BUDGET_SCALE: float = float(os.getenv("STAGE_BUDGET_SCALE", "1.0"))  # 0 = no budgets
+    # Kill a COLMAP/train.py process that writes no output for this long (0 = disabled)
+    STALL_TIMEOUT_SECONDS: float = float(os.getenv("STALL_TIMEOUT_SECONDS", "300"))
     MIN_IMAGES: int = int(os.getenv("MIN_IMAGES", "3"))
     MAX_IMAGES: int = int(os.getenv("MAX_IMAGES", "50"))
     MAX_IMAGE_SIZE: int = int(os.getenv("MAX_IMAGE_SIZE", "1600"))
@@ -81,9 +160,12 @@ class Settings:
     CONDA_ENV_NAME: str = "codyssey"
     CONDA_PYTHON: Path = Path.home() / "miniconda3" / "envs" / CONDA_ENV_NAME / "bin" / "python"
 
-    # GPU monitoring
-    GPU_CHECK_INTERVAL: int = 20  # Check every N read cycles
+    # GPU / resource monitoring
     MONITOR_GPU: bool = True
+    GPU_LOG_INTERVAL: float = 20.0  # Write latest GPU sample to job log every N seconds
+    RESOURCE_MONITOR_BACKEND: str = os.getenv("RESOURCE_MONITOR_BACKEND", "auto")  # auto, nvml, proc, stub
+    RESOURCE_SAMPLE_INTERVAL: float = float(os.getenv("RESOURCE_SAMPLE_INTERVAL", "1.0"))  # seconds
+    RESOURCE_SAMPLE_BUFFER: int = int(os.getenv("RESOURCE_SAMPLE_BUFFER", "3600"))  # ring buffer size
 
     # Logging
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
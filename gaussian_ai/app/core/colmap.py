@@ -3,8 +3,10 @@ COLMAP pipeline for Structure-from-Motion reconstruction
 """
 import shutil
 from pathlib import Path
+from typing import Optional
 from app.config import settings
 from app.core.pipeline import run_command
+from app.utils.resource_monitor import ResourceSampler
 from app.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -13,8 +15,9 @@ logger = setup_logger(__name__)
 class COLMAPPipeline:
     """COLMAP pipeline for Structure-from-Motion reconstruction"""
 
-    def __init__(self, job_dir: Path):
+    def __init__(self, job_dir: Path, sampler: Optional[ResourceSampler] = None):
         self.job_dir = job_dir
+        self.sampler = sampler
         self.database_path = job_dir / "colmap" / "database.db"
         self.images_path = job_dir / "upload" / "images"
         self.sparse_path = job_dir / "colmap" / "sparse"
@@ -33,7 +36,7 @@ class COLMAPPipeline:
             "--FeatureExtraction.num_threads", str(settings.COLMAP_NUM_THREADS)
         ]
 
-        await run_command(cmd, log_file)
+        await run_command(cmd, log_file, sampler=self.sampler)
 
     async def match_features(self, log_file) -> None:
         """Match features between images"""
@@ -45,7 +48,7 @@ class COLMAPPipeline:
             "--FeatureMatching.num_threads", str(settings.COLMAP_NUM_THREADS)
         ]
 
-        await run_command(cmd, log_file)
+        await run_command(cmd, log_file, sampler=self.sampler)
 
     async def reconstruct(self, log_file) -> Path:
         """Perform sparse reconstruction (SfM)"""
@@ -60,7 +63,7 @@ class COLMAPPipeline:
             "--output_path", str(self.sparse_path)
         ]
 
-        await run_command(cmd, log_file)
+        await run_command(cmd, log_file, sampler=self.sampler)
 
         model0_path = self.sparse_path / "0"
         if not model0_path.exists():
@@ -82,7 +85,7 @@ class COLMAPPipeline:
             "--output_type", "COLMAP"
         ]
 
-        await run_command(cmd, log_file)
+        await run_command(cmd, log_file, sampler=self.sampler)
 
         # GS expects sparse model in sparse/0/ subdirectory
         sparse_0_dir = self.work_path / "sparse" / "0"
@@ -107,4 +110,4 @@ class COLMAPPipeline:
             "--output_type", "TXT"
         ]
 
-        await run_command(cmd, log_file)
+        await run_command(cmd, log_file, sampler=self.sampler)
@@ -9,6 +9,7 @@ from typing import Optional, Dict
 from app.config import settings
 from app.core.pipeline import run_command
 from app.utils.system import get_gpu_memory_usage
+from app.utils.resource_monitor import ResourceSampler
 from app.utils.logger import setup_logger
 from app.utils.outlier_filter import filter_outliers
 
@@ -18,9 +19,10 @@ logger = setup_logger(__name__)
 class GaussianSplattingTrainer:
     """Gaussian Splatting training pipeline"""
 
-    def __init__(self, work_dir: Path, output_dir: Path):
+    def __init__(self, work_dir: Path, output_dir: Path, sampler: Optional[ResourceSampler] = None):
         self.work_dir = work_dir
         self.output_dir = output_dir
+        self.sampler = sampler
 
     async def train(self, log_file, iterations: int = None) -> Path:
         """
@@ -66,7 +68,7 @@ class GaussianSplattingTrainer:
             "--eval"  # Enable evaluation metrics
         ]
 
-        await run_command(cmd, log_file, env=env, monitor_gpu=True)
+        await run_command(cmd, log_file, env=env, monitor_gpu=True, sampler=self.sampler)
 
         # GPU memory after training
         gpu_mem_after = get_gpu_memory_usage()
@@ -112,7 +114,7 @@ class GaussianSplattingTrainer:
         ]
 
         try:
-            await run_command(render_cmd, log_file, env=env, monitor_gpu=False)
+            await run_command(render_cmd, log_file, env=env, monitor_gpu=False, sampler=self.sampler)
             log_file.write(">> [EVALUATION] Test set rendering complete!\n")
         except Exception as e:
             logger.error(f"Rendering failed: {e}")
@@ -132,7 +134,7 @@ class GaussianSplattingTrainer:
         ]
 
         try:
-            await run_command(metrics_cmd, log_file, env=env, monitor_gpu=False)
+            await run_command(metrics_cmd, log_file, env=env, monitor_gpu=False, sampler=self.sampler)
             log_file.write(">> [EVALUATION] Metrics computation complete!\n")
         except Exception as e:
             logger.error(f"Metrics computation failed: {e}")
@@ -2,21 +2,64 @@
 Pipeline orchestration and subprocess execution utilities
 """
 import asyncio
+import os
+import signal
+import time
 from pathlib import Path
 from typing import Optional
 from app.config import settings
-from app.utils.system import get_gpu_memory_usage
+from app.utils.resource_monitor import ResourceSampler
 from app.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
 
+class WatchdogTimeout(RuntimeError):
+    """A stage ran past its budget ("budget") or its command stopped producing output ("stall")"""
+
+    def __init__(self, message: str, kind: str):
+        super().__init__(message)
+        self.kind = kind
+
+
+def stage_budget(stage: str, image_count: int, iterations: Optional[int] = None) -> Optional[float]:
+    """
+    Wall-clock budget of a pipeline stage in seconds (None = unlimited)
+
+    base + per_image × image_count + per_1k_iterations × iterations / 1000,
+    times STAGE_BUDGET_SCALE (see settings.STAGE_BUDGETS).
+    """
+    budget = settings.STAGE_BUDGETS.get(stage)
+    if budget is None or settings.STAGE_BUDGET_SCALE <= 0:
+        return None
+    base, per_image, per_1k_iterations = budget
+    iterations = iterations or settings.TRAINING_ITERATIONS
+    return settings.STAGE_BUDGET_SCALE * (base + per_image * image_count + per_1k_iterations * iterations / 1000)
+
+
+async def run_stage(stage: str, coro, budget: Optional[float]):
+    """
+    Await a stage coroutine within its budget
+
+    On timeout the stage is cancelled, so run_command terminates the running
+    process group before WatchdogTimeout propagates.
+    """
+    if budget is None:
+        return await coro
+    try:
+        return await asyncio.wait_for(coro, timeout=budget)
+    except asyncio.TimeoutError:
+        raise WatchdogTimeout(f"{stage} exceeded its {budget:.0f}s budget", "budget") from None
+
+
 async def run_command(
     cmd: list,
     log_file,
     cwd: Optional[Path] = None,
     env: Optional[dict] = None,
-    monitor_gpu: bool = False
+    monitor_gpu: bool = False,
+    sampler: Optional[ResourceSampler] = None,
+    stall_timeout: Optional[float] = None
 ) -> None:
     """
     Run subprocess command with logging and optional GPU monitoring
@@ -26,53 +69,115 @@ async def run_command(
         log_file: File handle for logging
         cwd: Working directory
         env: Environment variables
-        monitor_gpu: Whether to monitor GPU memory
+        monitor_gpu: Whether to write GPU memory samples to the log
+        sampler: Job resource sampler (tracks CPU/RSS of the child process)
+        stall_timeout: Kill the command after this many seconds without output
+            (default: settings.STALL_TIMEOUT_SECONDS, 0 = disabled)
 
     Raises:
         RuntimeError: If command fails
+        WatchdogTimeout: If the command stalled (process group terminated)
+        asyncio.CancelledError: If the job was cancelled; the child's process
+            group has been terminated before this propagates
     """
+    # Own process group so cancellation also reaches COLMAP/train.py workers
     process = await asyncio.create_subprocess_exec(
         *cmd,
         cwd=(str(cwd) if cwd else None),
         env=env,
         stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.STDOUT
+        stderr=asyncio.subprocess.STDOUT,
+        start_new_session=True
     )
 
-    gpu_check_counter = 0
+    if sampler is not None:
+        sampler.track(process.pid)
 
-    while True:
-        try:
-            chunk = await asyncio.wait_for(process.stdout.read(4096), timeout=1.0)
-            if not chunk:
-                break
-            text = chunk.decode(errors="ignore")
-            log_file.write(text)
-            log_file.flush()
+    log_gpu = monitor_gpu and settings.MONITOR_GPU and sampler is not None
+    last_gpu_log = time.monotonic()
+    if stall_timeout is None:
+        stall_timeout = settings.STALL_TIMEOUT_SECONDS
+    last_output = time.monotonic()
 
-            if monitor_gpu and settings.MONITOR_GPU:
-                gpu_check_counter += 1
-                if gpu_check_counter >= settings.GPU_CHECK_INTERVAL:
-                    gpu_check_counter = 0
-                    gpu_mem = get_gpu_memory_usage()
-                    log_file.write(f"\n[GPU Memory] {gpu_mem}\n")
-                    log_file.flush()
+    try:
+        while True:
+            try:
+                chunk = await asyncio.wait_for(process.stdout.read(4096), timeout=1.0)
+                if not chunk:
+                    break
+                text = chunk.decode(errors="ignore")
+                log_file.write(text)
+                log_file.flush()
+                last_output = time.monotonic()
+            except asyncio.TimeoutError:
+                if process.returncode is not None:
+                    break
+                if stall_timeout and time.monotonic() - last_output >= stall_timeout:
+                    raise WatchdogTimeout(
+                        f"Command {Path(cmd[0]).name} produced no output for {stall_timeout:.0f}s",
+                        "stall"
+                    )
+
+            # Samples are collected in the background; only copy the latest one into the log
+            if log_gpu and time.monotonic() - last_gpu_log >= settings.GPU_LOG_INTERVAL:
+                last_gpu_log = time.monotonic()
+                log_file.write(f"\n[GPU Memory] {sampler.format_latest_gpu()}\n")
+                log_file.flush()
+
+        exit_code = await process.wait()
+    except BaseException as e:
+        if process.returncode is None:
+            reason = "STALLED" if isinstance(e, WatchdogTimeout) else "CANCELLED"
+            log_file.write(f"\n>> [{reason}] Terminating {cmd[0]} (pid {process.pid})\n")
+            log_file.flush()
+            await terminate_process_group(process)
+        raise
+    finally:
+        if sampler is not None:
+            sampler.untrack()
 
-        except asyncio.TimeoutError:
-            if process.returncode is not None:
-                break
-            if monitor_gpu and settings.MONITOR_GPU:
-                gpu_check_counter += 1
-                if gpu_check_counter >= settings.GPU_CHECK_INTERVAL:
-                    gpu_check_counter = 0
-                    gpu_mem = get_gpu_memory_usage()
-                    log_file.write(f"\n[GPU Memory] {gpu_mem}\n")
-                    log_file.flush()
-            continue
-
-    exit_code = await process.wait()
     if exit_code != 0:
         error_msg = f"[ERROR] Command {' '.join(cmd)} exited with code {exit_code}\n"
         log_file.write(error_msg)
         log_file.flush()
         raise RuntimeError(f"Command failed: {' '.join(cmd)} (exit code: {exit_code})")
+
+
+def _signal_group(process: asyncio.subprocess.Process, sig: int) -> None:
+    try:
+        os.killpg(process.pid, sig)
+    except ProcessLookupError:
+        pass
+
+
+async def terminate_process_group(
+    process: asyncio.subprocess.Process,
+    grace_seconds: Optional[float] = None
+) -> None:
+    """
+    SIGTERM the child's process group, then SIGKILL it if still alive after the grace period
+
+    Shielded from further cancellation so the GPU is actually free before the
+    caller releases its processing slot.
+    """
+    grace = settings.SUBPROCESS_TERM_GRACE_SECONDS if grace_seconds is None else grace_seconds
+
+    async def _terminate() -> None:
+        _signal_group(process, signal.SIGTERM)
+        try:
+            await asyncio.wait_for(process.wait(), timeout=grace)
+        except asyncio.TimeoutError:
+            logger.warning(f"Process group {process.pid} ignored SIGTERM for {grace}s, sending SIGKILL")
+            _signal_group(process, signal.SIGKILL)
+            await process.wait()
+        # Grandchildren may outlive the leader
+        _signal_group(process, signal.SIGKILL)
+
+    task = asyncio.ensure_future(_terminate())
+    try:
+        await asyncio.shield(task)
+    except asyncio.CancelledError:
+        # Cancelled again while waiting: skip the grace period
+        _signal_group(process, signal.SIGKILL)
+        await task
+        raise
@@ -0,0 +1,274 @@
+"""
+Processing slot scheduler (replaces the FIFO job queue)
+
+MAX_CONCURRENT_JOBS slots are handed out by priority class, then by a
+per-seller fair share, instead of by created_at. A seller who uploads 30
+products no longer blocks everyone else behind them.
+
+Priority classes (JobCreateRequest.priority), strictly ordered:
+    interactive - seller re-running a reconstruction and waiting for it
+    listing     - new product listing (default)
+    backfill    - bulk re-processing
+
+Within a class, waiting jobs are ordered by their seller's virtual finish
+time (weighted fair queueing on slot seconds):
+
+    virtual_finish = slot seconds the seller used recently (decaying, half-life
+                     SCHEDULER_USAGE_HALF_LIFE_SECONDS)
+                   + cost of the seller's running jobs
+                   + cost of the seller's jobs ahead of this one
+                   + this job's cost
+                   - SCHEDULER_AGING_RATE * seconds waited
+
+Job cost comes from image count and iterations (estimate_cost), so each
+seller's short jobs go first (SJF), another seller's first job interleaves
+with the first seller's backlog, and aging keeps long jobs from starving.
+
+A running low-priority job gives its slot up at the next stage boundary when
+a higher-priority job is waiting (preemption). Intermediate COLMAP/training
+outputs stay in the job directory, so a preempted job continues with its next
+stage once it gets a slot back; no work is redone.
+
+Cancelling a waiting task removes it from the queue; cancelling a running
+task releases its slot when the task unwinds (queued_slot's finally).
+
+Usage:
+    ticket = job_scheduler.ticket(product_id, "listing", seller_id, estimate_cost(17, 10000))
+    async with queued_slot(ticket):
+        ...
+        await ticket.checkpoint(log_file)   # between stages
+"""
+import asyncio
+import itertools
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.utils.logger import setup_logger
+from app.utils.metrics import JOBS_RUNNING, PREEMPTIONS, QUEUE_DEPTH, QUEUE_WAIT_SECONDS
+
+logger = setup_logger(__name__)
+
+PRIORITIES = {"interactive": 0, "listing": 1, "backfill": 2}
+DEFAULT_PRIORITY = "listing"
+
+
+def estimate_cost(image_count: int, iterations: Optional[int] = None) -> float:
+    """
+    Estimated slot time of a job in seconds
+
+    COLMAP time grows with the image count, training time with iterations
+    (README benchmark: 17 images, 10000 iterations ≈ 400s).
+    """
+    iterations = iterations or settings.TRAINING_ITERATIONS
+    return (
+        settings.COST_BASE_SECONDS
+        + settings.COST_PER_IMAGE_SECONDS * image_count
+        + settings.COST_PER_1K_ITERATIONS_SECONDS * iterations / 1000
+    )
+
+
+@dataclass
+class _Waiter:
+    ticket: "SlotTicket"
+    future: asyncio.Future
+    queued_at: float
+
+
+class SlotTicket:
+    """One job's claim on a processing slot (semaphore-like: acquire/release)"""
+
+    def __init__(self, scheduler: "JobScheduler", product_id: str, priority: str,
+                 seller_id: Optional[str], cost: float):
+        self.scheduler = scheduler
+        self.product_id = product_id
+        self.priority = priority if priority in PRIORITIES else DEFAULT_PRIORITY
+        self.rank = PRIORITIES[self.priority]
+        self.seller_id = seller_id or product_id  # unknown seller: its own share
+        self.cost = cost
+        self.seq = next(scheduler._seq)  # tie-break, kept across preemptions
+        self.preemptions = 0
+        self.granted_at: Optional[float] = None
+
+    async def acquire(self) -> None:
+        await self.scheduler._acquire(self)
+
+    def release(self) -> None:
+        self.scheduler._release(self)
+
+    async def checkpoint(self, log_file=None) -> None:
+        """Stage boundary: hand the slot to a waiting higher-priority job, then wait for it back"""
+        if not self.scheduler._should_yield(self):
+            return
+
+        self.preemptions += 1
+        PREEMPTIONS.inc()
+        logger.info(f"Job {self.product_id} ({self.priority}) yielding its slot to a higher-priority job")
+        if log_file is not None:
+            log_file.write(">> [PREEMPTED] Yielding slot to a higher-priority job, waiting to resume...\n")
+            log_file.flush()
+
+        JOBS_RUNNING.dec()
+        self.release()
+        queued_at = time.perf_counter()
+        QUEUE_DEPTH.inc()
+        try:
+            await self.acquire()
+        except asyncio.CancelledError:
+            JOBS_RUNNING.inc()  # queued_slot's finally decrements it again
+            raise
+        finally:
+            QUEUE_DEPTH.dec()
+        QUEUE_WAIT_SECONDS.observe(time.perf_counter() - queued_at)
+        JOBS_RUNNING.inc()
+
+        if log_file is not None:
+            log_file.write(">> [RESUMED] Slot reacquired, continuing with the next stage\n")
+            log_file.flush()
+
+
+class JobScheduler:
+    """Priority + per-seller fair-share queue for MAX_CONCURRENT_JOBS slots"""
+
+    def __init__(self, slots: int):
+        self.slots = max(1, slots)
+        self._running: Dict[str, SlotTicket] = {}
+        self._waiting: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._usage: Dict[str, Tuple[float, float]] = {}  # seller_id → (slot seconds, as of monotonic time)
+
+    def ticket(self, product_id: str, priority: str = DEFAULT_PRIORITY,
+               seller_id: Optional[str] = None, cost: Optional[float] = None) -> SlotTicket:
+        return SlotTicket(self, product_id, priority, seller_id, estimate_cost(0) if cost is None else cost)
+
+    async def _acquire(self, ticket: SlotTicket) -> None:
+        if len(self._running) < self.slots and not self._live_waiters():
+            self._grant(ticket)
+            return
+
+        waiter = _Waiter(ticket, asyncio.get_running_loop().create_future(), time.monotonic())
+        self._waiting.append(waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            # Granted and cancelled in the same tick: give the slot back
+            if waiter.future.done() and not waiter.future.cancelled():
+                self._release(ticket)
+            raise
+
+    def _grant(self, ticket: SlotTicket) -> None:
+        ticket.granted_at = time.monotonic()
+        self._running[ticket.product_id] = ticket
+
+    def _release(self, ticket: SlotTicket) -> None:
+        if self._running.get(ticket.product_id) is ticket:
+            del self._running[ticket.product_id]
+            # Charge the seller for the slot time actually used
+            now = time.monotonic()
+            self._usage[ticket.seller_id] = (self._usage_of(ticket.seller_id, now) + now - ticket.granted_at, now)
+        self._wake()
+
+    def _usage_of(self, seller_id: str, now: float) -> float:
+        """Seller's recent slot seconds, halved every SCHEDULER_USAGE_HALF_LIFE_SECONDS"""
+        if seller_id not in self._usage:
+            return 0.0
+        used, as_of = self._usage[seller_id]
+        decayed = used * 0.5 ** ((now - as_of) / settings.SCHEDULER_USAGE_HALF_LIFE_SECONDS)
+        if decayed < 1.0:
+            del self._usage[seller_id]
+            return 0.0
+        return decayed
+
+    def _live_waiters(self) -> List[_Waiter]:
+        """Waiters still interested in a slot (drops cancelled ones)"""
+        self._waiting = [w for w in self._waiting if not w.future.done()]
+        return self._waiting
+
+    def _ordered(self) -> List[_Waiter]:
+        """Waiters in dispatch order: (priority class, aged virtual finish, arrival)"""
+        now = time.monotonic()
+        seller_load: Dict[str, float] = defaultdict(float)
+        for seller_id in list(self._usage):
+            seller_load[seller_id] = self._usage_of(seller_id, now)
+        for running in self._running.values():
+            seller_load[running.seller_id] += running.cost
+
+        # Each seller's jobs shortest first; virtual finish accumulates per seller
+        keys = {}
+        by_cost = sorted(self._live_waiters(), key=lambda w: (w.ticket.rank, w.ticket.cost, w.ticket.seq))
+        for waiter in by_cost:
+            ticket = waiter.ticket
+            seller_load[ticket.seller_id] += ticket.cost
+            aged = seller_load[ticket.seller_id] - settings.SCHEDULER_AGING_RATE * (now - waiter.queued_at)
+            keys[id(waiter)] = (ticket.rank, aged, ticket.seq)
+
+        return sorted(by_cost, key=lambda w: keys[id(w)])
+
+    def _wake(self) -> None:
+        while len(self._running) < self.slots:
+            ordered = self._ordered()
+            if not ordered:
+                return
+            waiter = ordered[0]
+            self._waiting.remove(waiter)
+            self._grant(waiter.ticket)
+            waiter.future.set_result(None)
+
+    def _should_yield(self, ticket: SlotTicket) -> bool:
+        ordered = self._ordered()
+        return (
+            settings.PREEMPTION_ENABLED
+            and self._running.get(ticket.product_id) is ticket
+            and bool(ordered)
+            and ordered[0].ticket.rank < ticket.rank
+        )
+
+    def queue(self) -> List[dict]:
+        """Waiting jobs in dispatch order with a rough wait estimate"""
+        # Work ahead spread over all slots (running jobs counted at full cost)
+        ahead = sum(t.cost for t in self._running.values())
+        queue = []
+        for position, waiter in enumerate(self._ordered(), start=1):
+            ticket = waiter.ticket
+            queue.append({
+                "product_id": ticket.product_id,
+                "position": position,
+                "priority": ticket.priority,
+                "seller_id": ticket.seller_id,
+                "estimated_cost_seconds": round(ticket.cost),
+                "estimated_wait_seconds": round(ahead / self.slots),
+                "waited_seconds": round(time.monotonic() - waiter.queued_at),
+            })
+            ahead += ticket.cost
+        return queue
+
+    def position(self, product_id: str) -> Optional[dict]:
+        """Queue entry for product_id, or None if it is not waiting"""
+        return next((entry for entry in self.queue() if entry["product_id"] == product_id), None)
+
+    def running(self) -> List[dict]:
+        return [
+            {
+                "product_id": t.product_id,
+                "priority": t.priority,
+                "seller_id": t.seller_id,
+                "estimated_cost_seconds": round(t.cost),
+                "preemptions": t.preemptions,
+            }
+            for t in self._running.values()
+        ]
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "slots": self.slots,
+            "running": self.running(),
+            "waiting": len(self._live_waiters()),
+            "seller_usage_seconds": {s: round(self._usage_of(s, now)) for s in list(self._usage)},
+        }
+
+
+# Process-wide scheduler for reconstruction jobs
+job_scheduler = JobScheduler(settings.MAX_CONCURRENT_JOBS)
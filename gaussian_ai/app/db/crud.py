@@ -1,31 +1,46 @@
 """
 CRUD operations for database models
 """
+import math
 from sqlalchemy.orm import Session
 from datetime import datetime
-from typing import Optional, List
-from app.db.models import Job, ErrorLog
+from typing import Dict, Iterable, Optional, List, Tuple
+from app.db.models import Job, ErrorLog, StageRun
 from app.config import settings
+from app.utils.metrics import timed_db
 
 
 # ==================== Job CRUD ====================
 
+@timed_db("jobs")
 def create_job(
     db: Session,
     product_id: str,
     image_count: int = 0,
-    iterations: int = None
+    iterations: int = None,
+    input_fingerprint: Optional[str] = None,
+    priority: str = "listing",
+    seller_id: Optional[str] = None
 ) -> Job:
-    """Create a new job in database"""
+    """Create a new job in database (replaces the previous run of the same product)"""
     # Use settings.TRAINING_ITERATIONS if not specified
     if iterations is None:
         iterations = settings.TRAINING_ITERATIONS
 
+    # Resubmission / superseded job: start from a fresh row instead of a PK conflict
+    previous = get_job_by_product_id(db, product_id)
+    if previous is not None:
+        db.delete(previous)
+        db.flush()
+
     job = Job(
         product_id=product_id,
         status="PENDING",
         image_count=image_count,
         iterations=iterations,
+        input_fingerprint=input_fingerprint,
+        priority=priority,
+        seller_id=seller_id,
         created_at=datetime.utcnow()
     )
     db.add(job)
@@ -34,11 +49,13 @@ def create_job(
     return job
 
 
+@timed_db("jobs")
 def get_job_by_product_id(db: Session, product_id: str) -> Optional[Job]:
     """Get job by product_id"""
     return db.query(Job).filter(Job.product_id == product_id).first()
 
 
+@timed_db("jobs")
 def update_job_status(
     db: Session,
     product_id: str,
@@ -55,7 +72,7 @@ def update_job_status(
 
     if status == "PROCESSING" and not job.started_at:
         job.started_at = datetime.utcnow()
-    elif status in ["COMPLETED", "FAILED"]:
+    elif status in ["COMPLETED", "FAILED", "CANCELLED"]:
         job.completed_at = datetime.utcnow()
         if job.started_at:
             job.processing_time_seconds = (job.completed_at - job.started_at).total_seconds()
@@ -70,6 +87,7 @@ def update_job_status(
     return job
 
 
+@timed_db("jobs")
 def update_job_step(
     db: Session,
     product_id: str,
@@ -89,6 +107,7 @@ def update_job_step(
     return job
 
 
+@timed_db("jobs")
 def update_job_results(
     db: Session,
     product_id: str,
@@ -110,6 +129,32 @@ def update_job_results(
     return job
 
 
+@timed_db("jobs")
+def update_job_resource_peaks(
+    db: Session,
+    product_id: str,
+    peaks: dict
+) -> Optional[Job]:
+    """Record peak resource usage (keys as produced by ResourceSampler.peaks)"""
+    job = get_job_by_product_id(db, product_id)
+    if not job:
+        return None
+
+    if peaks.get("gpu_memory_mb") is not None:
+        job.peak_gpu_memory_mb = int(peaks["gpu_memory_mb"])
+    if peaks.get("gpu_utilization_percent") is not None:
+        job.peak_gpu_utilization_percent = int(peaks["gpu_utilization_percent"])
+    if peaks.get("rss_mb") is not None:
+        job.peak_rss_mb = peaks["rss_mb"]
+    if peaks.get("cpu_percent") is not None:
+        job.peak_cpu_percent = peaks["cpu_percent"]
+
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+@timed_db("jobs")
 def increment_retry_count(db: Session, product_id: str) -> Optional[Job]:
     """Increment retry count for a job"""
     job = get_job_by_product_id(db, product_id)
@@ -122,21 +167,19 @@ def increment_retry_count(db: Session, product_id: str) -> Optional[Job]:
     return job
 
 
+@timed_db("jobs")
 def get_all_jobs(db: Session, skip: int = 0, limit: int = 100) -> List[Job]:
     """Get all jobs with pagination"""
     return db.query(Job).order_by(Job.created_at.desc()).offset(skip).limit(limit).all()
 
 
+@timed_db("jobs")
 def get_running_jobs(db: Session) -> List[Job]:
     """Get all running jobs"""
     return db.query(Job).filter(Job.status == "PROCESSING").all()
 
 
-def get_pending_jobs(db: Session) -> List[Job]:
-    """Get all pending jobs ordered by creation time"""
-    return db.query(Job).filter(Job.status == "PENDING").order_by(Job.created_at.asc()).all()
-
-
+@timed_db("jobs")
 def delete_job(db: Session, product_id: str) -> bool:
     """Delete a job"""
     job = get_job_by_product_id(db, product_id)
@@ -154,6 +197,7 @@ def delete_job(db: Session, product_id: str) -> bool:
 
 # ==================== ErrorLog CRUD ====================
 
+@timed_db("jobs")
 def log_error(
     db: Session,
     product_id: str,
@@ -177,6 +221,7 @@ def log_error(
     return error_log
 
 
+@timed_db("jobs")
 def get_recent_errors(db: Session, product_id: str, limit: int = 10) -> List[ErrorLog]:
     """Get recent errors for a job"""
     return db.query(ErrorLog).filter(
@@ -186,6 +231,79 @@ def get_recent_errors(db: Session, product_id: str, limit: int = 10) -> List[Err
     ).limit(limit).all()
 
 
+@timed_db("jobs")
 def get_all_errors(db: Session, skip: int = 0, limit: int = 100) -> List[ErrorLog]:
     """Get all error logs with pagination"""
     return db.query(ErrorLog).order_by(ErrorLog.timestamp.desc()).offset(skip).limit(limit).all()
+
+
+# ==================== StageRun CRUD ====================
+
+@timed_db("jobs")
+def record_stage_runs(
+    db: Session,
+    product_id: str,
+    records: Iterable[Tuple[str, float, str]],
+    budgets: Dict[str, Optional[float]],
+    image_count: Optional[int] = None,
+    iterations: Optional[int] = None
+) -> None:
+    """Store (stage, seconds, outcome) records of a finished job"""
+    now = datetime.utcnow()
+    db.add_all([
+        StageRun(
+            product_id=product_id,
+            stage=stage,
+            seconds=seconds,
+            budget_seconds=budgets.get(stage),
+            outcome=outcome,
+            image_count=image_count,
+            iterations=iterations,
+            created_at=now
+        )
+        for stage, seconds, outcome in records
+    ])
+    db.commit()
+
+
+def _percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of sorted values"""
+    return values[min(len(values) - 1, max(0, math.ceil(q * len(values)) - 1))]
+
+
+@timed_db("jobs")
+def get_stage_duration_stats(db: Session, limit: int = 500) -> Dict[str, dict]:
+    """
+    Typical duration per stage over the most recent successful runs
+
+    seconds_per_image helps choose the per-image part of STAGE_BUDGETS;
+    budget_used_p95 is p95 of seconds / budget_seconds.
+    """
+    stats = {}
+    stages = [row[0] for row in db.query(StageRun.stage).distinct().all()]
+    for stage in stages:
+        runs = db.query(StageRun).filter(
+            StageRun.stage == stage,
+            StageRun.outcome == "ok"
+        ).order_by(StageRun.created_at.desc()).limit(limit).all()
+        timeouts = db.query(StageRun).filter(
+            StageRun.stage == stage,
+            StageRun.outcome.in_(["budget", "stall"])
+        ).count()
+        if not runs:
+            stats[stage] = {"count": 0, "timeouts": timeouts}
+            continue
+
+        seconds = sorted(run.seconds for run in runs)
+        per_image = sorted(run.seconds / run.image_count for run in runs if run.image_count)
+        budget_used = sorted(run.seconds / run.budget_seconds for run in runs if run.budget_seconds)
+        stats[stage] = {
+            "count": len(runs),
+            "timeouts": timeouts,
+            "p50_seconds": round(_percentile(seconds, 0.5), 1),
+            "p95_seconds": round(_percentile(seconds, 0.95), 1),
+            "max_seconds": round(seconds[-1], 1),
+            "seconds_per_image_p95": round(_percentile(per_image, 0.95), 2) if per_image else None,
+            "budget_used_p95": round(_percentile(budget_used, 0.95), 2) if budget_used else None,
+        }
+    return stats
@@ -14,7 +14,7 @@ class Job(Base):
     __tablename__ = "jobs"
 
     product_id = Column(String(36), primary_key=True, index=True)  # UUID format
-    status = Column(String(20), nullable=False, default="PENDING")  # PENDING, PROCESSING, COMPLETED, FAILED
+    status = Column(String(20), nullable=False, default="PENDING")  # PENDING, PROCESSING, COMPLETED, FAILED, CANCELLED
 
     # Step tracking (IMPLEMENT.md 섹션 E)
     step = Column(String(30), nullable=True, default="QUEUED")  # QUEUED, PREFLIGHT, COLMAP_FEAT, etc.
@@ -28,6 +28,9 @@ class Job(Base):
     # Configuration
     image_count = Column(Integer, default=0)
     iterations = Column(Integer, default=10000)
+    input_fingerprint = Column(String(64), nullable=True)  # S3 ETags + iterations (app.utils.job_registry)
+    priority = Column(String(20), nullable=True, default="listing")  # interactive, listing, backfill (app.core.scheduler)
+    seller_id = Column(String(36), nullable=True)  # product.member_id (fair-share key)
 
     # Results - metrics removed for MVP (not needed by users)
     # gaussian_count = Column(Integer, nullable=True)  # Removed
@@ -50,6 +53,12 @@ class Job(Base):
     colmap_points = Column(Integer, nullable=True)
     processing_time_seconds = Column(Float, nullable=True)
 
+    # Resource peaks (sampled by app.utils.resource_monitor)
+    peak_gpu_memory_mb = Column(Integer, nullable=True)  # job's subprocesses only
+    peak_gpu_utilization_percent = Column(Integer, nullable=True)  # device-wide (NVML has no per-process value)
+    peak_rss_mb = Column(Float, nullable=True)
+    peak_cpu_percent = Column(Float, nullable=True)
+
     def to_dict(self) -> Dict[str, Any]:
         """Convert model to dictionary"""
         return {
@@ -62,6 +71,9 @@ class Job(Base):
             "completed_at": self.completed_at.isoformat() if self.completed_at else None,
             "image_count": self.image_count,
             "iterations": self.iterations,
+            "input_fingerprint": self.input_fingerprint,
+            "priority": self.priority,
+            "seller_id": self.seller_id,
             # Result metrics removed for MVP
             "error_message": self.error_message,
             "error_stage": self.error_stage,
@@ -69,6 +81,10 @@ class Job(Base):
             "colmap_registered_images": self.colmap_registered_images,
             "colmap_points": self.colmap_points,
             "processing_time_seconds": self.processing_time_seconds,
+            "peak_gpu_memory_mb": self.peak_gpu_memory_mb,
+            "peak_gpu_utilization_percent": self.peak_gpu_utilization_percent,
+            "peak_rss_mb": self.peak_rss_mb,
+            "peak_cpu_percent": self.peak_cpu_percent,
         }
 
 
@@ -95,3 +111,32 @@ class ErrorLog(Base):
             "error_message": self.error_message,
             "traceback": self.traceback,
         }
+
+
+class StageRun(Base):
+    """Duration of one pipeline stage of one job (stage budget tuning)"""
+    __tablename__ = "stage_runs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    product_id = Column(String(36), index=True, nullable=False)  # UUID format
+    stage = Column(String(30), index=True, nullable=False)
+    seconds = Column(Float, nullable=False)
+    budget_seconds = Column(Float, nullable=True)  # None = no budget
+    outcome = Column(String(20), nullable=False)  # ok, failed, budget, stall
+    image_count = Column(Integer, nullable=True)
+    iterations = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert model to dictionary"""
+        return {
+            "id": self.id,
+            "product_id": self.product_id,
+            "stage": self.stage,
+            "seconds": self.seconds,
+            "budget_seconds": self.budget_seconds,
+            "outcome": self.outcome,
+            "image_count": self.image_count,
+            "iterations": self.iterations,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
@@ -6,7 +6,9 @@ import pymysql
 import logging
 from contextlib import contextmanager
 from datetime import datetime
+from typing import Optional
 from app.config import settings
+from app.utils.metrics import timed_db
 
 logger = logging.getLogger(__name__)
 
@@ -84,6 +86,7 @@ def get_db_cursor():
             connection.close()
 
 
+@timed_db("mysql")
 def create_job_3dgs(
     product_id: str,
     s3_input_prefix: str,
@@ -130,6 +133,7 @@ def create_job_3dgs(
         return False
 
 
+@timed_db("mysql")
 def update_job_3dgs_status(
     product_id: str,
     status: str,
@@ -195,6 +199,7 @@ def update_job_3dgs_status(
         return False
 
 
+@timed_db("mysql")
 def increment_job_count_and_activate(product_id: str) -> bool:
     """
     Increment product.job_count and activate if job_count reaches 2
@@ -243,6 +248,26 @@ def increment_job_count_and_activate(product_id: str) -> bool:
         return False
 
 
+@timed_db("mysql")
+def get_product_seller(product_id: str) -> Optional[str]:
+    """
+    Seller (product.member_id) of a product, for fair-share scheduling
+
+    Returns:
+        member_id as a string, or None if the product is missing or MySQL is unavailable
+    """
+    try:
+        with get_db_cursor() as cursor:
+            cursor.execute("SELECT member_id FROM product WHERE product_id = %s", (product_id,))
+            result = cursor.fetchone()
+            return str(result['member_id']) if result else None
+
+    except Exception as e:
+        logger.error(f"Failed to look up seller for {product_id}: {e}")
+        return None
+
+
+@timed_db("mysql")
 def update_product_sell_status(product_id: str, sell_status: str) -> bool:
     """
     Update product.sell_status (FAILED 처리용)
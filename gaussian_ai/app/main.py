@@ -1,10 +1,11 @@
 """
 Main FastAPI application
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 from app.config import settings
 from app.db.database import init_db
@@ -62,6 +63,12 @@ async def lifespan(app: FastAPI):
 
     logger.info("Shutting down Gaussian Splatting API server")
 
+    from app.utils.job_registry import recon_registry
+    await recon_registry.shutdown()
+
+    from app.utils.process_pool import shutdown_process_pool
+    shutdown_process_pool()
+
 
 # Create FastAPI app
 app = FastAPI(
@@ -104,6 +111,8 @@ async def root():
         "endpoints": {
             "create_job": "POST /recon/jobs",
             "get_status": "GET /recon/jobs/{product_id}/status",
+            "cancel_job": "DELETE /recon/jobs/{product_id}",
+            "metrics": "GET /metrics",
             "view_result": "GET /v/{product_id}"
         }
     }
@@ -120,6 +129,17 @@ async def healthz():
     return "ok"
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Prometheus scrape endpoint
+
+    Stage latency histograms, S3 download time/bytes, DB call latency,
+    queue depth/wait time and PLY bytes served per quality level.
+    """
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
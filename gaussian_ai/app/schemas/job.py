@@ -2,7 +2,7 @@
 Pydantic schemas for Job-related API requests and responses
 """
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Literal, Optional, List
 
 
 class JobCreateRequest(BaseModel):
@@ -10,6 +10,11 @@ class JobCreateRequest(BaseModel):
     product_id: str = Field(..., description="Product UUID")
     s3_images: List[str] = Field(..., description="List of S3 image paths (s3://bucket/key)")
     iterations: Optional[int] = Field(None, description="Training iterations (default: 10000)")
+    priority: Literal["interactive", "listing", "backfill"] = Field(
+        "listing",
+        description="Scheduling class: interactive (seller re-run), listing (new product), backfill (bulk)"
+    )
+    seller_id: Optional[str] = Field(None, description="Seller (member_id) for fair sharing; looked up from product if omitted")
 
 
 class JobCreateResponse(BaseModel):
@@ -36,10 +41,15 @@ class JobStatusResponse(BaseModel):
     colmap_registered_images: Optional[int] = None
     colmap_points: Optional[int] = None
     # Removed for MVP: psnr, ssim, lpips (evaluation metrics)
+    peak_gpu_memory_mb: Optional[int] = None
+    peak_gpu_utilization_percent: Optional[int] = None
+    peak_rss_mb: Optional[float] = None
+    peak_cpu_percent: Optional[float] = None
     viewer_url: Optional[str] = None
     error: Optional[str] = None
     error_stage: Optional[str] = None
     queue_position: Optional[int] = None
+    estimated_wait_seconds: Optional[int] = None
 
 
 class JobListResponse(BaseModel):
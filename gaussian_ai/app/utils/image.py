@@ -71,10 +71,81 @@ def validate_image_file(file: UploadFile) -> None:
         raise HTTPException(400, f"Invalid image file: {file.filename}. Error: {str(e)}")
 
 
+def resize_image_bytes(data: bytes, output_path: Path, max_size: int) -> dict:
+    """
+    Decode image bytes, apply EXIF orientation, downscale to max_size and write to output_path
+
+    Fast path for large JPEGs: draft() lets libjpeg decode directly at the
+    nearest 1/2, 1/4 or 1/8 scale that still covers the target size (DCT-domain
+    downscaling), then LANCZOS finishes the resize. The image is re-encoded
+    only when it was actually resized or rotated; otherwise the original bytes
+    are written untouched.
+
+    Runs in the image process pool (must stay a picklable top-level function).
+    Falls back to writing the original bytes if decoding fails.
+
+    Returns:
+        dict: original/new size, resized/rotated flags, seconds spent, error (if any)
+    """
+    import math
+    import time
+    from PIL import ImageOps
+
+    start = time.perf_counter()
+    result = {"resized": False, "rotated": False, "error": None}
+
+    try:
+        img = Image.open(io.BytesIO(data))
+        width, height = img.size
+        result["original_size"] = [width, height]
+
+        orientation = img.getexif().get(0x0112, 1)
+        ratio = min(max_size / width, max_size / height)
+
+        if ratio < 1:
+            # Decode at reduced resolution (JPEG only, no-op for other formats)
+            img.draft(img.mode, (math.ceil(width * ratio), math.ceil(height * ratio)))
+
+        if orientation != 1:
+            img = ImageOps.exif_transpose(img)
+            result["rotated"] = True
+
+        if ratio < 1:
+            w, h = img.size
+            target = (max(1, round(w * min(max_size / w, max_size / h))),
+                      max(1, round(h * min(max_size / w, max_size / h))))
+            if img.size != target:
+                img = img.resize(target, Image.LANCZOS)
+            result["resized"] = True
+
+        result["size"] = list(img.size)
+
+        if result["resized"] or result["rotated"]:
+            save_kwargs = {"quality": 95}
+            for key in ("exif", "icc_profile"):
+                if img.info.get(key):
+                    save_kwargs[key] = img.info[key]
+            img.save(str(output_path), **save_kwargs)
+        else:
+            with open(output_path, 'wb') as f:
+                f.write(data)
+
+    except Exception as e:
+        result["error"] = str(e)
+        with open(output_path, 'wb') as f:
+            f.write(data)
+
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
 async def save_image(file: UploadFile, output_path: Path, resize: bool = True) -> None:
     """
     Save uploaded image with optional resizing
 
+    Resizing goes through resize_image_bytes() in the image process pool
+    (draft-mode decode, EXIF orientation applied, re-encode only if needed).
+
     Args:
         file: Uploaded file from FastAPI
         output_path: Output file path
@@ -88,21 +159,11 @@ async def save_image(file: UploadFile, output_path: Path, resize: bool = True) -
             f.write(content)
         return
 
-    # Resize and save
-    try:
-        img = Image.open(io.BytesIO(content))
-        width, height = img.size
+    from app.utils.process_pool import run_in_process
 
-        if width > settings.MAX_IMAGE_SIZE or height > settings.MAX_IMAGE_SIZE:
-            ratio = min(settings.MAX_IMAGE_SIZE / width, settings.MAX_IMAGE_SIZE / height)
-            new_width = int(width * ratio)
-            new_height = int(height * ratio)
-            img = img.resize((new_width, new_height), Image.LANCZOS)
+    result = await run_in_process(resize_image_bytes, content, output_path, settings.MAX_IMAGE_SIZE)
 
-        img.save(output_path, quality=95)
+    if result["error"]:
+        logger.warning(f"Failed to resize image {file.filename}: {result['error']}. Saving original.")
+    else:
         logger.info(f"Saved image: {output_path.name}")
-
-    except Exception as e:
-        logger.warning(f"Failed to resize image {file.filename}: {e}. Saving original.")
-        with open(output_path, 'wb') as f:
-            f.write(content)
@@ -0,0 +1,40 @@
+"""
+Shared image cache (settings wiring)
+
+The cache itself is shared/image_cache.py at the repository root, the same
+implementation description_ai uses, so both services can point
+IMAGE_CACHE_DIR at one directory. Cached variants are validated with a
+conditional GET (If-None-Match), see s3_utils.download_s3_images.
+"""
+import sys
+import threading
+from pathlib import Path
+from typing import Optional
+
+from app.config import settings
+from app.utils.logger import setup_logger
+
+# Repository root (shared/ package)
+_REPO_ROOT = str(Path(__file__).resolve().parents[3])
+if _REPO_ROOT not in sys.path:
+    sys.path.append(_REPO_ROOT)
+
+from shared.image_cache import ImageCache  # noqa: E402
+
+__all__ = ["ImageCache", "get_image_cache"]
+
+logger = setup_logger(__name__)
+
+_cache: Optional[ImageCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_image_cache() -> Optional[ImageCache]:
+    """Shared cache instance, or None when IMAGE_CACHE_ENABLED is off"""
+    global _cache
+    if not settings.IMAGE_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ImageCache(settings.IMAGE_CACHE_DIR, settings.IMAGE_CACHE_MAX_MB * 1024 * 1024, log=logger.info)
+        return _cache
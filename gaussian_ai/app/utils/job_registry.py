@@ -0,0 +1,182 @@
+"""
+In-flight job registry (one running job per product_id)
+
+POST /recon/jobs used to start a new pipeline for every request, so a retried
+or double-clicked submission ran two reconstructions into the same
+DATA_DIR/product_id directory. The registry owns the job tasks instead:
+
+- same inputs while running      → attach (no new pipeline)
+- different inputs while running → supersede: cancel the old task, wait for
+                                   its cleanup, then start the new one
+- Idempotency-Key header         → attach to the running job submitted with
+                                   that key without recomputing the fingerprint
+- cancel(product_id)             → DELETE /recon/jobs/{id}; the cancellation
+                                   reaches run_command, which kills the
+                                   COLMAP/train.py process group
+
+Inputs are identified by a fingerprint of the S3 ETags (content hashes) and
+job parameters; completed jobs keep theirs in jobs.input_fingerprint so an
+identical resubmission can return immediately (see api/jobs.py).
+
+Usage:
+    outcome, entry = await recon_registry.submit(product_id, fingerprint, key, lambda: run(...))
+"""
+import asyncio
+import hashlib
+import json
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.utils.logger import setup_logger
+from app.utils.metrics import JOB_SUBMISSIONS, JOBS_CANCELLED
+
+logger = setup_logger(__name__)
+
+
+def input_fingerprint(items: Iterable[Tuple[str, str]], **params) -> str:
+    """
+    Stable hash of job inputs
+
+    Args:
+        items: (s3_path, etag) pairs in submission order
+        params: Other inputs that change the result (e.g. iterations)
+    """
+    payload = json.dumps({"items": list(items), "params": params}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class JobEntry:
+    """A running job"""
+    product_id: str
+    fingerprint: str
+    idempotency_key: Optional[str]
+    task: asyncio.Task
+    started_at: float = field(default_factory=time.time)
+    attached: int = 0  # duplicate submissions that attached to this job
+
+
+class JobRegistry:
+    """Tracks the running task per product_id"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._jobs: Dict[str, JobEntry] = {}
+        self._locks: Dict[str, List] = {}  # product_id → [Lock, holders + waiters]
+
+    @asynccontextmanager
+    async def _product_lock(self, product_id: str) -> AsyncIterator[None]:
+        """
+        Serialize submit/cancel per product_id
+
+        Superseding or cancelling waits for the old task to unwind (process
+        group termination, DB writes), which must not block other products.
+        """
+        slot = self._locks.setdefault(product_id, [asyncio.Lock(), 0])
+        slot[1] += 1
+        try:
+            async with slot[0]:
+                yield
+        finally:
+            slot[1] -= 1
+            if slot[1] == 0:
+                del self._locks[product_id]
+
+    def get(self, product_id: str) -> Optional[JobEntry]:
+        entry = self._jobs.get(product_id)
+        return entry if entry is not None and not entry.task.done() else None
+
+    def find_by_key(self, product_id: str, idempotency_key: Optional[str]) -> Optional[JobEntry]:
+        """Running job for product_id that was submitted with idempotency_key"""
+        entry = self.get(product_id)
+        if entry is None or not idempotency_key or entry.idempotency_key != idempotency_key:
+            return None
+        entry.attached += 1
+        JOB_SUBMISSIONS.labels("attached").inc()
+        return entry
+
+    async def submit(
+        self,
+        product_id: str,
+        fingerprint: str,
+        idempotency_key: Optional[str],
+        run: Callable[[], Awaitable[None]]
+    ) -> Tuple[str, JobEntry]:
+        """
+        Start run() for product_id unless an identical job is already running
+
+        Returns:
+            (outcome, entry): outcome is "attached", "started" or "superseded"
+        """
+        async with self._product_lock(product_id):
+            previous = self.get(product_id)
+            if previous is not None and previous.fingerprint == fingerprint:
+                previous.attached += 1
+                JOB_SUBMISSIONS.labels("attached").inc()
+                return "attached", previous
+
+            outcome = "started"
+            if previous is not None:
+                # Inputs changed: stop the old pipeline before the new one touches its directory
+                outcome = "superseded"
+                logger.info(f"[{self.name}] Superseding running job for {product_id}")
+                await self._cancel_entry(previous, "Superseded by a new submission", "superseded")
+
+            entry = JobEntry(product_id, fingerprint, idempotency_key, asyncio.create_task(run()))
+            self._jobs[product_id] = entry
+            entry.task.add_done_callback(lambda _task: self._forget(entry))
+            JOB_SUBMISSIONS.labels(outcome).inc()
+            return outcome, entry
+
+    async def cancel(self, product_id: str, reason: str = "Cancelled by request") -> bool:
+        """
+        Cancel the queued or running job for product_id and wait for its cleanup
+
+        Returns:
+            False if no job was running
+        """
+        async with self._product_lock(product_id):
+            entry = self.get(product_id)
+            if entry is None:
+                return False
+            logger.info(f"[{self.name}] Cancelling job for {product_id}: {reason}")
+            await self._cancel_entry(entry, reason, "request")
+            return True
+
+    async def _cancel_entry(self, entry: JobEntry, reason: str, label: str) -> None:
+        """Cancel entry.task with reason (CancelledError.args[0]) and wait until it has unwound"""
+        entry.task.cancel(reason)
+        JOBS_CANCELLED.labels(label).inc()
+        await asyncio.gather(entry.task, return_exceptions=True)
+
+    def _forget(self, entry: JobEntry) -> None:
+        if self._jobs.get(entry.product_id) is entry:
+            del self._jobs[entry.product_id]
+
+    async def shutdown(self) -> None:
+        """Cancel all running jobs (app lifespan shutdown)"""
+        tasks = [entry.task for entry in self._jobs.values() if not entry.task.done()]
+        for task in tasks:
+            task.cancel("Service shutting down")
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._jobs.clear()
+
+    def stats(self) -> dict:
+        return {
+            "running": len([entry for entry in self._jobs.values() if not entry.task.done()]),
+            "jobs": [
+                {
+                    "product_id": entry.product_id,
+                    "started_at": entry.started_at,
+                    "attached": entry.attached,
+                }
+                for entry in self._jobs.values()
+            ],
+        }
+
+
+# Process-wide registry for reconstruction jobs
+recon_registry = JobRegistry("recon")
@@ -0,0 +1,177 @@
+"""
+Prometheus metrics (exposed at GET /metrics)
+
+Stage latencies, S3 download time/size, DB call latency, queue depth/wait
+and PLY bytes served per quality level.
+"""
+import functools
+import time
+from contextlib import asynccontextmanager
+from typing import List, Optional, Tuple
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# Bucket sets
+_STAGE_BUCKETS = (0.5, 1, 5, 10, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200)
+_FAST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+_BYTES_BUCKETS = tuple(2 ** i for i in range(14, 31, 2))  # 16KB ~ 1GB
+
+
+STAGE_DURATION = Histogram(
+    "recon_stage_duration_seconds",
+    "Duration of each reconstruction pipeline stage",
+    ["stage"],
+    buckets=_STAGE_BUCKETS
+)
+STAGE_FAILURES = Counter(
+    "recon_stage_failures_total",
+    "Pipeline failures by the stage that was running",
+    ["stage"]
+)
+STAGE_TIMEOUTS = Counter(
+    "recon_stage_timeouts_total",
+    "Stages killed by the watchdog (kind: budget = wall-clock budget, stall = no output)",
+    ["stage", "kind"]
+)
+S3_DOWNLOAD_SECONDS = Histogram(
+    "recon_s3_download_seconds",
+    "Per-image S3 download time",
+    buckets=_FAST_BUCKETS
+)
+S3_DOWNLOAD_BYTES = Histogram(
+    "recon_s3_download_bytes",
+    "Per-image S3 download size",
+    buckets=_BYTES_BUCKETS
+)
+IMAGE_PROCESS_SECONDS = Histogram(
+    "recon_image_process_seconds",
+    "Per-image decode/resize/encode time in the process pool",
+    buckets=_FAST_BUCKETS
+)
+IMAGE_CACHE_REQUESTS = Counter(
+    "recon_image_cache_requests_total",
+    "Shared image cache lookups by result (hit, miss, stale)",
+    ["result"]
+)
+DB_CALL_SECONDS = Histogram(
+    "recon_db_call_seconds",
+    "Database call latency",
+    ["database", "operation"],
+    buckets=_FAST_BUCKETS
+)
+QUEUE_DEPTH = Gauge(
+    "recon_queue_depth",
+    "Jobs waiting for a processing slot"
+)
+JOBS_RUNNING = Gauge(
+    "recon_jobs_running",
+    "Jobs currently holding a processing slot"
+)
+QUEUE_WAIT_SECONDS = Histogram(
+    "recon_queue_wait_seconds",
+    "Time a job waited for a processing slot",
+    buckets=_STAGE_BUCKETS
+)
+JOB_SUBMISSIONS = Counter(
+    "recon_job_submissions_total",
+    "POST /recon/jobs outcomes (started, attached, superseded, completed)",
+    ["outcome"]
+)
+JOBS_CANCELLED = Counter(
+    "recon_jobs_cancelled_total",
+    "Jobs cancelled while queued or running (request, superseded)",
+    ["reason"]
+)
+PREEMPTIONS = Counter(
+    "recon_preemptions_total",
+    "Times a running job yielded its slot to a higher-priority job at a stage boundary"
+)
+PLY_SERVED_BYTES = Histogram(
+    "recon_ply_served_bytes",
+    "Size of PLY files served (sum = total bytes)",
+    ["quality"],
+    buckets=_BYTES_BUCKETS
+)
+
+
+class StageTimer:
+    """
+    Records durations of consecutive pipeline stages
+
+    Usage:
+        stages = StageTimer()
+        stages.enter("COLMAP_FEAT")   # closes the previous stage, if any
+        ...
+        stages.finish()               # success
+        stages.fail()                 # or: failure in the current stage
+        stages.abandon()              # or: cancelled (recorded as neither)
+
+    stages.records keeps (stage, seconds, outcome) for every closed stage
+    (persisted to stage_runs for budget tuning).
+    """
+
+    def __init__(self):
+        self.current: Optional[str] = None
+        self._started_at: Optional[float] = None
+        self.records: List[Tuple[str, float, str]] = []
+
+    def enter(self, stage: str) -> None:
+        self.finish()
+        self.current = stage
+        self._started_at = time.perf_counter()
+
+    def finish(self) -> None:
+        if self.current is not None:
+            seconds = time.perf_counter() - self._started_at
+            STAGE_DURATION.labels(self.current).observe(seconds)
+            self.records.append((self.current, seconds, "ok"))
+        self.current = None
+        self._started_at = None
+
+    def fail(self, outcome: str = "failed") -> None:
+        """outcome: failed, budget (timed out) or stall (no output)"""
+        if self.current is not None:
+            STAGE_FAILURES.labels(self.current).inc()
+            self.records.append((self.current, time.perf_counter() - self._started_at, outcome))
+        self.current = None
+        self._started_at = None
+
+    def abandon(self) -> None:
+        self.current = None
+        self._started_at = None
+
+
+def timed_db(database: str):
+    """Decorator recording the latency of a DB helper (label = function name)"""
+    def decorator(func):
+        histogram = DB_CALL_SECONDS.labels(database, func.__name__)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with histogram.time():
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@asynccontextmanager
+async def queued_slot(semaphore):
+    """
+    Acquire a processing slot while tracking queue depth and wait time
+
+    semaphore: anything with async acquire() / release() (asyncio.Semaphore, SlotTicket)
+    """
+    queued_at = time.perf_counter()
+    QUEUE_DEPTH.inc()
+    try:
+        await semaphore.acquire()
+    finally:
+        QUEUE_DEPTH.dec()
+
+    QUEUE_WAIT_SECONDS.observe(time.perf_counter() - queued_at)
+    JOBS_RUNNING.inc()
+    try:
+        yield
+    finally:
+        JOBS_RUNNING.dec()
+        semaphore.release()
@@ -0,0 +1,67 @@
+"""
+Shared process pool for CPU-bound work (image decode/resize)
+
+Created lazily on first use and shut down in the app lifespan. Workers are
+spawned, not forked: the server process runs threads (S3 clients, job
+tasks), and forking a threaded process can deadlock the child.
+
+If a worker dies (OOM kill etc.) the pool is dropped, the call falls back to
+a thread, and the next call starts a fresh pool.
+"""
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional
+
+from app.config import settings
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Get (or create) the shared process pool"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.IMAGE_PROCESS_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            logger.info(f"Started image process pool ({settings.IMAGE_PROCESS_WORKERS} workers)")
+        return _pool
+
+
+async def run_in_process(func: Callable, *args):
+    """Run a picklable function in the shared process pool"""
+    pool = get_process_pool()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, func, *args)
+    except BrokenProcessPool:
+        logger.warning(f"Image process pool broken, rebuilding; running {func.__name__} in a thread")
+        _reset_process_pool(pool)
+        return await asyncio.to_thread(func, *args)
+
+
+def _reset_process_pool(broken: ProcessPoolExecutor) -> None:
+    """Drop a broken pool (a concurrent caller may already have replaced it)"""
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_process_pool() -> None:
+    """Shut down the shared process pool (no-op if never started)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+            logger.info("Image process pool shut down")
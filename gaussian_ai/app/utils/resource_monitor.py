@@ -0,0 +1,419 @@
+"""
+Background resource sampler (GPU memory/utilization, CPU/RSS of child processes)
+
+Samples are taken in-process at a fixed rate into a per-job ring buffer,
+instead of forking nvidia-smi from the subprocess read loop.
+
+GPU memory is read twice: per device (everything on the GPU, including other
+jobs) and per job (memory held by the tracked subprocess tree, from NVML's
+per-process accounting). Job peaks use the per-job value; the device value is
+kept as device_gpu_memory_mb. GPU utilization is only available per device.
+
+Backends are tried in order (RESOURCE_MONITOR_BACKEND=auto):
+    1. nvml  - NVML bindings (pynvml / nvidia-ml-py) + /proc for the process
+    2. proc  - /proc only (CPU/RSS, no GPU)
+    3. stub  - no data (non-Linux, no driver)
+"""
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+
+from app.config import settings
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+_MB = 1024 * 1024
+
+
+# ==================== Backends ====================
+
+class StubBackend:
+    """Backend that reports nothing (used when nothing else is available)"""
+
+    name = "stub"
+
+    def read_gpu(self) -> List[Dict]:
+        return []
+
+    def read_gpu_processes(self, pids: Set[int]) -> Optional[int]:
+        """GPU memory (MB) held by the given processes across all GPUs, None if unknown"""
+        return None
+
+    def read_process_tree(self, pid: int) -> Optional[Dict]:
+        return None
+
+
+class ProcBackend(StubBackend):
+    """CPU time and RSS of a process tree read from /proc"""
+
+    name = "proc"
+
+    def __init__(self):
+        if not Path("/proc/self/stat").exists():
+            raise RuntimeError("/proc is not available")
+        self._page_size = os.sysconf("SC_PAGE_SIZE")
+        self._clock_ticks = os.sysconf("SC_CLK_TCK")
+
+    def _children(self, pid: int) -> List[int]:
+        children = []
+        task_dir = Path(f"/proc/{pid}/task")
+        try:
+            for task in task_dir.iterdir():
+                content = (task / "children").read_text().split()
+                children.extend(int(c) for c in content)
+        except (OSError, ValueError):
+            pass
+        return children
+
+    def read_process_tree(self, pid: int) -> Optional[Dict]:
+        """
+        Sum CPU seconds and RSS over the process and all of its descendants
+
+        Returns:
+            {"cpu_seconds": float, "rss_mb": float, "num_processes": int, "pids": set}
+            or None if gone
+        """
+        pending = [pid]
+        seen = set()
+        cpu_ticks = 0
+        rss_pages = 0
+
+        while pending:
+            current = pending.pop()
+            if current in seen:
+                continue
+            seen.add(current)
+            try:
+                stat = Path(f"/proc/{current}/stat").read_text()
+            except OSError:
+                if current == pid:
+                    return None
+                continue
+
+            # Fields after the "(comm)" part, which may itself contain spaces
+            fields = stat.rsplit(")", 1)[1].split()
+            cpu_ticks += int(fields[11]) + int(fields[12])  # utime + stime
+            rss_pages += int(fields[21])
+            pending.extend(self._children(current))
+
+        return {
+            "cpu_seconds": cpu_ticks / self._clock_ticks,
+            "rss_mb": rss_pages * self._page_size / _MB,
+            "num_processes": len(seen),
+            "pids": seen,
+        }
+
+
+class NvmlBackend(ProcBackend):
+    """GPU memory/utilization via NVML (no fork), process stats via /proc"""
+
+    name = "nvml"
+
+    def __init__(self):
+        import pynvml
+
+        pynvml.nvmlInit()
+        self._nvml = pynvml
+        self._handles = [
+            pynvml.nvmlDeviceGetHandleByIndex(i)
+            for i in range(pynvml.nvmlDeviceGetCount())
+        ]
+        try:
+            super().__init__()
+            self._has_proc = True
+        except RuntimeError:
+            self._has_proc = False
+
+    def read_gpu(self) -> List[Dict]:
+        gpus = []
+        for index, handle in enumerate(self._handles):
+            try:
+                memory = self._nvml.nvmlDeviceGetMemoryInfo(handle)
+                utilization = self._nvml.nvmlDeviceGetUtilizationRates(handle)
+            except self._nvml.NVMLError as e:
+                logger.debug(f"NVML read failed for GPU {index}: {e}")
+                continue
+            gpus.append({
+                "index": index,
+                "memory_used_mb": memory.used // _MB,
+                "memory_total_mb": memory.total // _MB,
+                "utilization_percent": utilization.gpu,
+            })
+        return gpus
+
+    def read_gpu_processes(self, pids: Set[int]) -> Optional[int]:
+        """
+        Sum NVML's per-process GPU memory over the given PIDs
+
+        NVML reports host PIDs: inside a container without the host PID
+        namespace nothing matches and the job reads 0MB.
+        """
+        used = 0
+        for index, handle in enumerate(self._handles):
+            try:
+                processes = self._nvml.nvmlDeviceGetComputeRunningProcesses(handle)
+            except self._nvml.NVMLError as e:
+                logger.debug(f"NVML process list failed for GPU {index}: {e}")
+                return None
+            for process in processes:
+                # usedGpuMemory is None where the driver cannot attribute memory (e.g. WDDM)
+                if process.pid in pids and process.usedGpuMemory is not None:
+                    used += process.usedGpuMemory
+        return used // _MB
+
+    def read_process_tree(self, pid: int) -> Optional[Dict]:
+        if not self._has_proc:
+            return None
+        return super().read_process_tree(pid)
+
+
+# Registered backends in fallback order (name -> factory)
+_BACKENDS: Dict[str, Callable[[], StubBackend]] = {
+    "nvml": NvmlBackend,
+    "proc": ProcBackend,
+    "stub": StubBackend,
+}
+_backend: Optional[StubBackend] = None
+
+
+def register_backend(name: str, factory: Callable[[], StubBackend]) -> None:
+    """
+    Register a custom sampling backend
+
+    Custom backends are tried before the built-in ones when
+    RESOURCE_MONITOR_BACKEND=auto, or selected explicitly by name.
+    """
+    global _BACKENDS, _backend
+    others = {k: v for k, v in _BACKENDS.items() if k != name}
+    _BACKENDS = {name: factory, **others}
+    _backend = None
+
+
+def get_backend() -> StubBackend:
+    """Get (and lazily initialize) the process-wide sampling backend"""
+    global _backend
+    if _backend is not None:
+        return _backend
+
+    requested = settings.RESOURCE_MONITOR_BACKEND
+    candidates = list(_BACKENDS) if requested == "auto" else [requested, "stub"]
+
+    for name in candidates:
+        factory = _BACKENDS.get(name)
+        if factory is None:
+            logger.warning(f"Unknown resource monitor backend: {name}")
+            continue
+        try:
+            _backend = factory()
+            logger.info(f"Resource monitor backend: {name}")
+            return _backend
+        except Exception as e:
+            logger.info(f"Resource monitor backend '{name}' unavailable: {e}")
+
+    _backend = StubBackend()
+    return _backend
+
+
+def format_gpu(gpus: List[Dict]) -> str:
+    """Format GPU readings like the old nvidia-smi output"""
+    parts = []
+    for gpu in gpus:
+        total = gpu["memory_total_mb"]
+        percent = (gpu["memory_used_mb"] / total * 100) if total > 0 else 0
+        parts.append(
+            f"GPU {gpu['index']}: {gpu['memory_used_mb']}MB / {total}MB ({percent:.1f}%), "
+            f"util {gpu['utilization_percent']}%"
+        )
+    return " | ".join(parts)
+
+
+# ==================== Sampler ====================
+
+class ResourceSampler:
+    """
+    Samples GPU and child-process resources at a fixed rate into a ring buffer
+
+    Usage:
+        sampler = start_job_sampler(product_id)
+        sampler.track(process.pid)   # done by run_command
+        ...
+        await stop_job_sampler(product_id)
+    """
+
+    def __init__(
+        self,
+        product_id: str,
+        interval: Optional[float] = None,
+        max_samples: Optional[int] = None,
+        backend: Optional[StubBackend] = None
+    ):
+        self.product_id = product_id
+        self.interval = interval or settings.RESOURCE_SAMPLE_INTERVAL
+        self.backend = backend or get_backend()
+        self.samples: deque = deque(maxlen=max_samples or settings.RESOURCE_SAMPLE_BUFFER)
+        self.peaks: Dict[str, float] = {}
+        self.started_at = time.time()
+
+        self._pid: Optional[int] = None
+        self._last_cpu: Optional[tuple] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def track(self, pid: int) -> None:
+        """Start attributing CPU/RSS samples to the given child process"""
+        self._pid = pid
+        self._last_cpu = None
+
+    def untrack(self) -> None:
+        """Stop tracking the current child process"""
+        self._pid = None
+        self._last_cpu = None
+
+    def sample_once(self) -> Dict:
+        """Take a single sample and append it to the ring buffer"""
+        now = time.time()
+        sample = {"t": round(now - self.started_at, 3), "gpus": self.backend.read_gpu()}
+
+        if self._pid is not None:
+            proc = self.backend.read_process_tree(self._pid)
+            if proc is not None:
+                sample["rss_mb"] = round(proc["rss_mb"], 1)
+                sample["num_processes"] = proc["num_processes"]
+                pids = proc.get("pids")
+                gpu_memory = self.backend.read_gpu_processes(pids) if pids else None
+                if gpu_memory is not None:
+                    sample["gpu_memory_mb"] = gpu_memory
+                if self._last_cpu is not None:
+                    last_time, last_cpu = self._last_cpu
+                    elapsed = now - last_time
+                    if elapsed > 0:
+                        sample["cpu_percent"] = round((proc["cpu_seconds"] - last_cpu) / elapsed * 100, 1)
+                self._last_cpu = (now, proc["cpu_seconds"])
+
+        self.samples.append(sample)
+        self._update_peaks(sample)
+        return sample
+
+    def _update_peaks(self, sample: Dict) -> None:
+        values = {
+            # Job's own subprocesses (stored as Job.peak_gpu_memory_mb)
+            "gpu_memory_mb": sample.get("gpu_memory_mb"),
+            # Whole device, other jobs included (busiest GPU)
+            "device_gpu_memory_mb": max((g["memory_used_mb"] for g in sample["gpus"]), default=None),
+            "gpu_utilization_percent": max((g["utilization_percent"] for g in sample["gpus"]), default=None),
+            "rss_mb": sample.get("rss_mb"),
+            "cpu_percent": sample.get("cpu_percent"),
+        }
+        for key, value in values.items():
+            if value is not None and value > self.peaks.get(key, float("-inf")):
+                self.peaks[key] = value
+
+    def latest(self) -> Optional[Dict]:
+        """Most recent sample, if any"""
+        return self.samples[-1] if self.samples else None
+
+    def format_latest_gpu(self) -> str:
+        """Latest GPU reading formatted for the job log"""
+        latest = self.latest()
+        if latest is None or not latest["gpus"]:
+            return "N/A"
+        return format_gpu(latest["gpus"])
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                self.sample_once()
+            except Exception as e:
+                logger.debug(f"Resource sample failed for {self.product_id}: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Start periodic sampling on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop periodic sampling"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def to_dict(self, limit: Optional[int] = None) -> Dict:
+        samples = list(self.samples)
+        if limit is not None:
+            samples = samples[-limit:]
+        return {
+            "product_id": self.product_id,
+            "backend": self.backend.name,
+            "interval_seconds": self.interval,
+            "peaks": self.peaks,
+            "sample_count": len(self.samples),
+            "samples": samples,
+        }
+
+    def save(self, path: Path) -> None:
+        """Persist the time series as JSON (read back by the resources endpoint)"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f)
+
+
+# ==================== Per-job registry ====================
+
+_job_samplers: Dict[str, ResourceSampler] = {}
+
+
+def resources_file(product_id: str) -> Path:
+    """Location of the persisted time series for a job"""
+    return settings.DATA_DIR / product_id / "logs" / "resources.json"
+
+
+def start_job_sampler(product_id: str) -> ResourceSampler:
+    """Create and start the sampler for a job"""
+    sampler = ResourceSampler(product_id)
+    sampler.start()
+    _job_samplers[product_id] = sampler
+    return sampler
+
+
+def get_job_sampler(product_id: str) -> Optional[ResourceSampler]:
+    """Live sampler of a running job"""
+    return _job_samplers.get(product_id)
+
+
+async def stop_job_sampler(product_id: str) -> Optional[ResourceSampler]:
+    """Stop a job's sampler and persist its time series"""
+    sampler = _job_samplers.pop(product_id, None)
+    if sampler is None:
+        return None
+
+    await sampler.stop()
+    try:
+        sampler.save(resources_file(product_id))
+    except Exception as e:
+        logger.warning(f"Failed to save resource samples for {product_id}: {e}")
+    return sampler
+
+
+def load_job_resources(product_id: str, limit: Optional[int] = None) -> Optional[Dict]:
+    """Resource time series of a job (live if running, otherwise from disk)"""
+    sampler = get_job_sampler(product_id)
+    if sampler is not None:
+        return sampler.to_dict(limit=limit)
+
+    path = resources_file(product_id)
+    if not path.exists():
+        return None
+    with open(path, "r") as f:
+        data = json.load(f)
+    if limit is not None:
+        data["samples"] = data["samples"][-limit:]
+    return data
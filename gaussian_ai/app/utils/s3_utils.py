@@ -1,112 +1,232 @@
 """
 S3 utility functions for downloading images
 """
-import boto3
+import asyncio
+import threading
+import time
 import unicodedata
 from pathlib import Path
-from typing import List
-from PIL import Image
+from typing import List, Optional, Tuple
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
 from app.config import settings
+from app.utils.image import resize_image_bytes
+from app.utils.image_cache import ImageCache, get_image_cache
 from app.utils.logger import setup_logger
+from app.utils.metrics import (
+    S3_DOWNLOAD_SECONDS,
+    S3_DOWNLOAD_BYTES,
+    IMAGE_PROCESS_SECONDS,
+    IMAGE_CACHE_REQUESTS
+)
+from app.utils.process_pool import run_in_process
 
 logger = setup_logger(__name__)
 
+_s3_client = None
+_s3_client_lock = threading.Lock()
 
-async def download_s3_images(s3_paths: List[str], dest_dir: Path) -> int:
-    """
-    S3에서 이미지를 다운로드하여 로컬 디렉토리에 저장
 
-    Args:
-        s3_paths: S3 경로 리스트 (s3://bucket/key 형식)
-        dest_dir: 저장할 로컬 디렉토리 (Path 객체)
+def get_s3_client():
+    """
+    Get the shared S3 client (created once, thread-safe)
 
-    Returns:
-        int: 성공적으로 다운로드한 이미지 개수
+    - Connection pool sized for S3_DOWNLOAD_CONCURRENCY parallel GETs
+    - Adaptive retry mode (client-side rate limiting on throttling)
+    - S3_ENDPOINT_URL이 설정되면 S3 호환 서버(MinIO 등)를 사용
+    """
+    global _s3_client
+    with _s3_client_lock:
+        if _s3_client is None:
+            config = Config(
+                max_pool_connections=max(settings.S3_MAX_POOL_CONNECTIONS, settings.S3_DOWNLOAD_CONCURRENCY),
+                retries={"max_attempts": settings.S3_MAX_ATTEMPTS, "mode": "adaptive"},
+            )
+            _s3_client = boto3.client('s3', endpoint_url=settings.S3_ENDPOINT_URL or None, config=config)
+        return _s3_client
+
+
+def parse_s3_path(s3_path: str) -> Tuple[str, str]:
+    """
+    Split s3://bucket/key into (bucket, key)
 
     Raises:
         ValueError: S3 경로 형식이 잘못된 경우
-        Exception: S3 다운로드 실패 시
     """
-    import asyncio
+    if not s3_path.startswith('s3://'):
+        raise ValueError(f"Invalid S3 path format: {s3_path}. Must start with 's3://'")
 
-    s3 = boto3.client('s3')
-    dest_dir.mkdir(parents=True, exist_ok=True)
+    parts = s3_path.replace("s3://", "").split("/", 1)
+    if len(parts) != 2:
+        raise ValueError(f"Invalid S3 path format: {s3_path}. Expected s3://bucket/key")
 
-    def _download_single_image(s3_path: str, index: int) -> bool:
-        """단일 이미지 다운로드 (동기 함수)"""
+    bucket, key = parts
+    # 한글 파일명 정규화 (NFC 통일)
+    return bucket, unicodedata.normalize('NFC', key)
+
+
+async def head_etags(s3_paths: List[str]) -> List[Tuple[str, str]]:
+    """
+    (s3_path, ETag) for each image, in order (job input fingerprint)
+
+    ETag is the object's content hash for single-part uploads, so a re-uploaded
+    photo under the same key changes the fingerprint. Objects that cannot be
+    HEADed get an empty ETag (the download step reports the failure).
+    """
+    s3 = get_s3_client()
+    semaphore = asyncio.Semaphore(settings.S3_DOWNLOAD_CONCURRENCY)
+
+    async def _head(s3_path: str) -> Tuple[str, str]:
         try:
-            # S3 경로 파싱
-            if not s3_path.startswith('s3://'):
-                raise ValueError(f"Invalid S3 path format: {s3_path}. Must start with 's3://'")
+            bucket, key = parse_s3_path(s3_path)
+            async with semaphore:
+                response = await asyncio.to_thread(s3.head_object, Bucket=bucket, Key=key)
+            return s3_path, response.get("ETag", "")
+        except Exception as e:
+            logger.warning(f"HEAD failed for {s3_path}: {e}")
+            return s3_path, ""
 
-            path = s3_path.replace("s3://", "")
-            parts = path.split("/", 1)
+    return list(await asyncio.gather(*[_head(s3_path) for s3_path in s3_paths]))
 
-            if len(parts) != 2:
-                raise ValueError(f"Invalid S3 path format: {s3_path}. Expected s3://bucket/key")
 
-            bucket, key = parts
+def _is_not_modified(error: ClientError) -> bool:
+    status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+    return status == 304 or error.response.get("Error", {}).get("Code") in ("304", "NotModified")
 
-            # 한글 파일명 정규화 (NFC 통일)
-            key = unicodedata.normalize('NFC', key)
 
-            # 파일 확장자 추출
-            file_ext = Path(key).suffix or ".jpg"
+def _fetch_object(s3, bucket: str, key: str, if_none_match: Optional[str] = None) -> Optional[Tuple[bytes, str]]:
+    """
+    GET an object into memory (runs in a worker thread); returns (bytes, ETag)
 
-            # 저장할 로컬 파일명 (순서대로 번호 부여)
-            local_filename = f"image_{index:04d}{file_ext}"
-            local_path = dest_dir / local_filename
+    With if_none_match (the ETag a cached variant was made from), returns None
+    when the object is unchanged (304): cache validation and the download
+    share one request, the same way description_ai validates the cache.
+    """
+    params = {"Bucket": bucket, "Key": key}
+    if if_none_match:
+        params["IfNoneMatch"] = if_none_match
+    try:
+        response = s3.get_object(**params)
+    except ClientError as e:
+        if if_none_match and _is_not_modified(e):
+            return None
+        raise
+    return response["Body"].read(), response.get("ETag", "")
 
-            logger.info(f"Downloading S3 image {index+1}: s3://{bucket}/{key} → {local_path}")
 
-            # S3에서 임시 파일로 다운로드
-            temp_path = local_path.parent / f"temp_{local_filename}"
-            s3.download_file(bucket, key, str(temp_path))
+def _store_variant(cache: ImageCache, bucket: str, key: str, etag: str, original: bytes,
+                   variant: str, processed_path: Path) -> None:
+    """Record the processed file in the shared cache (runs in a worker thread)"""
+    cache.store(bucket, key, etag, original, variant, processed_path.read_bytes())
 
-            # 이미지 리사이즈 (항상 1600px로)
-            try:
-                img = Image.open(temp_path)
-                width, height = img.size
 
-                # MAX_IMAGE_SIZE(1600)보다 크면 리사이즈
-                if width > settings.MAX_IMAGE_SIZE or height > settings.MAX_IMAGE_SIZE:
-                    ratio = min(settings.MAX_IMAGE_SIZE / width, settings.MAX_IMAGE_SIZE / height)
-                    new_width = int(width * ratio)
-                    new_height = int(height * ratio)
-                    img = img.resize((new_width, new_height), Image.LANCZOS)
-                    logger.info(f"Resized {local_filename}: {width}x{height} → {new_width}x{new_height}")
+async def download_s3_images(s3_paths: List[str], dest_dir: Path) -> int:
+    """
+    S3에서 이미지를 다운로드하여 로컬 디렉토리에 저장
+
+    최대 S3_DOWNLOAD_CONCURRENCY개를 동시에 GET하고, 받은 바이트를 임시 파일 없이
+    프로세스 풀에서 바로 디코딩/리사이즈(MAX_IMAGE_SIZE)하여 저장합니다.
+    (JPEG draft 디코딩 + EXIF 회전 적용, 변경이 없으면 원본 바이트 그대로 저장)
+    처리 결과는 공유 이미지 캐시(IMAGE_CACHE_DIR)에 저장되어 같은 ETag의
+    재요청은 조건부 GET(If-None-Match → 304, 본문 없음) 한 번으로 끝납니다.
+
+    Args:
+        s3_paths: S3 경로 리스트 (s3://bucket/key 형식)
+        dest_dir: 저장할 로컬 디렉토리 (Path 객체)
+
+    Returns:
+        int: 성공적으로 다운로드한 이미지 개수
 
-                # 리사이즈된 이미지 저장
-                img.save(str(local_path), quality=95)
+    Raises:
+        ValueError: S3 경로 형식이 잘못된 경우
+        Exception: S3 다운로드 실패 시
+    """
+    s3 = get_s3_client()
+    cache = get_image_cache()
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    semaphore = asyncio.Semaphore(settings.S3_DOWNLOAD_CONCURRENCY)
+    batch_start = time.perf_counter()
 
-                # 임시 파일 삭제
-                temp_path.unlink()
+    async def _download_single_image(s3_path: str, index: int) -> bool:
+        """단일 이미지 다운로드 + 리사이즈"""
+        try:
+            bucket, key = parse_s3_path(s3_path)
 
-            except Exception as e:
-                logger.warning(f"Failed to resize {local_filename}: {e}. Using original.")
-                # 리사이즈 실패 시 원본 사용
-                if temp_path.exists():
-                    temp_path.rename(local_path)
+            # 저장할 로컬 파일명 (순서대로 번호 부여)
+            file_ext = Path(key).suffix or ".jpg"
+            local_filename = f"image_{index:04d}{file_ext}"
+            local_path = dest_dir / local_filename
 
-            logger.info(f"Successfully downloaded and processed: {local_filename}")
+            variant = f"colmap_{settings.MAX_IMAGE_SIZE}{file_ext.lower()}"
+
+            async with semaphore:
+                download_start = time.perf_counter()
+
+                cached_etag, cached = None, None
+                if cache is not None:
+                    cached_etag, cached = await asyncio.to_thread(cache.cached_variant, bucket, key, variant)
+
+                fetched = await asyncio.to_thread(_fetch_object, s3, bucket, key, cached_etag)
+                if fetched is None:
+                    IMAGE_CACHE_REQUESTS.labels("hit").inc()
+                    local_path.write_bytes(cached)
+                    logger.info(
+                        f"⏱ {local_filename} ← s3://{bucket}/{key}: "
+                        f"cache hit {time.perf_counter() - download_start:.2f}s"
+                    )
+                    return True
+                if cache is not None:
+                    IMAGE_CACHE_REQUESTS.labels("stale" if cached_etag else "miss").inc()
+
+                data, etag = fetched
+                download_seconds = time.perf_counter() - download_start
+
+            S3_DOWNLOAD_SECONDS.observe(download_seconds)
+            S3_DOWNLOAD_BYTES.observe(len(data))
+
+            # 디코딩/리사이즈는 프로세스 풀에서 (GIL 회피)
+            result = await run_in_process(resize_image_bytes, data, local_path, settings.MAX_IMAGE_SIZE)
+            IMAGE_PROCESS_SECONDS.observe(result["seconds"])
+
+            if result["error"]:
+                logger.warning(f"Failed to resize {local_filename}: {result['error']}. Using original.")
+            elif result["resized"] or result["rotated"]:
+                (w, h), (nw, nh) = result["original_size"], result["size"]
+                rotated = " (EXIF rotated)" if result["rotated"] else ""
+                logger.info(f"Resized {local_filename}: {w}x{h} → {nw}x{nh}{rotated}")
+
+            if cache is not None and not result["error"]:
+                try:
+                    await asyncio.to_thread(_store_variant, cache, bucket, key, etag, data, variant, local_path)
+                except OSError as e:
+                    logger.warning(f"Failed to cache {local_filename}: {e}")
+
+            logger.info(
+                f"⏱ {local_filename} ← s3://{bucket}/{key}: "
+                f"download {download_seconds:.2f}s ({len(data) / 1024 / 1024:.1f}MB), "
+                f"process {result['seconds']:.2f}s"
+            )
             return True
 
         except Exception as e:
             logger.error(f"Failed to download {s3_path}: {e}")
             return False
 
-    # 비동기로 모든 이미지 다운로드 (동기 함수를 thread에서 실행)
-    tasks = [
-        asyncio.to_thread(_download_single_image, s3_path, i)
-        for i, s3_path in enumerate(s3_paths)
-    ]
-
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+    results = await asyncio.gather(
+        *[_download_single_image(s3_path, i) for i, s3_path in enumerate(s3_paths)],
+        return_exceptions=True
+    )
 
     # 성공한 개수 계산
     success_count = sum(1 for r in results if r is True)
 
-    logger.info(f"Downloaded {success_count}/{len(s3_paths)} images successfully")
+    logger.info(
+        f"Downloaded {success_count}/{len(s3_paths)} images successfully "
+        f"in {time.perf_counter() - batch_start:.2f}s"
+    )
 
     if success_count == 0:
         raise Exception("Failed to download any images from S3")
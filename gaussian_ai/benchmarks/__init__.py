@@ -0,0 +1,8 @@
+"""
+Offline end-to-end pipeline benchmarks (CPU-only, local S3 stand-in)
+
+Usage:
+    cd gaussian_ai
+    python -m benchmarks.run_pipeline --images 20 --points 300000 --output results.json
+    python -m benchmarks.compare baseline.json results.json
+"""
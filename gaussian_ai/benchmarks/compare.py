@@ -0,0 +1,62 @@
+"""
+Compare two benchmark result files stage by stage
+
+Usage:
+    python -m benchmarks.compare baseline.json results.json [--threshold 10]
+
+Exit code is 1 when any stage (or the total) is slower than the baseline by
+more than --threshold percent, so it can gate CI.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> bool:
+    """Print a per-stage delta table; returns True when a regression exceeds threshold"""
+    base_stages = baseline["stages"]
+    cur_stages = current["stages"]
+    regressed = False
+
+    print(f"baseline: {baseline['meta']['commit']}  current: {current['meta']['commit']}")
+    print(f"{'stage':<18} {'baseline':>10} {'current':>10} {'delta':>9}")
+    print("-" * 50)
+
+    rows = [(name, base_stages.get(name, {}).get("seconds"), cur_stages.get(name, {}).get("seconds"))
+            for name in dict.fromkeys([*base_stages, *cur_stages])]
+    rows.append(("total", baseline.get("total_seconds"), current.get("total_seconds")))
+
+    for name, before, after in rows:
+        if before is None or after is None:
+            print(f"{name:<18} {before if before is not None else '-':>10} {after if after is not None else '-':>10} {'n/a':>9}")
+            continue
+
+        delta = (after - before) / before * 100 if before else 0.0
+        flag = ""
+        if delta > threshold:
+            flag = "  ⚠️  regression"
+            regressed = True
+        print(f"{name:<18} {before:>9.3f}s {after:>9.3f}s {delta:>+8.1f}%{flag}")
+
+    return regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare pipeline benchmark results")
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("current", type=Path)
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed slowdown in percent")
+    args = parser.parse_args(argv)
+
+    baseline = json.loads(args.baseline.read_text())
+    current = json.loads(args.current.read_text())
+
+    if baseline["meta"].get("params") != current["meta"].get("params"):
+        print("⚠️  Benchmark parameters differ between runs; deltas may not be meaningful")
+
+    sys.exit(1 if compare(baseline, current, args.threshold) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Directory-backed S3 stand-in for offline benchmarks
+
+Implements the subset of the boto3 S3 client API used by app.utils.s3_utils
+(get_object incl. IfNoneMatch, head_object, download_file, put_object).
+Objects are stored at <root>/<bucket>/<key>. An optional per-request latency
+simulates network RTT.
+"""
+import hashlib
+import io
+import shutil
+import time
+from pathlib import Path
+
+from botocore.exceptions import ClientError
+
+
+class LocalS3Client:
+    """Minimal boto3-compatible S3 client backed by a local directory"""
+
+    def __init__(self, root: Path, latency_ms: float = 0.0):
+        self.root = Path(root)
+        self.latency = latency_ms / 1000.0
+        self.request_count = 0
+
+    def _path(self, bucket: str, key: str) -> Path:
+        return self.root / bucket / key
+
+    def _request(self, bucket: str, key: str) -> Path:
+        self.request_count += 1
+        if self.latency:
+            time.sleep(self.latency)
+        path = self._path(bucket, key)
+        if not path.exists():
+            raise FileNotFoundError(f"NoSuchKey: s3://{bucket}/{key}")
+        return path
+
+    @staticmethod
+    def _etag(path: Path) -> str:
+        return '"' + hashlib.md5(path.read_bytes()).hexdigest() + '"'
+
+    def put_object(self, Bucket: str, Key: str, Body: bytes) -> dict:
+        path = self._path(Bucket, Key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(Body)
+        return {"ETag": self._etag(path)}
+
+    def head_object(self, Bucket: str, Key: str) -> dict:
+        path = self._request(Bucket, Key)
+        return {"ContentLength": path.stat().st_size, "ETag": self._etag(path)}
+
+    def get_object(self, Bucket: str, Key: str, IfNoneMatch: str = None, **kwargs) -> dict:
+        path = self._request(Bucket, Key)
+        data = path.read_bytes()
+        etag = '"' + hashlib.md5(data).hexdigest() + '"'
+        if IfNoneMatch is not None and IfNoneMatch == etag:
+            # Same shape as botocore's 304 error
+            raise ClientError(
+                {"Error": {"Code": "304", "Message": "Not Modified"},
+                 "ResponseMetadata": {"HTTPStatusCode": 304}},
+                "GetObject"
+            )
+        return {
+            "Body": io.BytesIO(data),
+            "ContentLength": len(data),
+            "ETag": etag,
+        }
+
+    def download_file(self, Bucket: str, Key: str, Filename: str) -> None:
+        path = self._request(Bucket, Key)
+        shutil.copyfile(path, Filename)
@@ -0,0 +1,299 @@
+"""
+End-to-end reconstruction pipeline benchmark
+
+Times each stage of the job pipeline on synthetic inputs and writes JSON
+results that can be compared across commits (see benchmarks/compare.py):
+
+    s3_download      download_s3_images() against a local S3 stand-in (incl. resize)
+    colmap_*         real colmap binary when installed, otherwise a synthetic sparse model
+    validation       simple_validation() on the sparse model
+    outlier_filter   filter_outliers() on a synthetic Gaussian PLY
+    lod              create_lightweight_versions()
+    compression      GZIP step of GaussianSplattingTrainer.post_process()
+    serving          GET /recon/pub/{id}/cloud.ply for every quality level
+
+Runs on a CPU-only machine; no AWS credentials, GPU or MySQL required.
+
+Usage:
+    cd gaussian_ai
+    python -m benchmarks.run_pipeline --images 20 --points 300000 --output results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest import mock
+
+BENCH_PRODUCT_ID = "00000000-0000-0000-0000-00000000bench"
+BENCH_BUCKET = "bench-bucket"
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, timeout=5, cwd=Path(__file__).parent
+        ).stdout.strip() or "unknown"
+    except Exception:
+        return "unknown"
+
+
+class StageRecorder:
+    """Collects wall-clock durations and extra info per stage"""
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name: str, **info):
+        start = time.perf_counter()
+        entry = dict(info)
+        try:
+            yield entry
+            entry["status"] = entry.get("status", "ok")
+        except Exception as e:
+            entry["status"] = "error"
+            entry["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            entry["seconds"] = round(time.perf_counter() - start, 4)
+            self.stages[name] = entry
+
+
+def _run_colmap(job_dir: Path, recorder: StageRecorder, log_file) -> Path:
+    """Run the real COLMAP stages through COLMAPPipeline; returns sparse/0 of the work dir"""
+    from app.core.colmap import COLMAPPipeline
+
+    colmap = COLMAPPipeline(job_dir)
+    colmap.database_path.parent.mkdir(parents=True, exist_ok=True)
+
+    with recorder.stage("colmap_feat", mode="binary"):
+        asyncio.run(colmap.extract_features(log_file))
+    with recorder.stage("colmap_match", mode="binary"):
+        asyncio.run(colmap.match_features(log_file))
+    with recorder.stage("colmap_map", mode="binary"):
+        model_path = asyncio.run(colmap.reconstruct(log_file))
+    with recorder.stage("colmap_undist", mode="binary"):
+        work_dir = asyncio.run(colmap.undistort_images(model_path, log_file))
+    with recorder.stage("colmap_convert", mode="binary"):
+        asyncio.run(colmap.convert_to_text(work_dir / "sparse" / "0", log_file))
+
+    return work_dir / "sparse" / "0"
+
+
+def run_once(args, workdir: Path, images: list) -> dict:
+    """Run every stage once and return {stage: {...}}"""
+    from app.config import settings
+    from app.core.gaussian_splatting import GaussianSplattingTrainer
+    from app.utils import s3_utils
+    from app.utils.colmap_validator import simple_validation
+    from app.utils.outlier_filter import filter_outliers
+    from app.utils.ply_downsampler import create_lightweight_versions
+    from benchmarks.local_s3 import LocalS3Client
+    from benchmarks.synthetic import generate_ply, write_sparse_model
+
+    recorder = StageRecorder()
+    job_dir = settings.DATA_DIR / BENCH_PRODUCT_ID
+    shutil.rmtree(job_dir, ignore_errors=True)
+    upload_dir = job_dir / "upload" / "images"
+
+    # ---- S3 download + resize ----
+    s3_root = workdir / "s3"
+    client = LocalS3Client(s3_root, latency_ms=args.s3_latency_ms)
+    s3_paths = []
+    for i, data in enumerate(images):
+        key = f"products/{BENCH_PRODUCT_ID}/img_{i:03d}.jpg"
+        client.put_object(Bucket=BENCH_BUCKET, Key=key, Body=data)
+        s3_paths.append(f"s3://{BENCH_BUCKET}/{key}")
+
+    with mock.patch.object(s3_utils, "get_s3_client", lambda: client):
+        with recorder.stage("s3_download", images=len(images), input_bytes=sum(map(len, images))) as info:
+            info["downloaded"] = asyncio.run(s3_utils.download_s3_images(s3_paths, upload_dir))
+    recorder.stages["s3_download"]["output_bytes"] = sum(p.stat().st_size for p in upload_dir.iterdir())
+
+    # ---- COLMAP (binary or stub) ----
+    log_dir = job_dir / "logs"
+    log_dir.mkdir(parents=True, exist_ok=True)
+    image_names = sorted(p.name for p in upload_dir.iterdir())
+    sparse_dir = None
+
+    with open(log_dir / "process.log", "w") as log_file:
+        if args.colmap != "stub" and shutil.which("colmap"):
+            try:
+                sparse_dir = _run_colmap(job_dir, recorder, log_file)
+            except Exception as e:
+                print(f"⚠️  COLMAP failed on synthetic scene ({e}), falling back to stub model")
+
+        if sparse_dir is None:
+            if args.colmap == "binary":
+                raise RuntimeError("--colmap binary requested but colmap is not available or failed")
+            with recorder.stage("colmap_stub", mode="stub", points=args.sparse_points):
+                sparse_dir = write_sparse_model(
+                    job_dir / "work" / "sparse" / "0", image_names, num_points=args.sparse_points
+                )
+
+        # ---- Validation ----
+        with recorder.stage("validation") as info:
+            result = simple_validation(sparse_dir)
+            info["valid"] = result.is_valid
+
+        # ---- Synthetic training output ----
+        iteration_dir = job_dir / "output" / "point_cloud" / f"iteration_{settings.TRAINING_ITERATIONS}"
+        ply_file = generate_ply(iteration_dir / "point_cloud.ply", args.points, sh_degree=args.sh_degree)
+
+        # ---- Outlier filter ----
+        with recorder.stage("outlier_filter", points=args.points) as info:
+            final_count, removed = filter_outliers(
+                ply_file,
+                iteration_dir / "point_cloud_filtered.ply",
+                k_neighbors=settings.OUTLIER_K_NEIGHBORS,
+                std_threshold=settings.OUTLIER_STD_THRESHOLD,
+                remove_small_clusters=settings.OUTLIER_REMOVE_SMALL_CLUSTERS,
+                min_cluster_ratio=settings.OUTLIER_MIN_CLUSTER_RATIO
+            )
+            info["removed"] = int(removed)
+
+        # ---- LOD ----
+        with recorder.stage("lod") as info:
+            lod = create_lightweight_versions(original_ply_path=ply_file, create_light=True, create_medium=True)
+            info["bytes"] = {k: v.stat().st_size for k, v in lod.items() if v is not None}
+
+        # ---- Compression (filtered PLY already exists → GZIP only) ----
+        with recorder.stage("compression", input_bytes=ply_file.stat().st_size):
+            GaussianSplattingTrainer(job_dir / "work", job_dir / "output").post_process(iteration_dir, log_file)
+
+    # ---- Serving ----
+    _bench_serving(recorder, args.serve_requests)
+
+    return recorder.stages
+
+
+def _bench_serving(recorder: StageRecorder, requests_per_quality: int) -> None:
+    """Serve the PLY through the real FastAPI route for every quality level"""
+    from fastapi.testclient import TestClient
+
+    from app.db import crud
+    from app.db.database import SessionLocal
+    from app.main import app
+
+    db = SessionLocal()
+    try:
+        crud.delete_job(db, BENCH_PRODUCT_ID)
+        crud.create_job(db, BENCH_PRODUCT_ID, image_count=0)
+        crud.update_job_status(db, BENCH_PRODUCT_ID, "COMPLETED")
+    finally:
+        db.close()
+
+    client = TestClient(app)  # not used as a context manager → no lifespan/preflight
+    for quality in ("light", "medium", "full"):
+        with recorder.stage(f"serving_{quality}", requests=requests_per_quality) as info:
+            total_bytes = 0
+            for _ in range(requests_per_quality):
+                response = client.get(f"/recon/pub/{BENCH_PRODUCT_ID}/cloud.ply", params={"quality": quality})
+                response.raise_for_status()
+                total_bytes += len(response.content)
+            info["bytes"] = total_bytes
+
+
+def _aggregate(runs: list) -> dict:
+    """Median seconds per stage across repeats (other fields from the last run)"""
+    stages = {}
+    for name in runs[-1]:
+        samples = [run[name]["seconds"] for run in runs if name in run]
+        entry = dict(runs[-1][name])
+        entry["seconds"] = round(statistics.median(samples), 4)
+        entry["samples"] = samples
+        stages[name] = entry
+    return stages
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=int, default=20, help="number of synthetic views")
+    parser.add_argument("--image-size", default="4032x3024", help="WxH of synthetic photos")
+    parser.add_argument("--points", type=int, default=300000, help="Gaussians in the synthetic PLY")
+    parser.add_argument("--sh-degree", type=int, default=3)
+    parser.add_argument("--sparse-points", type=int, default=2000, help="points in the stub COLMAP model")
+    parser.add_argument("--colmap", choices=["auto", "binary", "stub"], default="auto")
+    parser.add_argument("--s3-latency-ms", type=float, default=20.0, help="simulated per-request S3 latency")
+    parser.add_argument("--serve-requests", type=int, default=5, help="requests per quality level")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--image-cache", action="store_true",
+                        help="enable the shared image cache (in the work dir); repeats after the first hit it")
+    parser.add_argument("--workdir", type=Path, default=None, help="keep artifacts here (default: temp dir)")
+    parser.add_argument("--output", type=Path, default=None, help="write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    workdir = args.workdir or Path(tempfile.mkdtemp(prefix="gs-bench-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    # Isolate from .env: SQLite in the work dir, no MySQL/RDS
+    os.environ["DB_HOST"] = ""
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir / 'jobs.db'}"
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+
+    from app.config import settings
+    from app.db.database import init_db
+    from benchmarks.synthetic import generate_image_set
+
+    settings.DATA_DIR = workdir / "jobs"
+    settings.DATA_DIR.mkdir(parents=True, exist_ok=True)
+    settings.IMAGE_CACHE_ENABLED = args.image_cache
+    settings.IMAGE_CACHE_DIR = workdir / "image_cache"
+    init_db()
+
+    width, height = (int(v) for v in args.image_size.lower().split("x"))
+    print(f"Generating {args.images} synthetic images ({width}x{height})...")
+    images = generate_image_set(args.images, width=width, height=height)
+
+    from app.utils.process_pool import shutdown_process_pool
+
+    runs = []
+    try:
+        for i in range(args.repeat):
+            print(f"Run {i + 1}/{args.repeat}...")
+            runs.append(run_once(args, workdir, images))
+    finally:
+        shutdown_process_pool()
+
+    stages = _aggregate(runs)
+    results = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "params": {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()},
+        },
+        "stages": stages,
+        "total_seconds": round(sum(s["seconds"] for s in stages.values()), 4),
+    }
+
+    for name, entry in stages.items():
+        print(f"  {name:<18} {entry['seconds']:>9.3f}s  {entry['status']}")
+    print(f"  {'total':<18} {results['total_seconds']:>9.3f}s")
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+        print(f"Results written to {args.output}")
+
+    if args.workdir is None:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Synthetic inputs for pipeline benchmarks
+
+- Multi-view image sets: one textured scene warped to simulate camera orbit
+- Gaussian Splatting PLY clouds (same vertex layout as train.py output)
+- COLMAP sparse text models (used when the colmap binary is not available)
+"""
+import io
+import math
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+
+def _perspective_coeffs(src: List[Tuple[float, float]], dst: List[Tuple[float, float]]) -> List[float]:
+    """Coefficients for Image.transform(PERSPECTIVE) mapping dst quad → src quad"""
+    matrix = []
+    for (x, y), (u, v) in zip(dst, src):
+        matrix.append([x, y, 1, 0, 0, 0, -u * x, -u * y])
+        matrix.append([0, 0, 0, x, y, 1, -v * x, -v * y])
+    a = np.array(matrix, dtype=np.float64)
+    b = np.array(src, dtype=np.float64).reshape(8)
+    return np.linalg.solve(a, b).tolist()
+
+
+def _base_texture(width: int, height: int, rng: np.random.Generator) -> Image.Image:
+    """Feature-rich texture (noise + random shapes) so SIFT has something to match"""
+    channels = [Image.effect_noise((width, height), 60) for _ in range(3)]
+    texture = Image.merge("RGB", channels)
+
+    overlay = Image.new("RGB", (width // 4, height // 4), (128, 128, 128))
+    draw = ImageDraw.Draw(overlay)
+    for _ in range(200):
+        x0, y0 = rng.integers(0, overlay.width), rng.integers(0, overlay.height)
+        size = int(rng.integers(5, max(6, overlay.width // 10)))
+        color = tuple(int(c) for c in rng.integers(0, 256, 3))
+        if rng.random() < 0.5:
+            draw.ellipse([x0, y0, x0 + size, y0 + size], fill=color)
+        else:
+            draw.rectangle([x0, y0, x0 + size, y0 + size // 2], fill=color)
+    overlay = overlay.resize((width, height), Image.BILINEAR)
+
+    return Image.blend(texture, overlay, 0.7)
+
+
+def generate_image_set(
+    count: int,
+    width: int = 4032,
+    height: int = 3024,
+    quality: int = 92,
+    rotated_every: int = 3,
+    seed: int = 42
+) -> List[bytes]:
+    """
+    Generate a synthetic multi-view JPEG set (phone-photo sized by default)
+
+    Views orbit ±35° around the scene by warping a shared texture. Every
+    `rotated_every`-th image is stored in portrait pixel order with EXIF
+    orientation 6, like a phone held upright (0 disables).
+
+    Returns:
+        List of encoded JPEG bytes
+    """
+    rng = np.random.default_rng(seed)
+    texture = _base_texture(width, height, rng)
+    src = [(0, 0), (width, 0), (width, height), (0, height)]
+
+    images = []
+    for i in range(count):
+        yaw = math.radians(-35 + 70 * i / max(1, count - 1))
+        shrink = 0.25 * abs(math.sin(yaw))
+        near_left = yaw > 0
+        dy = height * shrink / 2
+        if near_left:
+            dst = [(0, 0), (width, dy), (width, height - dy), (0, height)]
+        else:
+            dst = [(0, dy), (width, 0), (width, height), (0, height - dy)]
+
+        view = texture.transform(
+            (width, height), Image.PERSPECTIVE, _perspective_coeffs(src, dst), Image.BILINEAR
+        )
+
+        exif = Image.Exif()
+        exif[0x010F] = "benchmark"  # Make
+        exif[0x920A] = (4, 1)        # FocalLength
+        if rotated_every and i % rotated_every == rotated_every - 1:
+            view = view.transpose(Image.ROTATE_270)
+            exif[0x0112] = 6  # Orientation: rotate 90 CW to display
+
+        buffer = io.BytesIO()
+        view.save(buffer, format="JPEG", quality=quality, exif=exif)
+        images.append(buffer.getvalue())
+
+    return images
+
+
+def generate_ply(
+    path: Path,
+    num_points: int,
+    sh_degree: int = 3,
+    outlier_ratio: float = 0.02,
+    seed: int = 42
+) -> Path:
+    """
+    Write a binary Gaussian Splatting PLY (x, y, z, normals, SH, opacity, scale, rotation)
+
+    Points lie on a noisy sphere surface with `outlier_ratio` of them scattered
+    far away so that outlier filtering has real work to do.
+    """
+    rng = np.random.default_rng(seed)
+    rest_count = 3 * ((sh_degree + 1) ** 2 - 1)
+
+    fields = ["x", "y", "z", "nx", "ny", "nz", "f_dc_0", "f_dc_1", "f_dc_2"]
+    fields += [f"f_rest_{i}" for i in range(rest_count)]
+    fields += ["opacity", "scale_0", "scale_1", "scale_2", "rot_0", "rot_1", "rot_2", "rot_3"]
+
+    vertices = np.zeros(num_points, dtype=[(name, "<f4") for name in fields])
+
+    directions = rng.normal(size=(num_points, 3))
+    directions /= np.linalg.norm(directions, axis=1, keepdims=True)
+    positions = directions * (1.0 + rng.normal(scale=0.02, size=(num_points, 1)))
+
+    outlier_count = int(num_points * outlier_ratio)
+    if outlier_count:
+        positions[:outlier_count] = rng.uniform(-8, 8, size=(outlier_count, 3))
+
+    vertices["x"], vertices["y"], vertices["z"] = positions.T.astype(np.float32)
+    for name in ["f_dc_0", "f_dc_1", "f_dc_2"] + [f"f_rest_{i}" for i in range(rest_count)]:
+        vertices[name] = rng.normal(scale=0.3, size=num_points)
+    vertices["opacity"] = rng.normal(size=num_points)
+    for i in range(3):
+        vertices[f"scale_{i}"] = rng.normal(loc=-4.5, scale=0.5, size=num_points)
+    rotations = rng.normal(size=(num_points, 4))
+    rotations /= np.linalg.norm(rotations, axis=1, keepdims=True)
+    for i in range(4):
+        vertices[f"rot_{i}"] = rotations[:, i]
+
+    header = ["ply", "format binary_little_endian 1.0", f"element vertex {num_points}"]
+    header += [f"property float {name}" for name in fields]
+    header += ["end_header"]
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(("\n".join(header) + "\n").encode("ascii"))
+        f.write(vertices.tobytes())
+    return path
+
+
+def write_sparse_model(sparse_dir: Path, image_names: List[str], num_points: int = 2000, seed: int = 42) -> Path:
+    """
+    Write a COLMAP text model (cameras.txt, images.txt, points3D.txt)
+
+    Cameras orbit the origin; every point is observed by 2-4 images.
+    Stands in for the colmap binary on machines where it is not installed.
+    """
+    rng = np.random.default_rng(seed)
+    sparse_dir.mkdir(parents=True, exist_ok=True)
+
+    with open(sparse_dir / "cameras.txt", "w") as f:
+        f.write("# Camera list with one line of data per camera:\n")
+        f.write("1 PINHOLE 1600 1200 1400 1400 800 600\n")
+
+    with open(sparse_dir / "images.txt", "w") as f:
+        f.write("# Image list with two lines of data per image:\n")
+        for i, name in enumerate(image_names, start=1):
+            angle = 2 * math.pi * i / max(1, len(image_names))
+            qw, qy = math.cos(angle / 2), math.sin(angle / 2)
+            f.write(f"{i} {qw:.6f} 0 {qy:.6f} 0 0 0 4.0 1 {name}\n")
+            f.write("\n")
+
+    with open(sparse_dir / "points3D.txt", "w") as f:
+        f.write("# 3D point list with one line of data per point:\n")
+        for point_id in range(1, num_points + 1):
+            x, y, z = rng.normal(size=3)
+            track_len = int(rng.integers(2, 5))
+            image_ids = rng.choice(len(image_names), size=min(track_len, len(image_names)), replace=False) + 1
+            track = " ".join(f"{image_id} {point_id}" for image_id in image_ids)
+            f.write(f"{point_id} {x:.4f} {y:.4f} {z:.4f} 128 128 128 0.5 {track}\n")
+
+    return sparse_dir
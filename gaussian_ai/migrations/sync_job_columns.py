@@ -0,0 +1,53 @@
+"""
+DB Migration: Add columns that exist in app/db/models.py but not in the database
+
+- Adds: any new nullable column on jobs / error_logs (e.g. peak_gpu_memory_mb, peak_rss_mb)
+- Reason: Base.metadata.create_all() never alters existing tables
+- Safe to run repeatedly (existing columns are skipped)
+
+Usage:
+    cd gaussian_ai
+    python -m migrations.sync_job_columns
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import inspect, text  # noqa: E402
+
+from app.db.database import engine  # noqa: E402
+from app.db.models import Base  # noqa: E402
+
+
+def migrate():
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    print(f"📊 Syncing columns on {engine.url.render_as_string(hide_password=True)}...")
+
+    added = []
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                print(f"- {table.name}: table missing, will be created on server start")
+                continue
+
+            existing_columns = {col["name"] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+                added.append(f"{table.name}.{column.name}")
+                print(f"✓ Added {table.name}.{column.name} ({column_type})")
+
+    if added:
+        print(f"✅ Migration completed successfully! ({len(added)} columns added)")
+    else:
+        print("✅ Schema already up to date")
+
+
+if __name__ == "__main__":
+    migrate()
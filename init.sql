@@ -54,6 +54,8 @@ CREATE TABLE `fault_description` (
     `markdown`      TEXT            NULL,
     `status`        ENUM('QUEUED', 'RUNNING', 'DONE', 'FAILED') NOT NULL DEFAULT 'QUEUED',
     `error_msg`     TEXT            NULL,
+    `input_fingerprint` CHAR(64)    NULL,   -- 완료된 분석의 입력 지문 (S3 ETag + 제품명 + 모델)
+    `completion_key` VARCHAR(64)    NULL,   -- 완료 기록 멱등 키 (job_count 중복 증가 방지)
     `created_at`    DATETIME        NOT NULL,
     `updated_at`    DATETIME        NULL,
     `completed_at`  DATETIME        NULL,
@@ -0,0 +1,3 @@
+"""
+Code shared by gaussian_ai and description_ai (imported from the repository root)
+"""
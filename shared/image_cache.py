@@ -0,0 +1,165 @@
+"""
+Content-addressed image cache shared between services
+
+Used by both gaussian_ai and description_ai (each wires it to its settings in
+app/utils/image_cache.py), so both services can point IMAGE_CACHE_DIR at one
+directory and reuse each other's work for the same product photos:
+
+    <root>/index/<sha1(bucket/key)>.json            {"etag": ..., "sha256": ...}
+    <root>/blobs/<sha[:2]>/<sha256>/<variant>       processed image bytes
+
+Variants are named by purpose and size (colmap_1600.jpg, inspect_1200.jpg,
+desc_800.jpg). Total blob size is bounded; least recently read variants are
+evicted first (mtime is bumped on every hit). All writes are atomic
+(temp file + os.replace), so concurrent processes never see partial files.
+
+Storage only: callers do the S3 GET and image processing. Both services
+validate a cached variant the same way: cached_variant() returns the ETag the
+variant was made from, the caller sends a conditional GET (If-None-Match) with
+it, and a 304 means the cached bytes are current. A changed object comes back
+in the same response, so a cache lookup never costs an extra request.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+
+class ImageCache:
+    """Disk cache of processed image variants keyed by content hash"""
+
+    def __init__(self, root: Path, max_bytes: int, log: Callable[[str], None] = print):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.log = log
+        self.index_dir = self.root / "index"
+        self.blob_dir = self.root / "blobs"
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._approx_bytes = self._scan_size()
+
+    # ---- S3 object → content hash ----
+
+    def _index_path(self, bucket: str, key: str) -> Path:
+        name = hashlib.sha1(f"{bucket}/{key}".encode("utf-8")).hexdigest()
+        return self.index_dir / f"{name}.json"
+
+    def peek(self, bucket: str, key: str) -> Optional[dict]:
+        """Index entry for s3://bucket/key ({"etag", "sha256"}), unvalidated"""
+        try:
+            return json.loads(self._index_path(bucket, key).read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def lookup(self, bucket: str, key: str, etag: str) -> Optional[str]:
+        """Content hash of s3://bucket/key if it is still at the given ETag"""
+        entry = self.peek(bucket, key)
+        return entry["sha256"] if entry and entry.get("etag") == etag else None
+
+    def remember(self, bucket: str, key: str, etag: str, sha256: str) -> None:
+        """Record that s3://bucket/key at ETag has the given content hash"""
+        payload = json.dumps({"bucket": bucket, "key": key, "etag": etag, "sha256": sha256})
+        self._atomic_write(self._index_path(bucket, key), payload.encode("utf-8"))
+
+    # ---- Variants ----
+
+    def _variant_path(self, sha256: str, variant: str) -> Path:
+        return self.blob_dir / sha256[:2] / sha256 / variant
+
+    def has(self, sha256: str, variant: str) -> bool:
+        return self._variant_path(sha256, variant).exists()
+
+    def get(self, sha256: str, variant: str) -> Optional[bytes]:
+        """Read a cached variant (marks it as recently used)"""
+        path = self._variant_path(sha256, variant)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+            return data
+        except FileNotFoundError:
+            return None
+
+    def put(self, sha256: str, variant: str, data: bytes) -> None:
+        """Store a variant, evicting old entries if the cache is over budget"""
+        self._atomic_write(self._variant_path(sha256, variant), data)
+        with self._lock:
+            self._approx_bytes += len(data)
+            over_budget = self._approx_bytes > self.max_bytes
+        if over_budget:
+            self.evict()
+
+    # ---- Read-through helpers (both services) ----
+
+    def cached_variant(self, bucket: str, key: str, variant: str) -> Tuple[Optional[str], Optional[bytes]]:
+        """(ETag, bytes) of the cached variant for s3://bucket/key, or (None, None)"""
+        entry = self.peek(bucket, key)
+        if not entry or not entry.get("etag"):
+            return None, None
+        data = self.get(entry["sha256"], variant)
+        if data is None:
+            return None, None
+        return entry["etag"], data
+
+    def store(self, bucket: str, key: str, etag: str, original: bytes, variant: str, processed: bytes) -> None:
+        """Cache a processed variant of the object's original bytes and index it under its ETag"""
+        sha256 = hashlib.sha256(original).hexdigest()
+        self.put(sha256, variant, processed)
+        if etag:
+            self.remember(bucket, key, etag, sha256)
+
+    # ---- Maintenance ----
+
+    def _atomic_write(self, path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def _blob_files(self):
+        for path in self.blob_dir.glob("*/*/*"):
+            if path.is_file() and not path.name.startswith(".tmp-"):
+                try:
+                    yield path, path.stat()
+                except FileNotFoundError:
+                    continue  # evicted by another process
+
+    def _scan_size(self) -> int:
+        return sum(st.st_size for _, st in self._blob_files())
+
+    def evict(self) -> int:
+        """Delete least recently used variants until under 90% of max_bytes; returns bytes freed"""
+        with self._lock:
+            files = sorted(self._blob_files(), key=lambda item: item[1].st_mtime)
+            total = sum(st.st_size for _, st in files)
+            target = int(self.max_bytes * 0.9)
+            freed = 0
+
+            for path, st in files:
+                if total - freed <= target:
+                    break
+                path.unlink(missing_ok=True)
+                freed += st.st_size
+                try:
+                    path.parent.rmdir()  # drop empty <sha256>/ dir
+                except OSError:
+                    pass
+
+            self._approx_bytes = total - freed
+
+        if freed:
+            self.log(f"Image cache evicted {freed / 1024 / 1024:.1f}MB")
+        return freed
+
+    def stats(self) -> dict:
+        return {"root": str(self.root), "bytes": self._approx_bytes, "max_bytes": self.max_bytes}
+